@@ -0,0 +1,107 @@
+###
+### klingon_file_manager startup benchmark
+###
+"""
+# Startup Benchmark
+
+Measures the import time of `klingon_file_manager` and the latency of the
+first local `get_file`/`post_file` call in fresh interpreter processes, and
+reports which heavy dependencies were imported along the way.
+
+Each measurement runs in a new subprocess so that nothing is cached between
+runs. The median of `--runs` samples is reported.
+
+## Usage Examples
+
+Run the benchmark with the default settings:
+```bash
+python benchmarks/bench_startup.py
+```
+
+Run it in fast-startup mode:
+```bash
+KFM_FAST_STARTUP=1 python benchmarks/bench_startup.py
+```
+
+Fail (exit code 1) if the import takes longer than 150ms or pulls in boto3:
+```bash
+python benchmarks/bench_startup.py --max-import-ms 150 --forbid boto3
+```
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = r"""
+import json, os, sys, tempfile, time
+start = time.perf_counter()
+import klingon_file_manager
+from klingon_file_manager import get_file, post_file
+imported = time.perf_counter()
+path = os.path.join(tempfile.mkdtemp(), "bench.txt")
+post_file(path, "klingon file manager startup benchmark")
+posted = time.perf_counter()
+get_file(path)
+fetched = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_post_ms": (posted - imported) * 1000,
+    "first_get_ms": (fetched - posted) * 1000,
+    "modules": [m for m in ("boto3", "botocore", "magic", "dotenv") if m in sys.modules],
+}))
+"""
+
+
+def run_probe() -> dict:
+    """
+    # Run Probe
+    Runs the probe script in a fresh interpreter and returns its measurements.
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, env.get("PYTHONPATH")]))
+    env.setdefault("PYTHON_LOGLEVEL", "WARNING")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=tempfile.gettempdir(),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh processes to sample.")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if the median import time exceeds this.")
+    parser.add_argument("--forbid", action="append", default=[], help="Fail if this module is imported (repeatable).")
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    report = {
+        key: round(statistics.median(sample[key] for sample in samples), 2)
+        for key in ("import_ms", "first_post_ms", "first_get_ms")
+    }
+    report["modules"] = sorted({module for sample in samples for module in sample["modules"]})
+    report["fast_startup"] = os.getenv("KFM_FAST_STARTUP", "")
+    print(json.dumps(report, indent=2))
+
+    failed = False
+    if args.max_import_ms is not None and report["import_ms"] > args.max_import_ms:
+        print(f"FAIL: import took {report['import_ms']}ms (limit {args.max_import_ms}ms)")
+        failed = True
+    for module in args.forbid:
+        if module in report["modules"]:
+            print(f"FAIL: {module} was imported")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,41 @@ handling.
 - [`delete`](/klingon_file_manager/delete.html): Provides functionality for
 deleting files from AWS S3 or local storage, with checks for proper permissions
 and existence.
+- [`credentials`](/klingon_file_manager/credentials.html): Resolves AWS
+credentials lazily on first S3 use and caches the validated result and the
+per-bucket permission map for a configurable TTL.
+- [`session`](/klingon_file_manager/session.html): Provides the `FileManager`
+session object that owns pooled, reusable S3 clients. The module level
+functions delegate to a default instance, or to a cached per-credential
+instance when called with `credentials` or `profile`.
+- [`hashing`](/klingon_file_manager/hashing.html): Works out the MD5 hash,
+size and MIME sample of a payload in one pass for every step of a post,
+and resolves the MD5 of S3 objects from their metadata or ETag.
+- [`checksums`](/klingon_file_manager/checksums.html): Computes the CRC32C,
+CRC32 and SHA256 checksums S3 validates on upload and stores with objects.
+- [`healing`](/klingon_file_manager/healing.html): Writes MD5 hashes
+computed by gets back to S3 object metadata in the background, rate limited.
+- [`md5cache`](/klingon_file_manager/md5cache.html): Caches the MD5 of
+local files against their device, inode, size and modification time, in
+memory, a SQLite file or extended attributes, so unchanged files are not
+read again to be hashed.
+- [`mime`](/klingon_file_manager/mime.html): Detects MIME types from file
+extensions, or with a per-thread libmagic instance given only the first
+bytes of the content.
+- [`streams`](/klingon_file_manager/streams.html): Provides the
+`HashingReader` returned by streaming gets, which hashes data as it is read,
+and the readers used to stream file objects and chunk iterators to `post_file`.
+- [`transfer`](/klingon_file_manager/transfer.html): Uploads large objects
+to S3 as parallel multipart uploads and downloads them as parallel ranged
+GETs, with per-part retries.
+- [`copy`](/klingon_file_manager/copy.html): Copies files between local and
+S3 storage, inside S3 with `copy_object` or `UploadPartCopy` when both ends
+are S3.
+- [`local`](/klingon_file_manager/local.html): Moves and copies local files
+with a rename or an in-kernel copy instead of reading them into Python.
+- [`regions`](/klingon_file_manager/regions.html): Remembers which region
+each bucket lives in so S3 requests go straight to the bucket's regional
+endpoint instead of being redirected.
 - [`utils`](/klingon_file_manager/utils.html): A collection of utility
 functions that support the main operations.
   - [`timing_decorator`](/klingon_file_manager/utils.html#timing_decorator):
@@ -133,8 +168,103 @@ logger.info(f"S3 files: {s3_files}")
 
 """
 
-from .manage import manage_file, move_file, FilesystemRouter
-from .delete import delete_file
-from .get import get_file
-from .post import post_file, _post_to_local, _post_to_s3
-from .utils import get_mime_type, check_bucket_permissions, get_aws_credentials, is_binary_file, get_s3_metadata, timing_decorator, get_file_size, get_md5_hash, get_mime_type_content,parallel_check_bucket_permissions,get_md5_hash_filename,check_file_exists, compare_s3_local_file
+import importlib
+
+# Public names are resolved on first access so that importing the package
+# does not import boto3, botocore or libmagic. Each entry maps an exported
+# name to the submodule that defines it.
+_EXPORTS = {
+    'manage_file': 'manage',
+    'move_file': 'manage',
+    'FilesystemRouter': 'manage',
+    'delete_file': 'delete',
+    'get_file': 'get',
+    'download_file': 'get',
+    'post_file': 'post',
+    '_post_to_local': 'post',
+    '_post_to_s3': 'post',
+    'CredentialProvider': 'credentials',
+    'get_credentials': 'credentials',
+    'invalidate_credentials': 'credentials',
+    'set_credentials_ttl': 'credentials',
+    'PermissionCache': 'credentials',
+    'get_permission_cache': 'credentials',
+    'refresh_bucket_permissions': 'credentials',
+    'invalidate_bucket_permissions': 'credentials',
+    'BucketPermissions': 'credentials',
+    'get_bucket_permissions': 'credentials',
+    'record_operation_outcome': 'credentials',
+    'FileManager': 'session',
+    'get_current_manager': 'session',
+    'get_default_manager': 'session',
+    'set_default_manager': 'session',
+    'reset_default_manager': 'session',
+    'get_tenant_manager': 'session',
+    'use_credentials': 'session',
+    'clear_tenant_managers': 'session',
+    'ContentAnalysis': 'hashing',
+    'analyze_content': 'hashing',
+    'etag_md5': 'hashing',
+    'resolve_md5': 'hashing',
+    'Checksum': 'checksums',
+    'new_checksum': 'checksums',
+    'composite_checksum': 'checksums',
+    'stored_checksum': 'checksums',
+    'MD5Healer': 'healing',
+    'get_md5_healer': 'healing',
+    'schedule_md5_heal': 'healing',
+    'MD5Cache': 'md5cache',
+    'MemoryMD5Cache': 'md5cache',
+    'SQLiteMD5Cache': 'md5cache',
+    'XattrMD5Cache': 'md5cache',
+    'cached_md5': 'md5cache',
+    'get_md5_cache': 'md5cache',
+    'set_md5_cache': 'md5cache',
+    'MimeDetector': 'mime',
+    'get_mime_detector': 'mime',
+    'detect_mime_type': 'mime',
+    'HashingReader': 'streams',
+    'ChunkReader': 'streams',
+    'upload_multipart': 'transfer',
+    'download_multipart': 'transfer',
+    'multipart_etag': 'transfer',
+    'copy_multipart': 'transfer',
+    'copy_local_file': 'local',
+    'copy_file': 'copy',
+    'move_local_file': 'local',
+    'RegionCache': 'regions',
+    'get_region_cache': 'regions',
+    'get_bucket_region': 'regions',
+    'invalidate_bucket_regions': 'regions',
+    'get_s3_client': 'utils',
+    'get_mime_type': 'utils',
+    'check_bucket_permissions': 'utils',
+    'get_aws_credentials': 'utils',
+    'is_binary_file': 'utils',
+    'get_s3_metadata': 'utils',
+    'timing_decorator': 'utils',
+    'get_file_size': 'utils',
+    'get_md5_hash': 'utils',
+    'get_mime_type_content': 'utils',
+    'parallel_check_bucket_permissions': 'utils',
+    'get_md5_hash_filename': 'utils',
+    'check_file_exists': 'utils',
+    'compare_s3_local_file': 'utils',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """@private Import the submodule that defines `name` on first access."""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """@private Include the lazily exported names in `dir()`."""
+    return sorted(set(globals()) | set(_EXPORTS))
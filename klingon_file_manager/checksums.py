@@ -0,0 +1,211 @@
+# checksums.py
+"""
+# Checksums Overview
+
+S3 additional checksums for the Klingon File Manager.
+
+Besides the hex MD5 kept in the `md5` metadata, S3 can store and validate a
+CRC32C, CRC32 or SHA256 checksum with every object. The checksum is sent with
+the upload, so S3 rejects corrupted data itself, and it is returned on reads
+so a download can be checked against it instead of hashing the content with
+MD5 again. The CRCs in particular are far cheaper to compute than MD5.
+
+For multipart uploads every part carries its own checksum, computed on the
+thread that uploads the part, and S3 stores a composite checksum for the
+object: the checksum of the part checksums followed by `-` and the part
+count, just like the multipart ETag.
+
+Set `KFM_CHECKSUM_ALGORITHM` (or pass `checksum_algorithm=`) to `CRC32C`,
+`CRC32` or `SHA256` to turn them on. CRC32C needs the `awscrt` package
+(installed with `boto3[crt]`) or the `crc32c` package.
+
+# Contents
+
+## new_checksum
+Returns an incremental checksum object for an algorithm.
+
+## resolve_algorithm
+Validates an algorithm name, falling back to `KFM_CHECKSUM_ALGORITHM`.
+
+## composite_checksum
+Computes the composite checksum S3 assigns to a multipart object.
+
+## stored_checksum
+Reads the checksum S3 stored for an object from a response.
+
+# Usage Examples
+
+To checksum data the way S3 does:
+```python
+>>> checksum = new_checksum('CRC32')
+>>> checksum.update(b'Hello, world!')
+>>> checksum.b64digest()
+'6+bG5g=='
+```
+"""
+
+import os
+import zlib
+import base64
+import hashlib
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+ALGORITHMS = ('CRC32C', 'CRC32', 'SHA256')
+"""@private Additional checksum algorithms supported."""
+
+CHECKSUM_ALGORITHM = os.getenv('KFM_CHECKSUM_ALGORITHM', '').strip().upper() or None
+"""@private Algorithm used when a call does not name one; `None` for MD5 only."""
+
+
+def _crc32c_function():
+    """@private CRC32C implementation from `awscrt` or `crc32c`, whichever is installed."""
+    try:
+        from awscrt import checksums
+        return checksums.crc32c
+    except ImportError:
+        pass
+    try:
+        import crc32c
+        return lambda data, value=0: crc32c.crc32c(data, value)
+    except ImportError:
+        raise ImportError(
+            "CRC32C checksums need the 'awscrt' package (pip install 'boto3[crt]') "
+            "or the 'crc32c' package."
+        ) from None
+
+
+class _Crc:
+    """@private Incremental CRC with a 4-byte big-endian digest, as S3 encodes it."""
+
+    def __init__(self, function):
+        self._function = function
+        self._value = 0
+
+    def update(self, data) -> None:
+        self._value = self._function(data, self._value)
+
+    def digest(self) -> bytes:
+        return struct.pack('>I', self._value & 0xFFFFFFFF)
+
+
+class Checksum:
+    """
+    # Checksum
+
+    Incremental checksum using one of the S3 additional checksum algorithms.
+
+    ## Methods
+
+    | Method        | Description |
+    |---------------|-------------|
+    | `update()`    | Adds data to the checksum. |
+    | `digest()`    | Returns the binary checksum. |
+    | `b64digest()` | Returns the checksum base64 encoded, as S3 sends it. |
+    """
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        if algorithm == 'SHA256':
+            self._state = hashlib.sha256()
+        elif algorithm == 'CRC32':
+            self._state = _Crc(zlib.crc32)
+        else:
+            self._state = _Crc(_crc32c_function())
+
+    def update(self, data) -> None:
+        self._state.update(data)
+
+    def digest(self) -> bytes:
+        return self._state.digest()
+
+    def b64digest(self) -> str:
+        return base64.b64encode(self.digest()).decode('utf-8')
+
+
+def resolve_algorithm(algorithm: Optional[str] = None) -> Optional[str]:
+    """
+    # Resolve Algorithm
+
+    Returns `algorithm` in upper case, or `KFM_CHECKSUM_ALGORITHM` when no
+    algorithm is given, or `None` when neither is set.
+
+    ## Arguments
+
+    | Name      | Type | Description | Default |
+    |-----------|------|-------------|---------|
+    | algorithm | str  | `CRC32C`, `CRC32` or `SHA256`. | None |
+
+    ## Raises
+    `ValueError` for an algorithm S3 does not support here.
+    """
+    algorithm = (algorithm or CHECKSUM_ALGORITHM or '').upper() or None
+    if algorithm is not None and algorithm not in ALGORITHMS:
+        raise ValueError(f"Unsupported checksum algorithm {algorithm!r}; use one of {', '.join(ALGORITHMS)}.")
+    return algorithm
+
+
+def checksum_enabled(checksum: Optional[bool] = None) -> bool:
+    """@private Whether a read asks S3 for checksums: `checksum`, or whether `KFM_CHECKSUM_ALGORITHM` is set."""
+    return bool(CHECKSUM_ALGORITHM) if checksum is None else bool(checksum)
+
+
+def new_checksum(algorithm: str) -> Checksum:
+    """
+    # New Checksum
+
+    Returns an empty `Checksum` for `algorithm`.
+
+    ## Arguments
+
+    | Name      | Type | Description | Default |
+    |-----------|------|-------------|---------|
+    | algorithm | str  | `CRC32C`, `CRC32` or `SHA256`. |   |
+    """
+    return Checksum(resolve_algorithm(algorithm))
+
+
+def checksum_field(algorithm: str) -> str:
+    """@private Request and response field carrying a checksum, e.g. `ChecksumCRC32C`."""
+    return f"Checksum{algorithm}"
+
+
+def composite_checksum(algorithm: str, part_digests: List[bytes]) -> str:
+    """
+    # Composite Checksum
+
+    Returns the checksum S3 gives a multipart object: the checksum of the
+    concatenated binary part checksums, base64 encoded, followed by `-` and
+    the part count.
+
+    ## Arguments
+
+    | Name         | Type        | Description | Default |
+    |--------------|-------------|-------------|---------|
+    | algorithm    | str         | Checksum algorithm of the parts. |   |
+    | part_digests | List[bytes] | Binary checksum of each part, in order. |   |
+    """
+    checksum = new_checksum(algorithm)
+    checksum.update(b''.join(part_digests))
+    return f"{checksum.b64digest()}-{len(part_digests)}"
+
+
+def stored_checksum(response: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    # Stored Checksum
+
+    Returns `(algorithm, value)` for the additional checksum in a
+    `HeadObject` or `GetObject` response made with `ChecksumMode='ENABLED'`,
+    or `None` when the object has none that is supported here.
+
+    ## Arguments
+
+    | Name     | Type | Description | Default |
+    |----------|------|-------------|---------|
+    | response | dict | S3 response for the object. |   |
+    """
+    for algorithm in ALGORITHMS:
+        value = response.get(checksum_field(algorithm))
+        if isinstance(value, str) and value:
+            return algorithm, value
+    return None
@@ -0,0 +1,198 @@
+# copy.py
+"""
+# Copy Overview
+
+Copy files within and between local and AWS S3 storage.
+
+Each combination of source and destination is copied the cheapest way
+available. Between two S3 locations the copy happens inside S3 with
+`copy_object`, or parallel `UploadPartCopy` requests for objects over 5 GB,
+so no data passes through this process. Between two local paths the kernel
+copies the file. Across storage types the file is streamed with
+`post_file` or `download_file`.
+
+# Functions
+
+## copy_file
+Function for copying files on locally mounted or S3 storage.
+
+# Usage Examples
+To copy an object to another bucket:
+```python
+>>> manage_file('copy', 's3://bucket/file', dst_path='s3://backup/file')
+```
+
+To copy a local file to an S3 bucket:
+```python
+>>> copy_file('/path/to/local/file', 's3://bucket/file')
+```
+"""
+
+
+from typing import Union, Dict, Optional
+import os
+from .checksums import resolve_algorithm
+from .credentials import record_operation_outcome
+from .session import get_current_manager, use_credentials
+from .local import copy_local_file
+from .transfer import MAX_COPY_OBJECT_SIZE, copy_multipart
+from .post import post_file
+from .get import download_file
+
+
+def copy_file(
+    src_path: str,
+    dst_path: str,
+    debug: bool = False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    verify: bool = False,
+    checksum_algorithm: Optional[str] = None,
+) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    """
+    # Copies a file from one path to another.
+
+    Both paths can be local or S3 URIs. S3 to S3 copies are done by S3
+    itself and keep the source's user metadata, including the stored `md5`.
+
+    ## Args
+
+    | Name        | Type    | Description | Default |
+    |-------------|---------|-------------|---------|
+    | src_path    | string  | Path of the file to copy |   |
+    | dst_path    | string  | Path to copy the file to; replaced if it exists |   |
+    | debug       | boolean | Flag to enable/disable debugging | False |
+    | credentials | dict    | Per-call AWS credentials, see `session.get_tenant_manager` | None |
+    | profile     | string  | Named AWS profile to use instead of the default chain | None |
+    | verify      | boolean | For local copies, compare MD5 checksums of both files | False |
+    | checksum_algorithm | string | Additional checksum S3 stores with a copy to S3 and downloads are verified against (`KFM_CHECKSUM_ALGORITHM`) | None |
+
+    ## Returns
+
+    | Key         | Type       | Description |
+    |-------------|------------|-------------|
+    | status      | int        | HTTP-like status code |
+    | message     | string     | Message describing the outcome |
+    | source      | string     | The source path provided as input |
+    | destination | string     | The destination path provided as input |
+    | md5         | string     | MD5 hash of the copied file, when known |
+    | debug       | dictionary | Debug information, including the copy `method` |
+    """
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return copy_file(src_path, dst_path, debug, verify=verify, checksum_algorithm=checksum_algorithm)
+
+    debug_info = {}
+    src_s3 = src_path.startswith("s3://")
+    dst_s3 = dst_path.startswith("s3://")
+
+    try:
+        checksum_algorithm = resolve_algorithm(checksum_algorithm)
+        if src_s3 and dst_s3:
+            return _copy_s3_to_s3(src_path, dst_path, debug, checksum_algorithm)
+        if not src_s3 and not dst_s3:
+            copied = copy_local_file(src_path, dst_path, verify=verify)
+            debug_info["method"] = copied["method"]
+            md5 = copied["md5"]
+        else:
+            if src_s3:
+                transfer_result = download_file(src_path, dst_path, debug, checksum=bool(checksum_algorithm) or None)
+                debug_info["method"] = "download"
+            else:
+                # post_file would take a missing path for text content
+                if not os.path.isfile(src_path):
+                    raise FileNotFoundError(f"No such file: '{src_path}'")
+                transfer_result = post_file(dst_path, src_path, debug=debug, checksum_algorithm=checksum_algorithm)
+                debug_info["method"] = "upload"
+            debug_info["transfer"] = transfer_result["debug"]
+            if transfer_result["status"] != 200:
+                return {
+                    "status": transfer_result["status"],
+                    "message": transfer_result["message"],
+                    "source": src_path,
+                    "destination": dst_path,
+                    "debug": debug_info if debug else {},
+                }
+            md5 = transfer_result["md5"]
+    except Exception as exception:
+        debug_info["exception"] = str(exception)
+        return {
+            "status": 500,
+            "message": f"Failed to copy file: {exception}",
+            "source": src_path,
+            "destination": dst_path,
+            "debug": debug_info if debug else {},
+        }
+
+    return {
+        "status": 200,
+        "message": "File copied successfully.",
+        "source": src_path,
+        "destination": dst_path,
+        "md5": md5,
+        "debug": debug_info if debug else {},
+    }
+
+
+def _copy_s3_to_s3(
+    src_path: str, dst_path: str, debug: bool, checksum_algorithm: Optional[str] = None
+) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    """
+    @private Copy an object inside S3. Objects up to 5 GB take a single
+    `copy_object`, which carries the metadata over by itself; larger ones are
+    copied in parallel parts with the source's metadata set explicitly. With
+    a `checksum_algorithm`, S3 computes that checksum for the copy.
+    """
+    debug_info = {}
+    source_bucket, source_key = src_path[5:].split("/", 1)
+    bucket_name, key = dst_path[5:].split("/", 1)
+    manager = get_current_manager()
+
+    head = manager.client_for(source_bucket).head_object(Bucket=source_bucket, Key=source_key)
+    metadata = head.get("Metadata") or {}
+    size = head["ContentLength"]
+    etag = head.get("ETag")
+
+    s3_client = manager.client_for(bucket_name)
+    try:
+        if size > MAX_COPY_OBJECT_SIZE:
+            response = copy_multipart(
+                s3_client,
+                source_bucket,
+                source_key,
+                bucket_name,
+                key,
+                size,
+                metadata=metadata,
+                content_type=head.get("ContentType"),
+                etag=etag,
+                checksum_algorithm=checksum_algorithm,
+            )
+            debug_info["method"] = "upload_part_copy"
+            debug_info["parts"] = response["Parts"]
+        else:
+            copy_args = {
+                "CopySource": {"Bucket": source_bucket, "Key": source_key},
+                "Bucket": bucket_name,
+                "Key": key,
+                "MetadataDirective": "COPY",
+            }
+            if etag:
+                copy_args["CopySourceIfMatch"] = etag
+            if checksum_algorithm:
+                copy_args["ChecksumAlgorithm"] = checksum_algorithm
+            s3_client.copy_object(**copy_args)
+            debug_info["method"] = "copy_object"
+    except Exception as exception:
+        record_operation_outcome(bucket_name, "PutObject", exception)
+        raise
+    record_operation_outcome(bucket_name, "PutObject")
+
+    return {
+        "status": 200,
+        "message": "File copied successfully within S3.",
+        "source": src_path,
+        "destination": dst_path,
+        "md5": metadata.get("md5"),
+        "debug": debug_info if debug else {},
+    }
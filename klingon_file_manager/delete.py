@@ -26,14 +26,24 @@ To delete a file from an S3 bucket:
 """
 
 
-from typing import Union, Dict
+from typing import Union, Dict, Optional
 import os
-import boto3
-from .utils import get_aws_credentials
-
-def delete_file(path: str, debug: bool = False) -> Dict[str, Union[int, str, Dict[str, str]]]:
+from .credentials import is_credentials_error, record_operation_outcome
+from .session import get_current_manager, use_credentials
+
+def delete_file(
+    path: str,
+    debug: bool = False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+) -> Dict[str, Union[int, str, Dict[str, str]]]:
     """
     # Delete a file from either a locally mounted or S3 storage.
+
+    S3 deletes issue a single `delete_object` request. Missing or invalid
+    credentials are detected from that request's response and reported with
+    a 403 status, so no credential or bucket permission checks are made up
+    front.
     
     ## Args
 
@@ -41,6 +51,8 @@ def delete_file(path: str, debug: bool = False) -> Dict[str, Union[int, str, Dic
     |-----------|-------------------|-------------|---------|
     | path      | string            | Path where the file should be deleted. Can be a local path or an S3 URI. |   |
     | debug     | boolean           | Flag to enable/disable debugging | False |
+    | credentials | dict            | Per-call AWS credentials, see `session.get_tenant_manager` | None |
+    | profile   | string            | Named AWS profile to use instead of the default chain | None |
 
     ## Returns
     A dictionary containing the status of the delete operation as follows:
@@ -59,18 +71,16 @@ def delete_file(path: str, debug: bool = False) -> Dict[str, Union[int, str, Dic
     | debug     | dictionary        | Debug information |
     
     """
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return delete_file(path, debug)
+
     debug_info = {}
 
     try:
         if path.startswith("s3://"):
-            aws_credentials = get_aws_credentials()
-            if aws_credentials["status"] != 200:
-                return {
-                    "status": 403,
-                    "message": "AWS credentials not found",
-                    "debug": debug_info if debug else {},
-                }
-
+            # Credentials are validated by the delete request itself rather
+            # than by a separate IAM and bucket permission scan
             s3_uri_parts = path[5:].split("/", 1)
             bucket_name, key = s3_uri_parts
 
@@ -81,10 +91,12 @@ def delete_file(path: str, debug: bool = False) -> Dict[str, Union[int, str, Dic
                     "key": key
                 })
 
-            s3_client = boto3.client("s3")
+            # Reuse the current FileManager's pooled client for the bucket's region
+            s3_client = get_current_manager().client_for(bucket_name)
 
             try:
                 s3_client.delete_object(Bucket=bucket_name, Key=key)
+                record_operation_outcome(bucket_name, "DeleteObject")
                 return {
                     "status": 200,
                     "message": "File deleted successfully from S3.",
@@ -93,6 +105,13 @@ def delete_file(path: str, debug: bool = False) -> Dict[str, Union[int, str, Dic
             except Exception as e:
                 if debug:
                     debug_info["exception"] = str(e)
+                if is_credentials_error(e):
+                    return {
+                        "status": 403,
+                        "message": "AWS credentials not found",
+                        "debug": debug_info if debug else {},
+                    }
+                record_operation_outcome(bucket_name, "DeleteObject", e)
                 return {
                     "status": 500,
                     "message": "Failed to delete file from S3.",
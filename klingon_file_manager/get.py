@@ -13,6 +13,51 @@ and specific actions from `get`, `post`, and `delete` modules.
 ## get_file
 Function for getting files from locally mounted filesystems or S3.
 
+## download_file
+Function for downloading an S3 object straight to a local file.
+
+# Parallel Downloads
+
+S3 objects of `KFM_DOWNLOAD_THRESHOLD` bytes or more (64 MiB by default) are
+fetched as concurrent byte ranges written into a preallocated buffer, which
+is returned as a `bytearray`. A dropped range resumes where it stopped, and
+the content is verified against the `md5` metadata or the multipart ETag.
+`download_file` does the same straight into a local file.
+
+# Checksums
+
+With `checksum=True`, or whenever `KFM_CHECKSUM_ALGORITHM` is set, whole
+object reads ask S3 for the CRC32C, CRC32 or SHA256 checksum stored with the
+object and verify the content against it instead of hashing it with MD5.
+See `klingon_file_manager.checksums`.
+
+# MD5 Healing
+
+An object without `md5` metadata, and whose ETag is not its MD5, has to be
+hashed on every get. With `heal_md5=True` (or `KFM_MD5_HEAL=1`) the hash is
+written back to the object's metadata in the background, rate limited, so
+later gets and MD5 lookups find it. See `klingon_file_manager.healing`.
+
+# Memory Mapped Reads
+
+With `mmap=True` a local file is mapped into memory and returned as a
+read-only `memoryview`. Hashing and type detection run on the mapping, so a
+large file costs page-cache residency rather than a heap copy, and re-reading
+a hot file is almost free.
+
+# Byte Ranges
+
+`offset` and `length` fetch a slice of a file: a `Range` GET on S3 and
+`os.pread` locally. A negative `offset` counts back from the end of the file.
+The result reports the slice returned under `range`.
+
+# Streaming
+
+With `stream=True` the content is returned as a
+`klingon_file_manager.streams.HashingReader` instead of bytes, so large files
+are read chunk by chunk with bounded memory. The MD5 hash and size are
+computed as the chunks are read.
+
 # Usage Examples
 
 To get a file from a local directory:
@@ -24,18 +69,64 @@ To get a file from an S3 bucket:
 ```python
 >>> manage_file('get', 's3://bucket/file')
 ```
+
+To read the last 64 KiB of a file, e.g. a footer index:
+```python
+>>> get_file('s3://bucket/table.parquet', offset=-65536)['range']
+{'offset': 1048576, 'length': 65536, 'total_size': 1114112}
+```
+
+To restore a large object to disk without holding it in memory:
+```python
+>>> download_file('s3://bucket/model.bin', '/data/model.bin')['md5']
+'6cd3556deb0da54bca060b4c39479839'
+```
+
+To map a large local file into memory instead of copying it:
+```python
+>>> view = get_file('/data/large.bin', mmap=True)['content']
+>>> view[:4].tobytes()
+b'PK\x03\x04'
+```
+
+To stream a large file from an S3 bucket:
+```python
+>>> reader = get_file('s3://bucket/file', stream=True)['content']
+>>> for chunk in reader:
+...     process(chunk)
+```
 """
 
 
 import os
-import boto3
-from typing import Union, Dict
-from .utils import get_aws_credentials, is_binary_file, get_md5_hash, get_md5_hash_filename
-import os
+import uuid
+import mmap as mmap_module
+from typing import Union, Dict, Optional, Tuple
+from .utils import is_binary_file, get_md5_hash, get_md5_hash_filename
+from .md5cache import lookup_md5, store_md5
+from .credentials import record_operation_outcome
+from .session import get_current_manager, use_credentials
+from .streams import HashingReader, RangeReader, _sniff_binary
+from .checksums import checksum_enabled, new_checksum, stored_checksum
+from .hashing import etag_md5
+from .healing import md5_heal_enabled, schedule_md5_heal
+from .transfer import DOWNLOAD_THRESHOLD, download_multipart
+
+BINARY_SNIFF_BYTES = 8192
+"""@private Bytes inspected to decide whether a streamed file is binary."""
 
 def get_file(
-    path: str, debug: bool = False
-) -> Dict[str, Union[int, str, bytes, bool, Dict[str, str]]]:
+    path: str,
+    debug: bool = False,
+    stream: bool = False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    mmap: bool = False,
+    checksum: Optional[bool] = None,
+    heal_md5: Optional[bool] = None,
+) -> Dict[str, Union[int, str, bytes, memoryview, bool, HashingReader, Dict[str, str]]]:
     """
     # Gets a file from a given path.
 
@@ -48,6 +139,14 @@ def get_file(
     |-----------|-------------------|-------------|---------|
     | path      | string            | Path the file should be retrieved from |
     | debug     | boolean           | Flag to enable/disable debugging | False |
+    | stream    | boolean           | Return a `HashingReader` instead of the full content | False |
+    | credentials | dict            | Per-call AWS credentials, see `session.get_tenant_manager` | None |
+    | profile   | string            | Named AWS profile to use instead of the default chain | None |
+    | offset    | int               | First byte to read; negative counts back from the end | None |
+    | length    | int               | Number of bytes to read from `offset` | None |
+    | mmap      | boolean           | Return local content as a `memoryview` over a memory map | False |
+    | checksum  | boolean           | Verify S3 content against its stored additional checksum; defaults to on when `KFM_CHECKSUM_ALGORITHM` is set | None |
+    | heal_md5  | boolean           | Write a computed MD5 back to the S3 object's metadata in the background; defaults to `KFM_MD5_HEAL` | None |
 
     ## Returns
 
@@ -72,14 +171,57 @@ def get_file(
     | binary    | boolean           | Flag indicating if the content is binary |
     | md5       | string            | MD5 hash of the file content |
     | debug     | dictionary        | Debug information |
+
+    With `stream=True`, `content` is a `HashingReader` which the caller must
+    read and close, `binary` is decided from the first bytes, `md5` is the
+    hash recorded for the file (S3 metadata) or `None`, and `content_size`
+    holds the size when it is known up front. The computed hash is available
+    as `content.md5` once the reader is exhausted.
+
+    S3 objects of `KFM_DOWNLOAD_THRESHOLD` bytes or more are downloaded in
+    parallel ranges and `content` is then a `bytearray`.
+
+    With `offset` or `length`, only that slice is read and `md5` is the hash
+    of the slice. The result then has a `range` key with the `offset`,
+    `length` and `total_size` of what was returned. A range starting past the
+    end of the file fails with status 416.
+
+    With `mmap=True`, local content is a read-only `memoryview` backed by a
+    memory map that stays valid until the view is released or garbage
+    collected. S3 paths and `stream=True` ignore it.
+
+    With `checksum`, whole S3 objects are read with `ChecksumMode` enabled
+    and, when S3 returns a checksum, the content is verified against it
+    rather than with MD5; `debug` then reports `verified` as `'checksum'`.
+    A mismatch fails with status 500. Ranges and streams are not checked.
+
+    With `heal_md5`, an S3 object whose MD5 had to be computed has it queued
+    to be stored as `md5` metadata, and `debug` reports `md5_heal`.
     """
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return get_file(
+                path, debug, stream=stream, offset=offset, length=length, mmap=mmap,
+                checksum=checksum, heal_md5=heal_md5,
+            )
+
     debug_info = {}
 
+    try:
+        byte_range = _check_range(offset, length)
+    except ValueError as exception:
+        return _range_error(400, str(exception), debug_info, debug)
+
     try:
         if path.startswith("s3://"):
-            debug_info.update(_get_from_s3(path, debug))
+            debug_info.update(
+                _get_from_s3(
+                    path, debug, stream=stream, byte_range=byte_range,
+                    checksum=checksum_enabled(checksum), heal_md5=md5_heal_enabled(heal_md5),
+                )
+            )
         else:
-            debug_info.update(_get_from_local(path, debug))
+            debug_info.update(_get_from_local(path, debug, stream=stream, byte_range=byte_range, mmap=mmap))
 
         return debug_info
 
@@ -97,9 +239,108 @@ def get_file(
         }
 
 
+def download_file(
+    path: str,
+    local_path: str,
+    debug: bool = False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    buffer_size: Optional[int] = None,
+    checksum: Optional[bool] = None,
+) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    """
+    # Downloads an S3 object to a local file.
+
+    The object is fetched as concurrent byte ranges written in place into a
+    preallocated temporary file next to `local_path`, verified against the
+    object's additional checksum (with `checksum`), the `md5` metadata or the
+    multipart ETag, and only then renamed over
+    `local_path`. Memory use is bounded by the ranges in flight, whatever the
+    size of the object.
+
+    ## Args
+
+    | Name        | Type    | Description | Default |
+    |-------------|---------|-------------|---------|
+    | path        | string  | S3 URI of the object to download |   |
+    | local_path  | string  | Local file to write |   |
+    | debug       | boolean | Flag to enable/disable debugging | False |
+    | credentials | dict    | Per-call AWS credentials, see `session.get_tenant_manager` | None |
+    | profile     | string  | Named AWS profile to use instead of the default chain | None |
+    | buffer_size | int     | Upper bound in bytes on the data held in memory | None |
+    | checksum    | boolean | Verify against the stored additional checksum; defaults to on when `KFM_CHECKSUM_ALGORITHM` is set | None |
+
+    ## Returns
+
+    | Key          | Type       | Description |
+    |--------------|------------|-------------|
+    | status       | int        | HTTP-like status code |
+    | message      | string     | Message describing the outcome |
+    | md5          | string     | MD5 hash of the downloaded content, read back from the file; the stored `md5` metadata when verified by checksum |
+    | content_size | int        | Size of the downloaded content in bytes |
+    | etag         | string     | ETag of the object |
+    | checksum     | string     | Additional checksum stored with the object, if any |
+    | verified     | string     | `'checksum'`, `'md5'` or `'etag'` when checked against the object, otherwise `None` |
+    | debug        | dictionary | Debug information |
+    """
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return download_file(path, local_path, debug, buffer_size=buffer_size, checksum=checksum)
+
+    debug_info = {}
+    if not path.startswith("s3://"):
+        return {
+            "status": 400,
+            "message": "Bad Request - download_file needs an S3 path.",
+            "debug": debug_info if debug else {},
+        }
+    bucket_name, key = path[5:].split("/", 1)
+    partial_path = f"{local_path}.{uuid.uuid4().hex}.part"
+
+    try:
+        s3_client = get_current_manager().client_for(bucket_name)
+        try:
+            with open(partial_path, "x+b") as file:
+                download = download_multipart(
+                    s3_client, bucket_name, key, target=file, buffer_size=buffer_size,
+                    checksum=checksum_enabled(checksum),
+                )
+        except Exception as exception:
+            record_operation_outcome(bucket_name, "GetObject", exception)
+            raise
+        record_operation_outcome(bucket_name, "GetObject")
+        os.replace(partial_path, local_path)
+    except Exception as exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        debug_info["exception"] = str(exception)
+        return {
+            "status": 500,
+            "message": "Failed to download file from S3.",
+            "debug": debug_info if debug else {},
+        }
+
+    debug_info["parts"] = download["parts"]
+    return {
+        "status": 200,
+        "message": "File downloaded successfully from S3.",
+        "md5": download["md5"],
+        "content_size": download["size"],
+        "etag": download["etag"],
+        "checksum": download["checksum"],
+        "verified": download["verified"],
+        "debug": debug_info if debug else {},
+    }
+
+
 def _get_from_s3(
-    path: str, debug: bool = False
-) -> Dict[str, Union[int, str, bytes, bool, Dict[str, str]]]:
+    path: str,
+    debug: bool = False,
+    stream: bool = False,
+    byte_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    checksum: bool = False,
+    heal_md5: bool = False,
+) -> Dict[str, Union[int, str, bytes, bool, HashingReader, Dict[str, str]]]:
     """
     # Gets a file from an S3 bucket.
 
@@ -109,6 +350,10 @@ def _get_from_s3(
     |-----------|-------------------|-------------|---------|
     | path      | string            | Path where the file should be retrieved from. Must be an S3 URI. |   |
     | debug     | boolean           | Flag to enable/disable debugging | False |
+    | stream    | boolean           | Return a `HashingReader` over the `StreamingBody` | False |
+    | byte_range | tuple            | `(offset, length)` from `_check_range`, fetched with a `Range` GET | None |
+    | checksum  | boolean           | Read with `ChecksumMode` and verify the stored additional checksum | False |
+    | heal_md5  | boolean           | Queue a computed MD5 to be written back to the object's metadata | False |
 
     ## Returns
     A dictionary containing the status of the get operation from S3 as follows:
@@ -140,18 +385,86 @@ def _get_from_s3(
     bucket_name = s3_uri_parts[0]
     key = s3_uri_parts[1]
 
-    s3 = boto3.resource("s3")
+    # Reuse the current FileManager's pooled resource for the bucket's region
+    s3 = get_current_manager().resource_for(bucket_name)
     try:
         s3_object = s3.Object(bucket_name, key)
-        content = s3_object.get()["Body"].read()
+        get_args = {"Range": _range_header(*byte_range)} if byte_range else {}
+        if checksum and not byte_range and not stream:
+            get_args["ChecksumMode"] = "ENABLED"
+        try:
+            response = s3_object.get(**get_args)
+        except Exception as exception:
+            record_operation_outcome(bucket_name, "GetObject", exception)
+            error = getattr(exception, "response", None) or {}
+            if byte_range and error.get("Error", {}).get("Code") == "InvalidRange":
+                return _range_error(416, "Requested range not satisfiable.", debug_info, debug)
+            raise
+        record_operation_outcome(bucket_name, "GetObject")
+
+        if stream:
+            # Hand the body out unread; it is hashed as the caller reads it
+            metadata = response.get("Metadata") or {}
+            reader = HashingReader(
+                response["Body"],
+                content_size=response.get("ContentLength"),
+                # The stored hash covers the whole object, not a slice
+                expected_md5=None if byte_range else metadata.get("md5"),
+            )
+            result = _stream_result(reader, "File opened for streaming from S3.", debug_info, debug)
+            if byte_range:
+                result["range"] = _s3_range(response, reader.content_size)
+            return result
+
+        size = response.get("ContentLength")
+        if not byte_range and isinstance(size, int) and size >= DOWNLOAD_THRESHOLD:
+            # The open body supplies the first range, the rest arrive in parallel
+            download = download_multipart(s3.meta.client, bucket_name, key, response=response, checksum=checksum)
+            debug_info["parts"] = download["parts"]
+            debug_info["verified"] = download["verified"]
+            if heal_md5 and download["md5"] and download["verified"] not in ("md5", "etag"):
+                debug_info["md5_heal"] = _heal_md5(bucket_name, key, download["md5"], response)
+            return {
+                "status": 200,
+                "message": "File read successfully from S3.",
+                "content": download["content"],
+                "binary": True,
+                "md5": download["md5"],
+                "debug": debug_info if debug else {},
+            }
+
+        content = response["Body"].read()
+
+        if byte_range:
+            return {
+                "status": 200,
+                "message": "File range read successfully from S3.",
+                "content": content,
+                "binary": True,
+                "md5": get_md5_hash(content),
+                "range": _s3_range(response, len(content)),
+                "debug": debug_info if debug else {},
+            }
+
+        # S3 returns its checksum only when asked; a whole-object one is
+        # cheaper to check than the MD5
+        stored = stored_checksum(response) if checksum else None
+        if stored and "-" not in stored[1]:
+            algorithm, value = stored
+            calculated = new_checksum(algorithm)
+            calculated.update(content)
+            if calculated.b64digest() != value:
+                raise IOError(f"{algorithm} of {path} does not match the stored {algorithm} {value}.")
+            debug_info["verified"] = "checksum"
 
         # Get MD5 hash from S3 metadata
         md5 = s3_object.metadata.get("md5")
         if not md5:
             # Get MD5 hash from file content
             md5 = get_md5_hash(content)
-            # Upload MD5 hash to S3 metadata
-            s3_object.metadata.update({"md5": md5})
+            # Store it with the object so later gets need not hash again
+            if heal_md5:
+                debug_info["md5_heal"] = _heal_md5(bucket_name, key, md5, response)
 
     except Exception as exception:
         debug_info["exception"] = str(exception)
@@ -175,9 +488,20 @@ def _get_from_s3(
 
 
 
+def _heal_md5(bucket_name: str, key: str, md5: str, response: Dict) -> bool:
+    """@private Queue `md5` to be stored with an object, unless its ETag already is the MD5."""
+    if etag_md5(response):
+        return False
+    return schedule_md5_heal(bucket_name, key, md5, response.get("ETag"))
+
+
 def _get_from_local(
-    path: str, debug: bool
-) -> Dict[str, Union[int, str, bytes, bool, Dict[str, str]]]:
+    path: str,
+    debug: bool,
+    stream: bool = False,
+    byte_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    mmap: bool = False,
+) -> Dict[str, Union[int, str, bytes, memoryview, bool, HashingReader, Dict[str, str]]]:
     """
     @all
     # Gets a file from a local directory.
@@ -188,6 +512,9 @@ def _get_from_local(
     |-----------|-------------------|-------------|---------|
     | path      | string            | Path where the file should be retrieved from. Must be a local path. |   |
     | debug     | boolean           | Flag to enable/disable debugging | False |
+    | stream    | boolean           | Return a `HashingReader` over the open file | False |
+    | byte_range | tuple            | `(offset, length)` from `_check_range`, read with `os.pread` | None |
+    | mmap      | boolean           | Return a `memoryview` over a memory map instead of bytes | False |
 
     ## Returns
     A dictionary containing the status of the get operation from the local
@@ -217,7 +544,20 @@ def _get_from_local(
     debug_info = {}
 
     try:
+        if mmap and not stream:
+            return _get_mapped_from_local(path, byte_range, debug_info, debug)
+        if byte_range:
+            return _get_range_from_local(path, byte_range, stream, debug_info, debug)
+        if stream:
+            file = open(path, "rb")
+            try:
+                reader = HashingReader(file, content_size=os.fstat(file.fileno()).st_size)
+                return _stream_result(reader, "File opened for streaming.", debug_info, debug)
+            except Exception:
+                file.close()
+                raise
         with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
             content = file.read()
     except Exception as exception:
         debug_info["exception"] = str(exception)
@@ -231,7 +571,10 @@ def _get_from_local(
         }
 
     is_binary = is_binary_file(content)
-    md5 = get_md5_hash(content)
+    md5 = lookup_md5(path, stat)
+    if md5 is None:
+        md5 = get_md5_hash(content)
+        store_md5(path, stat, md5)
 
     return {
         "status": 200,
@@ -241,3 +584,205 @@ def _get_from_local(
         "md5": md5,
         "debug": debug_info if debug else {},
     }
+
+
+def _stream_result(
+    reader: HashingReader, message: str, debug_info: Dict[str, str], debug: bool
+) -> Dict[str, Union[int, str, bool, HashingReader, Dict[str, str]]]:
+    """
+    @private Build the result of a streaming get.
+
+    Only the first `BINARY_SNIFF_BYTES` are inspected to decide whether the
+    content is binary; they stay buffered in the reader.
+    """
+    content_size = reader.content_size if isinstance(reader.content_size, int) else None
+    return {
+        "status": 200,
+        "message": message,
+        "content": reader,
+        "content_size": content_size,
+        "binary": _sniff_binary(reader.peek(BINARY_SNIFF_BYTES)),
+        "md5": reader.expected_md5 if isinstance(reader.expected_md5, str) else None,
+        "debug": debug_info if debug else {},
+    }
+
+
+class _RangeNotSatisfiable(Exception):
+    """@private The requested range starts past the end of the file."""
+
+
+def _check_range(offset: Optional[int], length: Optional[int]) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    @private Validate `offset` and `length`, returning `None` for a full read.
+
+    S3 cannot express a slice that is both counted from the end and bounded,
+    so a negative `offset` cannot be combined with `length`.
+    """
+    if offset is None and length is None:
+        return None
+    if length is not None and length <= 0:
+        raise ValueError("length must be a positive number of bytes.")
+    if offset is not None and offset < 0 and length is not None:
+        raise ValueError("length cannot be combined with a negative offset.")
+    return offset, length
+
+
+def _range_header(offset: Optional[int], length: Optional[int]) -> str:
+    """@private HTTP `Range` header value for a checked byte range."""
+    if offset is not None and offset < 0:
+        return f"bytes={offset}"
+    start = offset or 0
+    if length is None:
+        return f"bytes={start}-"
+    return f"bytes={start}-{start + length - 1}"
+
+
+def _s3_range(response: Dict, length: Optional[int]) -> Dict[str, Optional[int]]:
+    """@private Read the returned range from the `Content-Range` of a ranged GET."""
+    content_range = response.get("ContentRange")
+    offset = total_size = None
+    if isinstance(content_range, str):
+        # "bytes 100-199/12345"
+        span, _, total = content_range.partition(" ")[2].partition("/")
+        offset = int(span.split("-", 1)[0]) if span and span != "*" else None
+        total_size = int(total) if total.isdigit() else None
+    return {"offset": offset, "length": length if isinstance(length, int) else None, "total_size": total_size}
+
+
+def _resolve_range(byte_range: Tuple[Optional[int], Optional[int]], size: int) -> Tuple[int, int]:
+    """@private Turn a checked byte range into `(start, count)` for a file of `size` bytes."""
+    offset, length = byte_range
+    if offset is None:
+        start = 0
+    elif offset < 0:
+        start = max(size + offset, 0)
+    else:
+        start = offset
+    if start >= size and size > 0:
+        raise _RangeNotSatisfiable()
+    count = size - start if length is None else min(length, size - start)
+    return start, max(count, 0)
+
+
+def _get_range_from_local(
+    path: str,
+    byte_range: Tuple[Optional[int], Optional[int]],
+    stream: bool,
+    debug_info: Dict[str, str],
+    debug: bool,
+) -> Dict[str, Union[int, str, bytes, bool, HashingReader, Dict[str, str]]]:
+    """@private Read a byte range of a local file with `os.pread`."""
+    file = open(path, "rb")
+    try:
+        size = os.fstat(file.fileno()).st_size
+        try:
+            start, count = _resolve_range(byte_range, size)
+        except _RangeNotSatisfiable:
+            file.close()
+            return _range_error(416, "Requested range not satisfiable.", debug_info, debug)
+        range_info = {"offset": start, "length": count, "total_size": size}
+
+        if stream:
+            reader = HashingReader(RangeReader(file, start, count), content_size=count)
+            result = _stream_result(reader, "File range opened for streaming.", debug_info, debug)
+            result["range"] = range_info
+            return result
+
+        with file:
+            parts, position, end = [], start, start + count
+            while position < end:
+                data = os.pread(file.fileno(), end - position, position)
+                if not data:
+                    break
+                parts.append(data)
+                position += len(data)
+        content = b"".join(parts)
+    except Exception:
+        file.close()
+        raise
+
+    range_info["length"] = len(content)
+    return {
+        "status": 200,
+        "message": "File range read successfully.",
+        "content": content,
+        # A slice may cut a multi-byte character in two
+        "binary": _sniff_binary(content),
+        "md5": get_md5_hash(content),
+        "range": range_info,
+        "debug": debug_info if debug else {},
+    }
+
+
+def _map_file(path: str) -> memoryview:
+    """
+    @private Map a local file read-only and return a view over the mapping.
+
+    The descriptor is closed straight away; the mapping lives as long as the
+    returned view. Empty files cannot be mapped and give an empty view.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return memoryview(b"")
+        mapped = mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ)
+    if hasattr(mapped, "madvise") and hasattr(mmap_module, "MADV_SEQUENTIAL"):
+        # Hashing walks the file front to back
+        mapped.madvise(mmap_module.MADV_SEQUENTIAL)
+    return memoryview(mapped)
+
+
+def _get_mapped_from_local(
+    path: str,
+    byte_range: Optional[Tuple[Optional[int], Optional[int]]],
+    debug_info: Dict[str, str],
+    debug: bool,
+) -> Dict[str, Union[int, str, memoryview, bool, Dict[str, str]]]:
+    """@private Read a local file, or a byte range of it, as a memory-mapped view."""
+    stat = os.stat(path)
+    view = _map_file(path)
+    message = "File mapped successfully."
+    range_info = None
+    md5 = None
+    if byte_range:
+        try:
+            start, count = _resolve_range(byte_range, len(view))
+        except _RangeNotSatisfiable:
+            view.release()
+            return _range_error(416, "Requested range not satisfiable.", debug_info, debug)
+        range_info = {"offset": start, "length": count, "total_size": len(view)}
+        # Slicing a memoryview shares the mapping instead of copying it
+        view = view[start:start + count]
+        message = "File range mapped successfully."
+        md5 = get_md5_hash(view)
+    else:
+        # A cached hash spares faulting in every page of the mapping
+        md5 = lookup_md5(path, stat)
+        if md5 is None:
+            md5 = get_md5_hash(view)
+            store_md5(path, stat, md5)
+
+    result = {
+        "status": 200,
+        "message": message,
+        "content": view,
+        "binary": is_binary_file(view),
+        "md5": md5,
+        "debug": debug_info if debug else {},
+    }
+    if range_info is not None:
+        result["range"] = range_info
+    return result
+
+
+def _range_error(
+    status: int, message: str, debug_info: Dict[str, str], debug: bool
+) -> Dict[str, Union[int, str, None, Dict[str, str]]]:
+    """@private Result for an invalid or unsatisfiable byte range."""
+    return {
+        "status": status,
+        "message": message,
+        "content": None,
+        "binary": None,
+        "md5": None,
+        "debug": debug_info if debug else {},
+    }
@@ -0,0 +1,277 @@
+# hashing.py
+"""
+# Hashing Overview
+
+Single-pass content analysis for the Klingon File Manager.
+
+Writing a payload needs its MD5 hash (for the `md5` metadata and S3's
+`ContentMD5` check), its size in bytes and its MIME type. Working each of
+these out from the raw content separately encodes a `str` once per step and
+hashes the same bytes several times. `analyze_content()` does it once: the
+content is encoded to UTF-8 a single time, hashed in one pass, and only a
+bounded sample is kept for MIME detection, which runs lazily when the type is
+actually needed. The resulting `ContentAnalysis` is handed down to every
+step of a post.
+
+Reading the MD5 of an S3 object should not mean downloading it.
+`resolve_md5()` answers from a single `HeadObject`: the `md5` metadata
+written by `post_file`, or the ETag, which is the MD5 of the content for
+objects uploaded in one part without SSE-KMS or SSE-C. Only when neither
+applies is the object streamed and hashed, in chunks, resuming a dropped
+connection with a ranged GET.
+
+# Contents
+
+## ContentAnalysis
+MD5 hash, size and MIME sample of one payload.
+
+## analyze_content
+Analyses `str` or bytes-like content in a single pass.
+
+## etag_md5
+Returns the MD5 an S3 ETag stands for, if it is one.
+
+## resolve_md5
+Finds the MD5 of an S3 object from its metadata, ETag or content.
+
+# Usage Examples
+
+To analyse a payload once and post it:
+```python
+>>> analysis = analyze_content('Hello, world!')
+>>> analysis.md5, analysis.size
+('6cd3556deb0da54bca060b4c39479839', 13)
+>>> post_file('s3://bucket/hello.txt', 'Hello, world!', analysis=analysis)
+```
+
+To find the MD5 of an object uploaded by another tool:
+```python
+>>> resolve_md5('s3://bucket/hello.txt')
+{'md5': '6cd3556deb0da54bca060b4c39479839', 'source': 'etag'}
+```
+"""
+
+import re
+import time
+import base64
+import hashlib
+from typing import Any, Dict, Optional, Union
+
+from .mime import MIME_SNIFF_BYTES
+
+MIME_SAMPLE_BYTES = MIME_SNIFF_BYTES
+"""@private Bytes of a payload kept to detect its MIME type."""
+
+KMS_ENCRYPTION = ('aws:kms', 'aws:kms:dsse')
+"""@private Server-side encryption modes whose ETag is not the MD5 of the content."""
+
+
+class ContentAnalysis:
+    """
+    # Content Analysis
+
+    The facts about one payload that a post needs, computed once. `data` is
+    the content as bytes, encoded from `str` at most once, so every later
+    step writes the same buffer without converting it again.
+
+    ## Attributes
+
+    | Attribute      | Type    | Description |
+    |----------------|---------|-------------|
+    | `data`         | `bytes` | The content as bytes (or the original bytes-like object). |
+    | `md5`          | `str`   | Hex MD5 hash of `data`. |
+    | `size`         | `int`   | Size of `data` in bytes. |
+    | `sample`       | `bytes` | First bytes of `data` used for MIME detection. |
+    | `content_type` | `str`   | MIME type, detected from `sample` on first access. |
+    | `content_md5`  | `str`   | Base64 MD5 digest, as S3 expects in `ContentMD5`. |
+    """
+
+    __slots__ = ('data', 'md5', 'size', 'sample', '_content_type')
+
+    def __init__(self, data, md5: str, size: int, sample: bytes, content_type: Optional[str] = None):
+        self.data = data
+        self.md5 = md5
+        self.size = size
+        self.sample = sample
+        self._content_type = content_type
+
+    @property
+    def content_type(self) -> str:
+        """MIME type of the payload, detected from `sample` once."""
+        if self._content_type is None:
+            from .utils import get_mime_type_content
+            self._content_type = get_mime_type_content(self.sample)
+        return self._content_type
+
+    @property
+    def content_md5(self) -> str:
+        """Base64 encoded MD5 digest for S3's `ContentMD5` header."""
+        return base64.b64encode(bytes.fromhex(self.md5)).decode('utf-8')
+
+    def __repr__(self) -> str:
+        return f"ContentAnalysis(md5={self.md5!r}, size={self.size})"
+
+
+def analyze_content(content: Union[str, bytes, bytearray, memoryview, ContentAnalysis]) -> ContentAnalysis:
+    """
+    # Analyze Content
+
+    Encodes `content` to bytes if it is a `str`, hashes it in one pass and
+    keeps a sample of its first bytes for MIME detection. An existing
+    `ContentAnalysis` is returned unchanged.
+
+    ## Arguments
+
+    | Name    | Type                             | Description | Default |
+    |---------|----------------------------------|-------------|---------|
+    | content | str, bytes-like or ContentAnalysis | Payload to analyse. |   |
+    """
+    if isinstance(content, ContentAnalysis):
+        return content
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    view = memoryview(data).cast('B')
+    return ContentAnalysis(
+        data=data,
+        md5=hashlib.md5(view).hexdigest(),
+        size=view.nbytes,
+        sample=bytes(view[:MIME_SAMPLE_BYTES]),
+    )
+
+
+def etag_md5(response: Dict[str, Any]) -> Optional[str]:
+    """
+    # ETag MD5
+
+    Returns the hex MD5 of an object's content taken from its ETag, or `None`
+    when the ETag is not one. That is the case for multipart uploads (whose
+    ETag ends in `-<parts>`) and for objects encrypted with SSE-KMS or SSE-C.
+
+    ## Arguments
+
+    | Name     | Type | Description | Default |
+    |----------|------|-------------|---------|
+    | response | dict | `HeadObject` or `GetObject` response for the object. |   |
+    """
+    etag = response.get('ETag')
+    if not isinstance(etag, str):
+        return None
+    etag = etag.strip('"')
+    if not re.fullmatch(r'[0-9a-f]{32}', etag):
+        return None
+    if response.get('ServerSideEncryption') in KMS_ENCRYPTION or response.get('SSECustomerAlgorithm'):
+        return None
+    return etag
+
+
+def resolve_md5(
+    path: str,
+    response: Optional[Dict[str, Any]] = None,
+    allow_hash: bool = True,
+    heal_md5: Optional[bool] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    # Resolve MD5
+
+    Finds the MD5 of the S3 object at `path` as cheaply as possible: from the
+    `md5` user metadata, then from the ETag (see `etag_md5()`), and only then
+    by streaming and hashing the object.
+
+    ## Arguments
+
+    | Name       | Type | Description | Default |
+    |------------|------|-------------|---------|
+    | path       | str  | S3 URI of the object. |   |
+    | response   | dict | `HeadObject` response already fetched for the object. | None |
+    | allow_hash | bool | Hash the content when neither the metadata nor the ETag gives the MD5. | True |
+    | heal_md5   | bool | Store a computed MD5 as metadata in the background (`KFM_MD5_HEAL`). | None |
+
+    ## Returns
+    A dictionary with the `md5` (or `None` when it could not be found without
+    hashing and `allow_hash` is off) and its `source`: `'metadata'`,
+    `'etag'`, `'hash'` or `None`.
+
+    ## Raises
+    Whatever error `HeadObject` or `GetObject` raise, e.g. for a missing object.
+    """
+    from .session import get_current_manager
+    bucket_name, key = path[5:].split('/', 1)
+    s3_client = get_current_manager().client_for(bucket_name)
+    if response is None:
+        response = s3_client.head_object(Bucket=bucket_name, Key=key)
+
+    md5 = (response.get('Metadata') or {}).get('md5')
+    if md5:
+        return {'md5': md5, 'source': 'metadata'}
+    md5 = etag_md5(response)
+    if md5:
+        return {'md5': md5, 'source': 'etag'}
+    if not allow_hash:
+        return {'md5': None, 'source': None}
+    md5 = _hash_s3_object(s3_client, bucket_name, key, response.get('ETag'), response.get('ContentLength'))
+    from .healing import md5_heal_enabled, schedule_md5_heal
+    if md5_heal_enabled(heal_md5):
+        schedule_md5_heal(bucket_name, key, md5, response.get('ETag'))
+    return {'md5': md5, 'source': 'hash'}
+
+
+_RETRYABLE_ERROR_CODES = (
+    'Throttling', 'ThrottlingException', 'SlowDown', 'RequestTimeout', 'RequestTimeTooSkewed',
+    'InternalError', 'ServiceUnavailable',
+)
+"""@private S3 error codes worth retrying; other client errors fail at once."""
+
+
+def _is_retryable(exception: BaseException) -> bool:
+    """
+    @private Whether a failed read may succeed when retried: a connection or
+    read error, or an S3 5xx or throttling response. Client errors such as
+    `NoSuchKey`, `AccessDenied` or the `PreconditionFailed` of a replaced
+    object are final.
+    """
+    response = getattr(exception, 'response', None)
+    if isinstance(response, dict) and 'Error' in response:
+        status = response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return status >= 500 or response['Error'].get('Code') in _RETRYABLE_ERROR_CODES
+    if isinstance(exception, (OSError, EOFError)):
+        return True
+    try:
+        from botocore.exceptions import BotoCoreError
+    except ImportError:
+        return False
+    # Connection, timeout and truncated-stream errors raised by botocore
+    return isinstance(exception, BotoCoreError)
+
+
+def _hash_s3_object(s3_client: Any, bucket_name: str, key: str, etag: Optional[str], size: Optional[int]) -> str:
+    """
+    @private Hash an object chunk by chunk. A dropped connection resumes with
+    a ranged GET pinned to `etag`, so a replaced object fails instead of
+    mixing versions.
+    """
+    from .streams import DEFAULT_CHUNK_SIZE
+    from .transfer import MULTIPART_RETRIES
+
+    digest = hashlib.md5()
+    position = 0
+    for attempt in range(MULTIPART_RETRIES + 1):
+        body = None
+        try:
+            get_args = {'Bucket': bucket_name, 'Key': key}
+            if position:
+                get_args['Range'] = f"bytes={position}-"
+            if etag:
+                get_args['IfMatch'] = etag
+            body = s3_client.get_object(**get_args)['Body']
+            for chunk in iter(lambda: body.read(DEFAULT_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                position += len(chunk)
+            if isinstance(size, int) and position < size:
+                raise IOError(f"Connection closed at byte {position} of s3://{bucket_name}/{key}")
+            return digest.hexdigest()
+        except Exception as exception:
+            if attempt == MULTIPART_RETRIES or not _is_retryable(exception):
+                raise
+            time.sleep(min(0.2 * 2 ** attempt, 5))
+        finally:
+            if body is not None:
+                body.close()
@@ -0,0 +1,336 @@
+# healing.py
+"""
+# Healing Overview
+
+Background backfilling of missing `md5` metadata on S3 objects.
+
+Objects written by other tools carry no `md5` metadata, and when their ETag
+is not an MD5 either (multipart or SSE-KMS uploads) every get has to hash
+the whole body again. With healing enabled, the first time such an object is
+hashed the result is written back as `md5` metadata, so it is hashed at most
+once over its lifetime.
+
+S3 metadata can only be changed by copying an object onto itself with
+`MetadataDirective='REPLACE'`. The copy runs on a background thread, never
+delaying the get, at no more than `KFM_MD5_HEAL_RATE` copies per second. It
+is pinned to the ETag that was hashed, so an object replaced in the
+meantime is left alone, and it carries over the content type, caching
+headers, storage class and KMS encryption, which a replacing copy would
+otherwise reset. Grants in the object's ACL are copied too, since the copy
+would otherwise be private.
+
+Objects encrypted with SSE-C, objects over 5 GB (the `copy_object` limit)
+and objects whose ACL cannot be read or copied are skipped.
+
+# Contents
+
+## MD5Healer
+Rate-limited background writer of `md5` metadata.
+
+## schedule_md5_heal
+Queues an object on the shared healer.
+
+## md5_heal_enabled
+Whether healing is on for a call.
+
+# Configuration
+
+| Variable             | Default | Description |
+|----------------------|---------|-------------|
+| `KFM_MD5_HEAL`       | `0`     | Set to `1` to heal objects by default. |
+| `KFM_MD5_HEAL_RATE`  | `1`     | Copies per second, at most. |
+| `KFM_MD5_HEAL_QUEUE` | `1000`  | Objects waiting to be healed before new ones are dropped. |
+
+# Usage Examples
+
+To heal an object while reading it:
+```python
+>>> get_file('s3://bucket/legacy.bin', heal_md5=True)['md5']
+'6cd3556deb0da54bca060b4c39479839'
+>>> get_md5_healer().wait()
+```
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+from .credentials import record_operation_outcome
+from .hashing import KMS_ENCRYPTION
+from .transfer import MAX_COPY_OBJECT_SIZE
+from .utils import logger
+
+MD5_HEAL = os.getenv('KFM_MD5_HEAL', '0').lower() in ('1', 'true', 'yes')
+"""@private Heal objects when a call does not say otherwise."""
+
+MD5_HEAL_RATE = float(os.getenv('KFM_MD5_HEAL_RATE', '1'))
+"""@private Maximum metadata copies per second."""
+
+MD5_HEAL_QUEUE = int(os.getenv('KFM_MD5_HEAL_QUEUE', '1000'))
+"""@private Maximum objects waiting to be healed."""
+
+_PRESERVED_FIELDS = (
+    'ContentType',
+    'CacheControl',
+    'ContentDisposition',
+    'ContentEncoding',
+    'ContentLanguage',
+    'Expires',
+    'WebsiteRedirectLocation',
+    'StorageClass',
+)
+"""@private `HeadObject` fields a metadata-replacing copy must send again."""
+
+_GRANT_ARGUMENTS = {
+    'READ': 'GrantRead',
+    'READ_ACP': 'GrantReadACP',
+    'WRITE_ACP': 'GrantWriteACP',
+    'FULL_CONTROL': 'GrantFullControl',
+}
+"""@private `CopyObject` argument carrying each object ACL permission."""
+
+_GRANTEE_FIELDS = {
+    'CanonicalUser': ('id', 'ID'),
+    'Group': ('uri', 'URI'),
+    'AmazonCustomerByEmail': ('emailAddress', 'EmailAddress'),
+}
+"""@private How each grantee type is written in a `Grant*` argument, and the field holding it."""
+
+
+def _acl_grant_args(acl: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    @private `Grant*` arguments that give a copy the ACL of `acl`, a
+    `GetObjectAcl` response. Empty for the owner-only default, which a copy
+    gets anyway, and `None` when a grant cannot be expressed that way.
+    """
+    owner_id = (acl.get('Owner') or {}).get('ID')
+    grants = acl.get('Grants') or []
+    if all(
+        grant.get('Permission') == 'FULL_CONTROL'
+        and grant.get('Grantee', {}).get('Type') == 'CanonicalUser'
+        and grant['Grantee'].get('ID') == owner_id
+        for grant in grants
+    ):
+        return {}
+    grantees: Dict[str, list] = {}
+    for grant in grants:
+        argument = _GRANT_ARGUMENTS.get(grant.get('Permission'))
+        grantee = grant.get('Grantee') or {}
+        field = _GRANTEE_FIELDS.get(grantee.get('Type'))
+        if argument is None or field is None or not grantee.get(field[1]):
+            return None
+        grantees.setdefault(argument, []).append(f'{field[0]}="{grantee[field[1]]}"')
+    return {argument: ', '.join(values) for argument, values in grantees.items()}
+
+
+def md5_heal_enabled(heal_md5: Optional[bool] = None) -> bool:
+    """@private Whether to heal: `heal_md5`, or `KFM_MD5_HEAL` when it is `None`."""
+    return MD5_HEAL if heal_md5 is None else bool(heal_md5)
+
+
+class MD5Healer:
+    """
+    # MD5 Healer
+
+    Writes missing `md5` metadata back to S3 objects on a single background
+    thread, rate limited and without queuing the same object twice.
+
+    ## Attributes
+
+    | Attribute   | Type    | Description |
+    |-------------|---------|-------------|
+    | `rate`      | `float` | Copies per second, at most (`KFM_MD5_HEAL_RATE`). |
+    | `max_queue` | `int`   | Objects waiting before new ones are dropped (`KFM_MD5_HEAL_QUEUE`). |
+
+    ## Methods
+
+    | Method       | Description |
+    |--------------|-------------|
+    | `schedule()` | Queues an object to be healed. |
+    | `wait()`     | Blocks until every queued object has been handled. |
+    """
+
+    def __init__(self, rate: Optional[float] = None, max_queue: Optional[int] = None):
+        self.rate = MD5_HEAL_RATE if rate is None else rate
+        self.max_queue = MD5_HEAL_QUEUE if max_queue is None else max_queue
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = None
+        self._next_slot = 0.0
+
+    def _check_fork(self) -> None:
+        """@private Drop the worker inherited through fork(); its thread does not exist in the child."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = None
+
+    def schedule(self, s3_client: Any, bucket_name: str, key: str, md5: str, etag: Optional[str] = None) -> bool:
+        """
+        # Schedule
+
+        Queues `s3://bucket_name/key` to have `md5` written to its metadata.
+
+        ## Arguments
+
+        | Name        | Type         | Description | Default |
+        |-------------|--------------|-------------|---------|
+        | s3_client   | boto3.client | Client for the bucket, with the caller's credentials. |   |
+        | bucket_name | str          | Bucket of the object. |   |
+        | key         | str          | Key of the object. |   |
+        | md5         | str          | Hex MD5 of the object's content. |   |
+        | etag        | str          | ETag of the content that was hashed. | None |
+
+        ## Returns
+        `True` if the object was queued, `False` if it already is or the
+        queue is full.
+        """
+        self._check_fork()
+        with self._lock:
+            if (bucket_name, key) in self._pending or len(self._pending) >= self.max_queue:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kfm-md5-heal')
+            self._pending[(bucket_name, key)] = self._executor.submit(
+                self._heal, s3_client, bucket_name, key, md5, etag,
+            )
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        # Wait
+
+        Blocks until every object queued so far has been handled, or until
+        `timeout` seconds have passed.
+        """
+        self._check_fork()
+        with self._lock:
+            futures = list(self._pending.values())
+        wait(futures, timeout=timeout)
+
+    def _throttle(self) -> None:
+        """@private Sleep until the next copy is allowed by `rate`."""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        delay = self._next_slot - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_slot = max(now, self._next_slot) + 1 / self.rate
+
+    def _heal(self, s3_client: Any, bucket_name: str, key: str, md5: str, etag: Optional[str]) -> Optional[str]:
+        """@private Copy the object onto itself with `md5` added to its metadata."""
+        try:
+            self._throttle()
+            head_args = {'IfMatch': etag} if etag else {}
+            head = s3_client.head_object(Bucket=bucket_name, Key=key, **head_args)
+            metadata = dict(head.get('Metadata') or {})
+            if metadata.get('md5'):
+                return 'present'
+            if head.get('SSECustomerAlgorithm') or (head.get('ContentLength') or 0) > MAX_COPY_OBJECT_SIZE:
+                logger.debug(f"Not healing s3://{bucket_name}/{key}: it cannot be copied in place")
+                return 'skipped'
+
+            # A copy is private unless told otherwise, so public or shared
+            # objects keep their grants, or are left alone when they cannot
+            try:
+                grant_args = _acl_grant_args(s3_client.get_object_acl(Bucket=bucket_name, Key=key))
+            except Exception as exception:
+                logger.info(f"Not healing s3://{bucket_name}/{key}: its ACL cannot be read: {exception}")
+                return 'skipped'
+            if grant_args is None:
+                logger.info(f"Not healing s3://{bucket_name}/{key}: its ACL cannot be copied")
+                return 'skipped'
+
+            copy_args: Dict[str, Any] = {
+                'CopySource': {'Bucket': bucket_name, 'Key': key},
+                'Bucket': bucket_name,
+                'Key': key,
+                'Metadata': {**metadata, 'md5': md5},
+                'MetadataDirective': 'REPLACE',
+            }
+            for field in _PRESERVED_FIELDS:
+                if head.get(field):
+                    copy_args[field] = head[field]
+            if head.get('ServerSideEncryption') in KMS_ENCRYPTION:
+                copy_args['ServerSideEncryption'] = head['ServerSideEncryption']
+                if head.get('SSEKMSKeyId'):
+                    copy_args['SSEKMSKeyId'] = head['SSEKMSKeyId']
+                if head.get('BucketKeyEnabled'):
+                    copy_args['BucketKeyEnabled'] = True
+            copy_args.update(grant_args)
+            if etag:
+                copy_args['CopySourceIfMatch'] = etag
+            try:
+                s3_client.copy_object(**copy_args)
+            except Exception as exception:
+                record_operation_outcome(bucket_name, 'PutObject', exception)
+                raise
+            record_operation_outcome(bucket_name, 'PutObject')
+            logger.debug(f"Healed md5 metadata of s3://{bucket_name}/{key}")
+            return 'healed'
+        except Exception as exception:
+            # Healing is best effort; the next hash of the object tries again
+            logger.info(f"Could not heal md5 metadata of s3://{bucket_name}/{key}: {exception}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop((bucket_name, key), None)
+
+
+_healer: Optional[MD5Healer] = None
+"""@private Shared healer, created on first use."""
+
+_healer_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    """@private Replace the module locks inherited from the parent process."""
+    global _healer_lock
+    _healer_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_md5_healer() -> MD5Healer:
+    """
+    # Get MD5 Healer
+
+    Returns the shared `MD5Healer`, creating it on first use.
+    """
+    global _healer
+    with _healer_lock:
+        if _healer is None:
+            _healer = MD5Healer()
+        return _healer
+
+
+def schedule_md5_heal(bucket_name: str, key: str, md5: str, etag: Optional[str] = None) -> bool:
+    """
+    # Schedule MD5 Heal
+
+    Queues `s3://bucket_name/key` on the shared healer to have `md5` written
+    to its metadata, using the current `FileManager`'s client for the bucket.
+
+    ## Arguments
+
+    | Name        | Type | Description | Default |
+    |-------------|------|-------------|---------|
+    | bucket_name | str  | Bucket of the object. |   |
+    | key         | str  | Key of the object. |   |
+    | md5         | str  | Hex MD5 of the object's content. |   |
+    | etag        | str  | ETag of the content that was hashed. | None |
+
+    ## Returns
+    `True` if the object was queued.
+    """
+    from .session import get_current_manager
+    s3_client = get_current_manager().client_for(bucket_name)
+    return get_md5_healer().schedule(s3_client, bucket_name, key, md5, etag)
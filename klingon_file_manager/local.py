@@ -0,0 +1,188 @@
+# local.py
+"""
+# Local Overview
+
+Fast local file copies and moves for the Klingon File Manager.
+
+Moving a file through `get_file` and `post_file` reads the whole file into
+Python, writes it back and reads it again to hash it. Between two local paths
+none of that is needed: on one filesystem a move is a single `rename`, and
+across filesystems the kernel can copy the data itself, either by sharing the
+blocks (a reflink, on filesystems such as Btrfs and XFS) or with
+`copy_file_range`/`sendfile`, without the data ever entering user space.
+
+Hashing is skipped unless verification is requested.
+
+# Contents
+
+## copy_local_file
+Copies a local file with a reflink or an in-kernel copy.
+
+## move_local_file
+Moves a local file with a rename, or a copy and unlink across filesystems.
+
+# Usage Examples
+
+To move a file to another disk and check the copy before the original is
+removed:
+```python
+>>> move_local_file('/scratch/model.bin', '/data/model.bin', verify=True)
+{'method': 'copy_file_range', 'md5': '6cd3556deb0da54bca060b4c39479839'}
+```
+"""
+
+import os
+import uuid
+import errno
+import shutil
+from typing import Dict, Optional
+
+from .utils import get_md5_hash_filename, logger
+
+FICLONE = 0x40049409
+"""@private Linux ioctl sharing all blocks of one file with another."""
+
+_FALLBACK_ERRORS = (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF)
+"""@private Errors meaning an in-kernel copy method is unavailable here."""
+
+
+def _clone(src_fd: int, dst_fd: int) -> bool:
+    """@private Share the blocks of `src_fd` with `dst_fd`, if the filesystem can."""
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except (ImportError, OSError) as exception:
+        if isinstance(exception, OSError) and exception.errno not in _FALLBACK_ERRORS:
+            raise
+        return False
+
+
+def _copy_in_kernel(src_fd: int, dst_fd: int, size: int) -> Optional[str]:
+    """
+    @private Copy `size` bytes between descriptors without reading them into
+    Python. Returns the method used, or `None` when none is available before
+    any data was copied.
+
+    As in `shutil`, a method that copies nothing on its first call is taken
+    to be unsupported for these files (some filesystems report a size of 0
+    or refuse silently), while one that stops part way raises `IOError`.
+    """
+    if not size:
+        return None
+    for method in ('copy_file_range', 'sendfile'):
+        copy = getattr(os, method, None)
+        if copy is None:
+            continue
+        copied = 0
+        try:
+            while copied < size:
+                if method == 'copy_file_range':
+                    sent = copy(src_fd, dst_fd, size - copied, copied, copied)
+                else:
+                    sent = copy(dst_fd, src_fd, copied, size - copied)
+                if not sent:
+                    if copied:
+                        raise IOError(f"{method} stopped after {copied} of {size} bytes")
+                    break
+                copied += sent
+            if copied:
+                return method
+        except OSError as exception:
+            if copied or exception.errno not in _FALLBACK_ERRORS:
+                raise
+    return None
+
+
+def copy_local_file(src_path: str, dst_path: str, verify: bool = False) -> Dict[str, Optional[str]]:
+    """
+    # Copy Local File
+
+    Copies `src_path` to `dst_path`, trying a reflink first, then
+    `copy_file_range` and `sendfile`, and only then a buffered copy. The data
+    goes to a temporary file next to `dst_path` that replaces it once
+    complete, so readers never see a partial file. Permission bits and
+    timestamps are copied as well.
+
+    ## Arguments
+
+    | Name     | Type | Description | Default |
+    |----------|------|-------------|---------|
+    | src_path | str  | Local file to copy. |   |
+    | dst_path | str  | Local destination, replaced if it exists. |   |
+    | verify   | bool | Compare the MD5 of both files after copying. | False |
+
+    ## Returns
+    A dictionary with the copy `method` used and the `md5` of the file when
+    `verify` is set, otherwise `None`.
+
+    ## Raises
+    `IOError` when the copy is shorter than the source or verification
+    finds it differs from the source.
+    """
+    partial_path = f"{dst_path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(src_path, 'rb') as src, open(partial_path, 'xb') as dst:
+            size = os.fstat(src.fileno()).st_size
+            if _clone(src.fileno(), dst.fileno()):
+                method = 'reflink'
+            else:
+                method = _copy_in_kernel(src.fileno(), dst.fileno(), size)
+            if method is None:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+                method = 'buffered'
+            dst.flush()
+            copied_size = os.fstat(dst.fileno()).st_size
+            if copied_size != size:
+                raise IOError(f"Copy of {src_path} is truncated: {copied_size} of {size} bytes")
+        shutil.copystat(src_path, partial_path)
+
+        md5 = None
+        if verify:
+            md5 = get_md5_hash_filename(src_path)
+            copied_md5 = get_md5_hash_filename(partial_path)
+            if md5 != copied_md5:
+                raise IOError(f"Copy of {src_path} is corrupt: MD5 {copied_md5} != {md5}")
+        os.replace(partial_path, dst_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    logger.debug(f"Copied {src_path} to {dst_path} with {method}")
+    return {'method': method, 'md5': md5}
+
+
+def move_local_file(src_path: str, dst_path: str, verify: bool = False) -> Dict[str, Optional[str]]:
+    """
+    # Move Local File
+
+    Moves `src_path` to `dst_path`. On one filesystem this is a single
+    `rename`, which replaces `dst_path` atomically and never touches the
+    data. Across filesystems the file is copied with `copy_local_file()` and
+    the source is removed once the copy is in place.
+
+    ## Arguments
+
+    | Name     | Type | Description | Default |
+    |----------|------|-------------|---------|
+    | src_path | str  | Local file to move. |   |
+    | dst_path | str  | Local destination, replaced if it exists. |   |
+    | verify   | bool | Hash the file; across filesystems, compare the copy with the source before removing it. | False |
+
+    ## Returns
+    A dictionary with the `method` used (`'rename'` or a copy method) and the
+    `md5` of the file when `verify` is set, otherwise `None`.
+    """
+    try:
+        os.replace(src_path, dst_path)
+    except OSError as exception:
+        if exception.errno != errno.EXDEV:
+            raise
+    else:
+        logger.debug(f"Renamed {src_path} to {dst_path}")
+        return {'method': 'rename', 'md5': get_md5_hash_filename(dst_path) if verify else None}
+
+    result = copy_local_file(src_path, dst_path, verify=verify)
+    os.remove(src_path)
+    return result
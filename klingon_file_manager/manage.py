@@ -33,6 +33,10 @@ To delete a file from an S3 bucket:
 ```python
 >>> manage_file('delete', 's3://bucket/file')
 ```
+To copy an object to another bucket without downloading it:
+```python
+>>> manage_file('copy', 's3://bucket/file', dst_path='s3://backup/file')
+```
 To move a file from a local directory to another local directory:
 ```python
 >>> move_file('/path/to/local/file', '/path/to/local/destination')
@@ -43,27 +47,38 @@ To move a file from a local directory to an S3 bucket:
 ```
 """
 
+import os
 from typing import Union, Dict, Optional, Callable
 from .utils import (
     is_binary_file,
-    get_aws_credentials,
     get_md5_hash,
     get_md5_hash_filename,
     check_file_exists,
     logger
 )
+from .credentials import get_credentials
+from .session import get_current_manager, use_credentials
+from .checksums import resolve_algorithm, stored_checksum
+from .hashing import resolve_md5
+from .streams import is_stream
 from .delete import delete_file
 from .post import post_file
-from .get import get_file
+from .get import get_file, download_file
+from .local import move_local_file
+from .copy import copy_file
 
 
+def __getattr__(name: str):
+    """
+    @private Resolve `aws_credentials` lazily.
 
-# Use the get_aws_credentials function to get AWS credentials returned as a
-# json object containing the following keys:
-# - AWS_ACCESS_KEY_ID
-# - AWS_SECRET_ACCESS_KEY
-aws_credentials = get_aws_credentials()
-"""@private Get aws credentials from environment variables."""
+    AWS credentials used to be validated when this module was imported. They
+    are now resolved on first access through the cached credential provider so
+    that local-only callers never touch the network.
+    """
+    if name == "aws_credentials":
+        return get_credentials()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class FilesystemRouter:
@@ -131,6 +146,13 @@ def manage_file(
     md5: Optional[str] = None,
     metadata: Optional[Dict[str, str]] = None,
     debug: bool = False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    stream: bool = False,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    mmap: bool = False,
+    dst_path: Optional[str] = None,
 ) -> dict:
     """
     # Manage File
@@ -139,12 +161,19 @@ def manage_file(
     ## Arguments
     | Name      | Type              | Description | Default |
     |-----------|-------------------|-------------|---------|
-    | action    | string            | The action to perform. Can be 'get', 'post', or 'delete'. |   |
+    | action    | string            | The action to perform. Can be 'get', 'post', 'delete' or 'copy'. |   |
     | path      | string            | Path to the file |   |
-    | content   | string or bytes   | The content to write to the file. Only used for 'post' action. |  |
+    | content   | string, bytes, file or iterator | The content to write to the file, a path to a local file, an open binary file or an iterator of byte chunks. Only used for 'post' action. |  |
     | md5       | string            | The MD5 hash of the content. Only used for 'post' action. | * See note |
     | metadata  | dictionary        | Additional metadata to include with the file | ^ See note |
     | debug     | boolean           | Flag to enable/disable debugging information in the response | False |
+    | credentials | dict            | Per-call AWS credentials, see `session.get_tenant_manager` | None |
+    | profile   | string            | Named AWS profile to use instead of the default chain | None |
+    | stream    | boolean           | For 'get', return a `HashingReader` as `content` instead of bytes | False |
+    | offset    | int               | For 'get', first byte to read; negative counts back from the end | None |
+    | length    | int               | For 'get', number of bytes to read from `offset` | None |
+    | mmap      | boolean           | For local 'get', return a `memoryview` over a memory map instead of bytes | False |
+    | dst_path  | string            | For 'copy', path to copy the file to | None |
 
     **Note:**
 
@@ -197,7 +226,7 @@ def manage_file(
     ## Field Descriptions
     | Key       | Type              | Description |
     |-----------|-------------------|-------------|
-    | action    | string            | The action to perform. Can be 'get', 'post', or 'delete' |
+    | action    | string            | The action to perform. Can be 'get', 'post', 'delete' or 'copy' |
     | path      | string            | Path to the file |
     | content   | string or bytes   | A string representing the content or `<binary data>` placeholder if the content is binary/bytes, or `null` if the file could not be read. |
     | content_size | int             | An integer representing the size of the content in bytes, or `null` if the file could not be read. |
@@ -208,15 +237,27 @@ def manage_file(
 
 
     """
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return manage_file(
+                action, path, content, md5, metadata, debug,
+                stream=stream, offset=offset, length=length, mmap=mmap,
+                dst_path=dst_path,
+            )
 
     # Initialize debug information
     debug_info = {}
 
+    # Open files and chunk iterators can only be read once, by post_file
+    streamed = is_stream(content)
+
     # Initialize result dictionary
     result = {
         "action": action,  # The action performed
         "path": path,  # The path to the file
-        "content": "<binary data>"
+        "content": "<stream>"
+        if streamed
+        else "<binary data>"
         if isinstance(content, bytes) and action != "get"
         else (
             content[:10]
@@ -226,10 +267,10 @@ def manage_file(
         if content and debug
         else content,  # The content of the file
         "content_size": len(content)
-        if content
+        if content and not streamed
         else None,  # The size of the content
         "binary": is_binary_file(content)
-        if content
+        if content and not streamed
         else None,  # Whether the content is binary
         "md5": md5,  # The MD5 hash of the content
         "metadata": metadata,  # The metadata of the file
@@ -239,7 +280,19 @@ def manage_file(
     # logger.info(f"DEBUG: result={result}")
 
     try:
-        if action == "get":
+        if action == "get" and (stream or mmap or offset is not None or length is not None):
+            get_result = get_file(path, debug, stream=stream, offset=offset, length=length, mmap=mmap)
+            result["status"] = get_result["status"]
+            result["content"] = get_result["content"]
+            result["binary"] = get_result["binary"]
+            result["md5"] = get_result["md5"]
+            if "content_size" in get_result:
+                result["content_size"] = get_result["content_size"]
+            if "range" in get_result:
+                result["range"] = get_result["range"]
+            if debug or result["status"] == 500:
+                debug_info["get_file"] = get_result["debug"]
+        elif action == "get":
             get_result = get_file(path, debug)
             result["status"] = get_result["status"]
             result["content"] = get_result["content"]
@@ -248,10 +301,9 @@ def manage_file(
             if debug or result["status"] == 500:
                 debug_info["get_file"] = get_result["debug"]
         elif action == "post":
-            result["binary"] = is_binary_file(content) if content else None
             debug_info[
                 "post_file_start"
-            ] = f"Starting post_file with path={path}, content={content[:10]}, md5={md5}, metadata={metadata}"
+            ] = f"Starting post_file with path={path}, content={'<stream>' if streamed else content[:10]}, md5={md5}, metadata={metadata}"
             post_result = post_file(
                 path=path,
                 content=content,
@@ -260,6 +312,8 @@ def manage_file(
                 debug=debug,
             )
             result["status"] = post_result["status"]
+            if streamed:
+                result["content_size"] = post_result.get("content_size")
             # Add the debug info for the post_file() function
             if debug or result["status"] == 500:
                 debug_info["post_file"] = post_result["debug"]
@@ -269,6 +323,14 @@ def manage_file(
             # Add the debug info for the delete_file() function
             if debug or result["status"] == 500:
                 debug_info["delete_file"] = delete_result["debug"]
+        elif action == "copy":
+            copy_result = copy_file(path, dst_path, debug)
+            result["status"] = copy_result["status"]
+            result["destination"] = dst_path
+            result["md5"] = copy_result.get("md5")
+            # Add the debug info for the copy_file() function
+            if debug or result["status"] == 500:
+                debug_info["copy_file"] = copy_result["debug"]
         else:
             result["status"] = 500
             debug_info["error"] = "Invalid action"
@@ -286,7 +348,16 @@ def manage_file(
         return result
 
 
-def move_file(src_path:str, dst_path: str, debug: bool = False):
+def move_file(
+    src_path: str,
+    dst_path: str,
+    debug: bool = False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    verify: bool = False,
+    buffer_size: Optional[int] = None,
+    checksum_algorithm: Optional[str] = None,
+):
     """
     # Move File
     Moves a file from a source path to a destination path.
@@ -296,6 +367,31 @@ def move_file(src_path:str, dst_path: str, debug: bool = False):
     It also checks if the file is binary and handles it accordingly during the operations. MD5 checksums are used
     to verify the integrity of the file after moving.
 
+    Moves between two local paths skip all of that: they are a single
+    `rename` on one filesystem, or an in-kernel copy (reflink,
+    `copy_file_range` or `sendfile`) followed by removing the source across
+    filesystems. MD5 checksums are only computed for them when `verify` is
+    set. Moves between two S3 locations are copied inside S3 with
+    `copy_file`, keeping the metadata, before the source is deleted.
+
+    Moves between local and S3 storage stream the file: it is uploaded from
+    disk, or downloaded straight into the destination file, with its MD5
+    computed during the transfer (a download reads each range back to hash
+    it once the ranges before it have landed). The source is only deleted once the checksum of the
+    destination matches, and memory use is bounded by `buffer_size` rather
+    than by the size of the file. Uploads are checked by S3 against the
+    `ContentMD5` of the object or of each part, and the multipart ETag.
+    A download from an object with neither an `md5` in its metadata, an MD5
+    ETag nor a checksum cannot be verified, so the source is kept and a 409
+    returned with the copy in place, unless `verify` is set, which hashes
+    the source object a second time to compare.
+
+    With a `checksum_algorithm` (or `KFM_CHECKSUM_ALGORITHM`), S3 stores a
+    CRC32C, CRC32 or SHA256 checksum with the destination, and the move is
+    verified against it instead of an MD5: an upload compares the checksum S3
+    reports for the new object with the one sent, a download checks the data
+    against the checksum stored with the source.
+
     ## Arguments
 
     | Name         | Type    | Description                                                  | Default |
@@ -303,6 +399,11 @@ def move_file(src_path:str, dst_path: str, debug: bool = False):
     | src_path  | str     | The path (local or S3 URL) of the file to move.              | None    |
     | dst_path    | str     | The destination path (local or S3 URL) to move the file to.  | None    |
     | debug        | bool    | Flag to enable detailed error messages and logging.          | False   |
+    | credentials  | dict    | Per-call AWS credentials, see `session.get_tenant_manager`.  | None    |
+    | profile      | str     | Named AWS profile to use instead of the default chain.       | None    |
+    | verify       | bool    | Hash local-to-local moves and check the copy before removing the source; hash the source again, rather than keeping it, when an S3-to-local download had no MD5 or checksum to check against. | False   |
+    | buffer_size  | int     | Upper bound in bytes on the data buffered by local/S3 moves. | None    |
+    | checksum_algorithm | str | `CRC32C`, `CRC32` or `SHA256` checksum to store and verify for S3. | None    |
 
     ## Returns
     A dictionary with the following keys:
@@ -345,6 +446,24 @@ def move_file(src_path:str, dst_path: str, debug: bool = False):
         }
     }
     """
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return move_file(
+                src_path, dst_path, debug, verify=verify, buffer_size=buffer_size,
+                checksum_algorithm=checksum_algorithm,
+            )
+
+    if not src_path.startswith("s3://") and not dst_path.startswith("s3://") and os.path.isfile(src_path):
+        return _move_local(src_path, dst_path, debug, verify)
+    try:
+        checksum_algorithm = resolve_algorithm(checksum_algorithm)
+    except ValueError as exception:
+        return {"status": 400, "message": f"Bad Request - {exception}"}
+    if src_path.startswith("s3://") and dst_path.startswith("s3://"):
+        return _move_s3(src_path, dst_path, debug, checksum_algorithm)
+    if src_path.startswith("s3://") or (dst_path.startswith("s3://") and os.path.isfile(src_path)):
+        return _move_streamed(src_path, dst_path, debug, buffer_size, checksum_algorithm, verify)
+
     logger.debug(
         f"Entered move_file with src_path: {src_path} and dst_path: {dst_path}"
     )
@@ -483,3 +602,178 @@ def move_file(src_path:str, dst_path: str, debug: bool = False):
             "status": 500,
             "message": f"An error occurred while moving the file: {e}",
         }
+
+
+def _move_local(src_path: str, dst_path: str, debug: bool, verify: bool) -> Dict[str, Union[int, str, Dict]]:
+    """@private Move between two local paths without reading the file into Python."""
+    try:
+        moved = move_local_file(src_path, dst_path, verify=verify)
+    except Exception as e:
+        logger.exception("An error occurred while moving the file.")
+        return {
+            "status": 500,
+            "message": f"An error occurred while moving the file: {e}",
+        }
+
+    logger.info(f"File moved successfully with {moved['method']}.")
+    result = {
+        "status": 200,
+        "message": "File moved successfully.",
+        "source": src_path,
+        "destination": dst_path,
+    }
+    if moved["md5"]:
+        result["md5"] = moved["md5"]
+    if debug:
+        result["debug"] = {"method": moved["method"]}
+    return result
+
+
+def _move_s3(
+    src_path: str, dst_path: str, debug: bool, checksum_algorithm: Optional[str] = None
+) -> Dict[str, Union[int, str, Dict]]:
+    """@private Move between two S3 locations with a server-side copy."""
+    copy_result = copy_file(src_path, dst_path, debug, checksum_algorithm=checksum_algorithm)
+    if copy_result["status"] != 200:
+        logger.error(copy_result["message"])
+        return copy_result
+
+    delete_result = delete_file(path=src_path, debug=debug)
+    if delete_result["status"] != 200:
+        logger.error("Failed to delete file from source path.")
+        return delete_result
+
+    logger.info("File moved successfully within S3.")
+    result = {
+        "status": 200,
+        "message": "File moved successfully.",
+        "source": src_path,
+        "destination": dst_path,
+        "md5": copy_result["md5"],
+    }
+    if debug:
+        result["debug"] = {"copy": copy_result["debug"], "delete": delete_result["debug"]}
+    return result
+
+
+def _move_streamed(
+    src_path: str,
+    dst_path: str,
+    debug: bool,
+    buffer_size: Optional[int],
+    checksum_algorithm: Optional[str] = None,
+    verify: bool = False,
+) -> Dict[str, Union[int, str, Dict]]:
+    """
+    @private Move between local and S3 storage without loading the file into
+    memory. With a `checksum_algorithm` the destination is checked against
+    S3's additional checksum rather than an MD5.
+
+    A download is checked by `download_file` against the source's checksum,
+    `md5` metadata or ETag. When it has none of them the source is kept,
+    unless `verify` is set to hash it a second time and compare. An upload
+    is checked by S3 itself: `put_object` is sent with a `ContentMD5`, every
+    part of a multipart upload with its own, and the multipart ETag is
+    compared with the parts sent, so the object is not read back.
+    """
+    src_checksum = dst_checksum = None
+    if src_path.startswith("s3://"):
+        transfer_result = download_file(
+            src_path, dst_path, debug, buffer_size=buffer_size, checksum=bool(checksum_algorithm) or None,
+        )
+        src_md5 = dst_md5 = transfer_result.get("md5")
+        if transfer_result["status"] == 200 and not transfer_result["verified"]:
+            if not verify:
+                logger.error(f"Nothing to verify the download of {src_path} against; keeping the source.")
+                return {
+                    "status": 409,
+                    "message": (
+                        f"Conflict - {src_path} has no MD5 or checksum to verify the download against, "
+                        f"so it was copied to {dst_path} but not deleted. Pass verify=True to hash the "
+                        "source and compare."
+                    ),
+                    "debug": {"transfer": transfer_result} if debug else {},
+                }
+            # Neither the metadata nor the ETag gave the MD5, so the source
+            # is read a second time to check the download against
+            try:
+                src_md5 = resolve_md5(src_path)["md5"]
+            except Exception as exception:
+                logger.error(f"Could not hash {src_path}: {exception}")
+                src_md5 = None
+    else:
+        transfer_result = post_file(
+            path=dst_path, content=src_path, debug=debug, buffer_size=buffer_size,
+            checksum_algorithm=checksum_algorithm,
+        )
+        src_md5 = dst_md5 = transfer_result.get("md5")
+        src_checksum = transfer_result.get("checksum")
+        if transfer_result["status"] == 200 and src_checksum:
+            dst_checksum = _stored_checksum(dst_path)
+
+    if transfer_result["status"] != 200:
+        logger.error(transfer_result["message"])
+        return transfer_result
+
+    if src_checksum != dst_checksum:
+        logger.error(f"Checksums do not match! SRC: {src_checksum} DST: {dst_checksum}")
+        return {
+            "status": 500,
+            "message": "Checksums do not match!",
+            "debug": {
+                "src_path": src_path,
+                "dst_path": dst_path,
+                "src_checksum": src_checksum,
+                "dst_checksum": dst_checksum,
+                "debug": {"transfer": transfer_result},
+            },
+        }
+
+    if src_md5 != dst_md5:
+        logger.error(f"MD5 checksums do not match! SRC: {src_md5} DST: {dst_md5}")
+        return {
+            "status": 500,
+            "message": "MD5 checksums do not match!",
+            "debug": {
+                "src_path": src_path,
+                "dst_path": dst_path,
+                "src_md5": src_md5,
+                "dst_md5": dst_md5,
+                "debug": {"transfer": transfer_result},
+            },
+        }
+
+    delete_result = delete_file(path=src_path, debug=debug)
+    if delete_result["status"] != 200:
+        logger.error("Failed to delete file from source path.")
+        return delete_result
+
+    logger.info("File moved successfully.")
+    result = {
+        "status": 200,
+        "message": "File moved successfully.",
+        "source": src_path,
+        "destination": dst_path,
+        "md5": dst_md5,
+    }
+    if dst_checksum or transfer_result.get("checksum"):
+        result["checksum"] = dst_checksum or transfer_result["checksum"]
+    if debug:
+        result["debug"] = {"transfer": transfer_result["debug"], "delete": delete_result["debug"]}
+        if "verified" in transfer_result:
+            result["debug"]["verified"] = transfer_result["verified"]
+    return result
+
+
+def _stored_checksum(path: str) -> Optional[str]:
+    """@private The additional checksum S3 reports for an object, or `None`."""
+    bucket_name, key = path[5:].split("/", 1)
+    try:
+        head = get_current_manager().client_for(bucket_name).head_object(
+            Bucket=bucket_name, Key=key, ChecksumMode="ENABLED",
+        )
+    except Exception as exception:
+        logger.error(f"Could not read the checksum of {path}: {exception}")
+        return None
+    stored = stored_checksum(head)
+    return stored[1] if stored else None
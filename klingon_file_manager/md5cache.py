@@ -0,0 +1,400 @@
+# md5cache.py
+"""
+# MD5 Cache Overview
+
+Content hash cache for local files.
+
+Hashing a local file means reading all of it. Integrity checks over large
+trees that rarely change spend nearly all their time re-reading files whose
+MD5 is already known. This module remembers the MD5 of each file against its
+stat key, `(device, inode, size, mtime_ns)`, so a repeat check costs a single
+`stat` call. Any write to the file changes its size or modification time and
+with it the key, so a stale entry is never returned: it simply no longer
+matches and the file is hashed again.
+
+Files modified within the last two seconds are hashed but not cached.
+Filesystems with coarse timestamps could otherwise see a second write land
+within the same timestamp and keep the same key.
+
+Three storage backends are available:
+
+| Backend  | Class            | Lifetime |
+|----------|------------------|----------|
+| `memory` | `MemoryMD5Cache` | The process, least recently used entries dropped first. |
+| `sqlite` | `SQLiteMD5Cache` | A SQLite file shared by every process on the host. |
+| `xattr`  | `XattrMD5Cache`  | The file itself, in a `user.` extended attribute (Linux). |
+
+# Contents
+
+## cached_md5
+Returns the MD5 of a local file, from the cache when its stat key matches.
+
+## get_md5_cache
+Returns the process-wide cache configured by `KFM_MD5_CACHE`.
+
+## set_md5_cache
+Replaces the process-wide cache, or turns caching off.
+
+# Configuration
+
+| Variable             | Default  | Description |
+|----------------------|----------|-------------|
+| `KFM_MD5_CACHE`      | `memory` | Backend: `memory`, `sqlite`, `xattr` or `off`. |
+| `KFM_MD5_CACHE_SIZE` | `65536`  | Entries kept by the `memory` backend. |
+| `KFM_MD5_CACHE_FILE` | `~/.cache/klingon_file_manager/md5.sqlite3` | Database of the `sqlite` backend. |
+
+# Usage Examples
+
+To hash a file, reading it only the first time:
+```python
+>>> cached_md5('/data/model.bin')
+'6cd3556deb0da54bca060b4c39479839'
+>>> cached_md5('/data/model.bin')  # one stat call
+'6cd3556deb0da54bca060b4c39479839'
+```
+
+To keep hashes across runs in a SQLite file:
+```python
+>>> set_md5_cache(SQLiteMD5Cache('/var/cache/kfm/md5.sqlite3'))
+```
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+from .utils import logger, renew_lock_after_fork
+
+MD5_CACHE = os.getenv('KFM_MD5_CACHE', 'memory').strip().lower()
+"""@private Backend of the process-wide cache."""
+
+MD5_CACHE_SIZE = int(os.getenv('KFM_MD5_CACHE_SIZE', '65536'))
+"""@private Entries kept by the in-memory cache."""
+
+MD5_CACHE_FILE = os.getenv('KFM_MD5_CACHE_FILE') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'klingon_file_manager', 'md5.sqlite3',
+)
+"""@private Database of the SQLite cache."""
+
+_RACY_WINDOW_NS = 2_000_000_000
+"""@private Files modified this recently are not cached; their mtime may not change on the next write."""
+
+_READ_SIZE = 1024 * 1024
+"""@private Bytes read at a time when hashing a file."""
+
+StatKey = Tuple[int, int, int, int]
+
+
+def stat_key(stat: os.stat_result) -> Optional[StatKey]:
+    """
+    @private `(device, inode, size, mtime_ns)` of a stat result, or `None`
+    when the file cannot be cached: it has no inode number or was modified
+    too recently for its timestamp to be trusted.
+    """
+    if not stat.st_ino or time.time_ns() - stat.st_mtime_ns < _RACY_WINDOW_NS:
+        return None
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class MD5Cache(ABC):
+    """
+    # MD5 Cache
+
+    Abstract base of the cache backends. A backend maps a file's stat key
+    to its MD5; `get()` must return `None` unless the stored key matches.
+    A backend that does not implement both methods cannot be created.
+
+    ## Methods
+
+    | Method  | Description |
+    |---------|-------------|
+    | `get()` | Returns the MD5 stored for `path` under `key`, or `None`. |
+    | `put()` | Stores the MD5 of `path` under `key`. |
+    """
+
+    @abstractmethod
+    def get(self, path: str, key: StatKey) -> Optional[str]:
+        """Returns the MD5 stored for `path` under `key`, or `None`."""
+
+    @abstractmethod
+    def put(self, path: str, key: StatKey, md5: str) -> None:
+        """Stores the MD5 of `path` under `key`."""
+
+
+class MemoryMD5Cache(MD5Cache):
+    """
+    # Memory MD5 Cache
+
+    Least recently used cache held in the process. Entries are indexed by
+    device and inode, so a changed file replaces its old entry rather than
+    adding another.
+
+    ## Attributes
+
+    | Attribute     | Type  | Description |
+    |---------------|-------|-------------|
+    | `max_entries` | `int` | Files remembered before the least recently used is dropped (`KFM_MD5_CACHE_SIZE`). |
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = MD5_CACHE_SIZE if max_entries is None else max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        renew_lock_after_fork(self)
+
+    def get(self, path: str, key: StatKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key[:2])
+            if entry is None or entry[0] != key[2:]:
+                return None
+            self._entries.move_to_end(key[:2])
+            return entry[1]
+
+    def put(self, path: str, key: StatKey, md5: str) -> None:
+        with self._lock:
+            self._entries[key[:2]] = (key[2:], md5)
+            self._entries.move_to_end(key[:2])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteMD5Cache(MD5Cache):
+    """
+    # SQLite MD5 Cache
+
+    Cache kept in a SQLite database, so hashes survive the process and are
+    shared by every process on the host. One row is kept per device and
+    inode. Database errors are logged and treated as cache misses.
+
+    ## Attributes
+
+    | Attribute | Type  | Description |
+    |-----------|-------|-------------|
+    | `path`    | `str` | Database file, created if missing (`KFM_MD5_CACHE_FILE`). |
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or MD5_CACHE_FILE
+        self._lock = threading.Lock()
+        renew_lock_after_fork(self)
+        self._pid = None
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """@private Open the database once per process; a connection must not cross fork()."""
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS md5_cache ('
+                'device INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER, md5 TEXT, '
+                'PRIMARY KEY (device, inode))'
+            )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, path: str, key: StatKey) -> Optional[str]:
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT md5 FROM md5_cache WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?', key,
+                ).fetchone()
+        except (OSError, sqlite3.Error) as exception:
+            logger.info(f"Could not read MD5 cache {self.path}: {exception}")
+            return None
+        return row[0] if row else None
+
+    def put(self, path: str, key: StatKey, md5: str) -> None:
+        try:
+            with self._lock:
+                self._connect().execute(
+                    'INSERT OR REPLACE INTO md5_cache (device, inode, size, mtime_ns, md5) VALUES (?, ?, ?, ?, ?)',
+                    (*key, md5),
+                )
+        except (OSError, sqlite3.Error) as exception:
+            logger.info(f"Could not write MD5 cache {self.path}: {exception}")
+
+
+class XattrMD5Cache(MD5Cache):
+    """
+    # Xattr MD5 Cache
+
+    Cache kept with each file in a user extended attribute holding the stat
+    key and the MD5. The hash lives and dies with the file and needs no
+    separate store, but files the process cannot write, and filesystems
+    without extended attributes, are not cached. Setting the attribute does
+    not change the file's modification time. Linux only.
+
+    ## Attributes
+
+    | Attribute | Type  | Description |
+    |-----------|-------|-------------|
+    | `name`    | `str` | Attribute holding the entry. |
+    """
+
+    def __init__(self, name: str = 'user.kfm.md5'):
+        if not hasattr(os, 'getxattr'):
+            raise OSError("Extended attributes are not supported on this platform.")
+        self.name = name
+
+    def get(self, path: str, key: StatKey) -> Optional[str]:
+        try:
+            value = os.getxattr(path, self.name).decode('ascii')
+        except (OSError, UnicodeDecodeError):
+            return None
+        stored_key, _, md5 = value.rpartition(':')
+        return md5 if stored_key == ':'.join(map(str, key)) else None
+
+    def put(self, path: str, key: StatKey, md5: str) -> None:
+        try:
+            os.setxattr(path, self.name, f"{':'.join(map(str, key))}:{md5}".encode('ascii'))
+        except OSError as exception:
+            logger.debug(f"Could not store MD5 of {path} in {self.name}: {exception}")
+
+
+def _new_cache(backend: str) -> Optional[MD5Cache]:
+    """@private Cache for a `KFM_MD5_CACHE` value, or `None` when caching is off."""
+    if backend in ('off', 'none', '0', 'false', ''):
+        return None
+    if backend == 'sqlite':
+        return SQLiteMD5Cache()
+    if backend == 'xattr':
+        try:
+            return XattrMD5Cache()
+        except OSError as exception:
+            logger.info(f"{exception} Using an in-memory MD5 cache instead.")
+    elif backend != 'memory':
+        logger.info(f"Unknown KFM_MD5_CACHE backend {backend!r}; using an in-memory MD5 cache.")
+    return MemoryMD5Cache()
+
+
+_md5_cache: Union[MD5Cache, None, bool] = False
+"""@private Process-wide cache; `False` until first use, `None` when caching is off."""
+
+_md5_cache_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    """@private Replace the module locks inherited from the parent process."""
+    global _md5_cache_lock
+    _md5_cache_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_md5_cache() -> Optional[MD5Cache]:
+    """
+    # Get MD5 Cache
+
+    Returns the process-wide cache, created on first use from
+    `KFM_MD5_CACHE`, or `None` when caching is off.
+    """
+    global _md5_cache
+    with _md5_cache_lock:
+        if _md5_cache is False:
+            _md5_cache = _new_cache(MD5_CACHE)
+        return _md5_cache
+
+
+def set_md5_cache(cache: Optional[MD5Cache]) -> None:
+    """
+    # Set MD5 Cache
+
+    Replaces the process-wide cache. Pass `None` to turn caching off.
+
+    ## Arguments
+
+    | Name  | Type     | Description | Default |
+    |-------|----------|-------------|---------|
+    | cache | MD5Cache | Cache used by every local hash from now on. |   |
+    """
+    global _md5_cache
+    with _md5_cache_lock:
+        _md5_cache = cache
+
+
+def _current_key(path: str) -> Optional[StatKey]:
+    """@private Stat key of `path` now, or `None` if it is gone or cannot be cached."""
+    try:
+        return stat_key(os.stat(path))
+    except OSError:
+        return None
+
+
+def hash_local_file(path: str) -> Tuple[str, bool]:
+    """
+    @private MD5 of a local file and whether it came from the cache. On a
+    miss the file is hashed a chunk at a time, and the result cached only
+    if the file did not change while it was read.
+    """
+    cache = get_md5_cache()
+    with open(path, 'rb') as file:
+        key = stat_key(os.fstat(file.fileno())) if cache is not None else None
+        if key is not None:
+            md5 = cache.get(path, key)
+            if md5:
+                return md5, True
+        hasher = hashlib.md5()
+        for chunk in iter(lambda: file.read(_READ_SIZE), b''):
+            hasher.update(chunk)
+        if key is not None and stat_key(os.fstat(file.fileno())) == key:
+            cache.put(path, key, hasher.hexdigest())
+    return hasher.hexdigest(), False
+
+
+def lookup_md5(path: str, stat: os.stat_result) -> Optional[str]:
+    """
+    @private Cached MD5 of `path`, whose stat before it was read was `stat`,
+    or `None`. Only returned while `path` still has that stat key, so the
+    content read is known to match it.
+    """
+    cache = get_md5_cache()
+    key = stat_key(stat) if cache is not None else None
+    if key is None or _current_key(path) != key:
+        return None
+    return cache.get(path, key)
+
+
+def store_md5(path: str, stat: os.stat_result, md5: str) -> None:
+    """
+    @private Cache `md5`, hashed from `path` read after a stat of `stat`,
+    unless the file has changed since.
+    """
+    cache = get_md5_cache()
+    key = stat_key(stat) if cache is not None else None
+    if key is not None and _current_key(path) == key:
+        cache.put(path, key, md5)
+
+
+def cached_md5(path: str) -> str:
+    """
+    # Cached MD5
+
+    Returns the hex MD5 of a local file. When the cache holds a hash for the
+    file's current `(device, inode, size, mtime_ns)` it is returned after a
+    single `stat`; otherwise the file is read, hashed and the hash cached.
+
+    ## Arguments
+
+    | Name | Type | Description | Default |
+    |------|------|-------------|---------|
+    | path | str  | Local file to hash. |   |
+
+    ## Raises
+    `OSError` when the file cannot be read.
+    """
+    return hash_local_file(path)[0]
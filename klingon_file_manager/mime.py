@@ -0,0 +1,200 @@
+# mime.py
+"""
+# MIME Overview
+
+MIME type detection for the Klingon File Manager.
+
+Creating a `magic.Magic` instance loads the libmagic database, and libmagic
+examines every byte it is given, so building one per call and handing it a
+whole payload makes MIME detection one of the slowest steps of an upload.
+This module keeps one `magic.Magic` per thread, since a libmagic handle
+serves one thread at a time and threads sharing one would queue for it, and
+only ever passes it the first `KFM_MIME_SNIFF_BYTES` of the content. Every
+format libmagic recognises by its signature is identified from the first
+few kilobytes.
+
+When the name of the file is known, its extension is looked up with
+`mimetypes` first and libmagic is not consulted at all. Compressed files
+(`.gz`, `.bz2`, `.xz`, ...), extensions registered as the generic
+`application/octet-stream` (`.bin`, ...) and unknown extensions are sniffed
+as before.
+
+# Contents
+
+## MimeDetector
+Detects MIME types from file names and content prefixes.
+
+## get_mime_detector
+Returns the shared detector.
+
+## detect_mime_type
+Detects the MIME type of content with the shared detector.
+
+# Configuration
+
+| Variable                  | Default | Description |
+|---------------------------|---------|-------------|
+| `KFM_MIME_SNIFF_BYTES`    | `8192`  | Bytes from the start of content passed to libmagic. |
+| `KFM_MIME_FROM_EXTENSION` | `1`     | Set to `0` to always sniff the content, even when the extension is known. |
+
+# Usage Examples
+
+To detect the MIME type of an upload from its key, or its content if the
+extension is not known:
+```python
+>>> detect_mime_type(b'%PDF-1.7 ...', name='s3://bucket/report.pdf')
+'application/pdf'
+>>> detect_mime_type(b'Hello, world!')
+'text/plain'
+```
+"""
+
+import os
+import mimetypes
+import threading
+from typing import Any, Optional, Union
+
+from . import utils
+
+MIME_SNIFF_BYTES = int(os.getenv('KFM_MIME_SNIFF_BYTES', str(8 * 1024)))
+"""@private Bytes from the start of content passed to libmagic."""
+
+MIME_FROM_EXTENSION = os.getenv('KFM_MIME_FROM_EXTENSION', '1').lower() in ('1', 'true', 'yes')
+"""@private Trust known file extensions instead of sniffing the content."""
+
+_GENERIC_MIME_TYPE = 'application/octet-stream'
+"""@private Type registered for extensions such as `.bin` that do not describe the content."""
+
+
+class MimeDetector:
+    """
+    # MIME Detector
+
+    Detects MIME types from file extensions, falling back to libmagic on a
+    bounded prefix of the content. Each thread gets its own `magic.Magic`,
+    created on its first detection and reused afterwards.
+
+    ## Attributes
+
+    | Attribute        | Type   | Description |
+    |------------------|--------|-------------|
+    | `sniff_bytes`    | `int`  | Bytes of content passed to libmagic (`KFM_MIME_SNIFF_BYTES`). |
+    | `from_extension` | `bool` | Look up known extensions before sniffing (`KFM_MIME_FROM_EXTENSION`). |
+
+    ## Methods
+
+    | Method        | Description |
+    |---------------|-------------|
+    | `from_name()` | Returns the MIME type for a file name's extension, or `None`. |
+    | `sniff()`     | Returns the MIME type libmagic finds in the content. |
+    | `detect()`    | Tries `from_name()`, then `sniff()`. |
+    """
+
+    def __init__(self, sniff_bytes: Optional[int] = None, from_extension: Optional[bool] = None):
+        self.sniff_bytes = MIME_SNIFF_BYTES if sniff_bytes is None else sniff_bytes
+        self.from_extension = MIME_FROM_EXTENSION if from_extension is None else from_extension
+        self._local = threading.local()
+        if self.from_extension:
+            # Loads the system MIME tables now rather than racing on first use
+            mimetypes.init()
+
+    def _magic(self) -> Any:
+        """@private This thread's `magic.Magic`, created on first use."""
+        magic_mime = getattr(self._local, 'magic', None)
+        if magic_mime is None:
+            utils._require('magic')
+            magic_mime = self._local.magic = utils.magic.Magic(mime=True)
+        return magic_mime
+
+    def from_name(self, name: Optional[str]) -> Optional[str]:
+        """
+        # From Name
+
+        Returns the MIME type registered for the extension of `name`, a path
+        or S3 URL, or `None` when it is unknown, compressed, generic
+        (`application/octet-stream`) or extension lookups are off.
+        """
+        if not name or not self.from_extension:
+            return None
+        mime_type, encoding = mimetypes.guess_type(name)
+        # `data.csv.gz` is gzip data, not CSV, and `.bin` says nothing about
+        # the content, so both are sniffed
+        if encoding is not None or mime_type == _GENERIC_MIME_TYPE:
+            return None
+        return mime_type
+
+    def sniff(self, content: Union[str, bytes, bytearray, memoryview]) -> str:
+        """
+        # Sniff
+
+        Returns the MIME type libmagic finds in the first `sniff_bytes` of
+        `content`. Nothing beyond them is read or copied.
+        """
+        if isinstance(content, str):
+            sample = content[:self.sniff_bytes].encode('utf-8')[:self.sniff_bytes]
+        else:
+            sample = bytes(memoryview(content).cast('B')[:self.sniff_bytes])
+        return self._magic().from_buffer(sample)
+
+    def detect(self, content: Union[str, bytes, bytearray, memoryview], name: Optional[str] = None) -> str:
+        """
+        # Detect
+
+        Returns the MIME type for the extension of `name` when it is known,
+        otherwise the one libmagic finds in `content`.
+
+        ## Arguments
+
+        | Name    | Type            | Description | Default |
+        |---------|-----------------|-------------|---------|
+        | content | str or bytes-like | Content, or its first bytes. |   |
+        | name    | str             | Path or S3 URL the content belongs to. | None |
+        """
+        return self.from_name(name) or self.sniff(content)
+
+
+_detector: Optional[MimeDetector] = None
+"""@private Shared detector, created on first use."""
+
+_detector_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    """@private Replace the module locks inherited from the parent process."""
+    global _detector_lock
+    _detector_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_mime_detector() -> MimeDetector:
+    """
+    # Get MIME Detector
+
+    Returns the shared `MimeDetector`, creating it on first use.
+    """
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = MimeDetector()
+        return _detector
+
+
+def detect_mime_type(content: Union[str, bytes, bytearray, memoryview], name: Optional[str] = None) -> str:
+    """
+    # Detect MIME Type
+
+    Returns the MIME type of `content`, from the extension of `name` when
+    it is known, otherwise from the first `KFM_MIME_SNIFF_BYTES` of the
+    content. See `MimeDetector.detect()`.
+
+    ## Arguments
+
+    | Name    | Type            | Description | Default |
+    |---------|-----------------|-------------|---------|
+    | content | str or bytes-like | Content, or its first bytes. |   |
+    | name    | str             | Path or S3 URL the content belongs to. | None |
+    """
+    return get_mime_detector().detect(content, name)
@@ -24,37 +24,66 @@ To post a file to an S3 bucket:
 ```python
 >>> manage_file('post', 's3://bucket/file', 'Hello, world!')
 ```
+
+To upload a large local file or a generator of chunks without loading it into
+memory:
+```python
+>>> post_file('s3://bucket/large.bin', '/path/to/large.bin')
+>>> post_file('s3://bucket/export.csv', (row.encode() for row in rows))
+```
 """
 
 import io
+import uuid
 import hashlib
-from typing import Union, Dict, Optional
-import boto3
+import tempfile
+from typing import Union, Dict, Iterable, Optional
 import logging
 import base64
-from .utils import get_md5_hash, get_md5_hash_filename, get_file_size, get_mime_type_content
+from .utils import get_mime_type_content
+from .mime import get_mime_detector
 from .utils import logger
+from .credentials import record_operation_outcome
+from .session import get_current_manager, use_credentials
+from .streams import DEFAULT_CHUNK_SIZE, HashingReader, is_stream, open_source
+from .transfer import MULTIPART_THRESHOLD, parts_in_buffer, upload_multipart
+from .hashing import MIME_SAMPLE_BYTES, ContentAnalysis, analyze_content
+from .checksums import checksum_field, new_checksum, resolve_algorithm
 
 import os
 
 def post_file(
     path: str,
-    content: Union[str, bytes],
+    content: Union[str, bytes, io.IOBase, Iterable[bytes]],
     md5: str = None,
     metadata: dict = None,
-    debug=False) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    debug=False,
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    buffer_size: Optional[int] = None,
+    analysis: Optional[ContentAnalysis] = None,
+    checksum_algorithm: Optional[str] = None) -> Dict[str, Union[int, str, Dict[str, str]]]:
+
+    if credentials or profile:
+        with use_credentials(credentials, profile):
+            return post_file(
+                path, content, md5=md5, metadata=metadata, debug=debug,
+                buffer_size=buffer_size, analysis=analysis, checksum_algorithm=checksum_algorithm,
+            )
 
-    # Check if content is a file path
-    if isinstance(content, str) and os.path.isfile(content):
-        try:
-            with open(content, 'rb') as file:
-                content = file.read()
-        except Exception as e:
-            return {
-                "status": 400,
-                "message": f"Failed to read file at path provided in content: {str(e)}",
-                "debug": {} if not debug else {"exception": str(e)}
-            }
+    try:
+        checksum_algorithm = resolve_algorithm(checksum_algorithm)
+    except ValueError as exception:
+        return {
+            "status": 400,
+            "message": f"Bad Request - {exception}",
+            "debug": {},
+        }
+
+    # File paths, open files and chunk iterators are streamed, never read
+    # into memory as a whole
+    if (isinstance(content, str) and os.path.isfile(content)) or is_stream(content):
+        return _post_stream(path, content, md5, metadata, debug, buffer_size, checksum_algorithm)
 
     """
     # Post content to a file at a given path.
@@ -67,13 +96,36 @@ def post_file(
     | Name      | Type              | Description | Default |
     |-----------|-------------------|-------------|---------|
     | path      | string            | Path where the file should be written |   |
-    | content   | string or bytes   | Content to post |  |
+    | content   | string, bytes, file or iterator | Content to post, a path to a local file, an open binary file or an iterator of byte chunks |  |
     | md5       | string            | MD5 hash of the file, used for data integrity | * See note |
     | metadata  | dictionary        | Additional metadata to include with the file | ^ See note |
     | debug     | boolean           | Flag to enable/disable debugging | False |
+    | credentials | dict            | Per-call AWS credentials, see `session.get_tenant_manager` | None |
+    | profile   | string            | Named AWS profile to use instead of the default chain | None |
+    | buffer_size | int             | Upper bound in bytes on the data held in memory while streaming | None |
+    | analysis  | ContentAnalysis   | Result of `analyze_content(content)` if the caller already has it | None |
+    | checksum_algorithm | string   | `CRC32C`, `CRC32` or `SHA256` checksum for S3 to validate and store (`KFM_CHECKSUM_ALGORITHM`) | None |
 
     **Note:**
 
+    Paths, open files and chunk iterators are streamed in chunks of
+    `KFM_STREAM_CHUNK_SIZE` bytes, so memory use does not grow with the file.
+    `buffer_size` lowers the chunk size and the number of multipart parts in
+    flight so that no more than that is buffered, though never less than
+    one part of at least 5 MiB for a multipart upload.
+
+    `str` and bytes content is analysed once with `analyze_content()`: it is
+    encoded and hashed a single time, and the result is shared by every step
+    of the post. The MIME type is only detected for S3, from the first
+    64 KiB.
+    Iterators are spooled to a temporary file on their way to S3, because the
+    MD5 hash has to be sent before the data.
+
+    With a `checksum_algorithm`, S3 uploads also send that checksum, computed
+    per part in parallel for multipart uploads, and S3 stores it with the
+    object so reads can be verified against it. The `md5` metadata is still
+    written. Local posts ignore it.
+
     \\* If md5 is provided, it will be compared against the calculated MD5 hash
         of the content. If they do not match, the post will fail. If md5 hash
         is not provided, it will be calculated, returned in the response and
@@ -105,6 +157,7 @@ def post_file(
     | status    | int               | HTTP-like status code |
     | message   | string            | Message describing the outcome |
     | md5       | string            | MD5 hash of the written file |
+    | checksum  | string            | Additional checksum stored by S3, when `checksum_algorithm` is used |
     | debug     | dictionary        | Debug information |
     """
     debug_info = {}
@@ -115,19 +168,22 @@ def post_file(
     logger.debug(f"Metadata: {metadata}")
     logger.debug(f"Debug: {debug}")
 
+    # Encode, hash and measure the content once for every step below
+    if analysis is None:
+        analysis = analyze_content(content)
+
     # Default metadata
     # Set md5 if md5 is None
-    md5=md5 if md5 is not None else get_md5_hash(content)
-    # Calculate the file size and set file_size_var
-    file_size=get_file_size(content)
-    # Get the content type and set content_type_var
-    content_type=get_mime_type_content(content)
-    
+    md5 = md5 if md5 is not None else analysis.md5
+
     default_metadata = {
         "md5": md5,
-        "file-size-bytes": file_size,
-        "Content-Type": content_type,
+        "file-size-bytes": analysis.size,
     }
+    # Only S3 stores the content type, so local posts skip MIME detection
+    if path.startswith("s3://"):
+        # A known extension spares sniffing the content
+        default_metadata["Content-Type"] = get_mime_detector().from_name(path) or analysis.content_type
 
     # Build metadata dictionary
     # Step 1: check if metadata is None, if so, set metadata to
@@ -163,6 +219,8 @@ def post_file(
                     md5=md5,
                     metadata=metadata,
                     debug=debug,
+                    analysis=analysis,
+                    checksum_algorithm=checksum_algorithm,
                 )
             )
         else:
@@ -171,10 +229,11 @@ def post_file(
                     path=path,
                     content=content,
                     debug=debug,
+                    analysis=analysis,
                 )
             )
-        
-        debug_info["md5"] = get_md5_hash(content)
+
+        debug_info["md5"] = analysis.md5
         return debug_info
 
     except Exception as exception:
@@ -183,7 +242,7 @@ def post_file(
         return {
             "status": 500,
             "message": f"Failed to post file: {str(exception)}" if debug else "Failed to post file.",
-            "md5": get_md5_hash(content),
+            "md5": analysis.md5,
             "debug": debug_info if debug else {},
         }
 
@@ -194,7 +253,9 @@ def _post_to_s3(
         content: Union[str, bytes],
         md5: Optional[str],
         metadata: Optional[Dict[str, str]],
-        debug: bool) -> Dict[str, Union[int, str, Dict[str, str]]]:
+        debug: bool,
+        analysis: Optional[ContentAnalysis] = None,
+        checksum_algorithm: Optional[str] = None) -> Dict[str, Union[int, str, Dict[str, str]]]:
     """
     # Posts content to an S3 bucket.
 
@@ -209,6 +270,8 @@ def _post_to_s3(
     | md5       | string            | MD5 hash of the file, used for data integrity | * See note |
     | metadata  | dictionary        | Additional metadata to include with the file | ^ See note |
     | debug     | boolean           | Flag to enable/disable debugging | False |
+    | analysis  | ContentAnalysis   | Analysis of `content` from `post_file`; computed if missing | None |
+    | checksum_algorithm | string   | Additional checksum for S3 to validate and store | None |
 
     ## Returns
     A dictionary containing the status of the post operation to S3 as follows:
@@ -237,15 +300,17 @@ def _post_to_s3(
         bucket_name = s3_uri_parts[0]
         key = s3_uri_parts[1]
 
-        # Initialize S3 resource and client
-        s3_client = boto3.client('s3')
+        # Reuse the current FileManager's pooled client for the bucket's region
+        s3_client = get_current_manager().client_for(bucket_name)
 
         # Check for metadata = None
         if metadata is None:
             metadata = {}
 
-        # Get md5 of content using get_md5_hash
-        calculated_md5 = get_md5_hash(content)
+        # Reuse the hash computed by post_file
+        if analysis is None:
+            analysis = analyze_content(content)
+        calculated_md5 = analysis.md5
 
         # Check if md5 is provided
         if md5:
@@ -264,39 +329,65 @@ def _post_to_s3(
         # Add md5 to object metadata if it isn't already there
         metadata["md5"] = md5
 
-        # Assuming md5 contains the hexadecimal MD5 hash
-        hex_md5 = md5
-
-        # Convert the hexadecimal MD5 hash to bytes
-        md5_bytes = bytes.fromhex(hex_md5)
-
-        # Encode the bytes in base64 so AWS can use it in ContentMD5
-        content_md5 = base64.b64encode(md5_bytes).decode('utf-8')
+        # Encode the digest in base64 so AWS can use it in ContentMD5
+        content_md5 = analysis.content_md5
 
         # Convert all metadata values to strings
         metadata_str = {k: str(v) for k, v in metadata.items()}
 
-        # Convert strings to bytes
-        content_bytes = content if isinstance(content, bytes) else content.encode('utf-8')
-
-        with io.BytesIO(content_bytes) as f:
-            f.seek(0)
-            # Use put_object method
-            result = s3_client.put_object(
-                Body=f.read(),
-                Bucket=bucket_name,
-                Key=key,
-                Metadata=metadata_str,
-                ContentMD5=content_md5,
-                ContentType=metadata.get('Content-Type', 'binary/octet-stream')  # Set the Content-Type
-            )
+        # The content was encoded to bytes once, by the analysis
+        content_bytes = analysis.data
+        checksum = None
 
-        return {
+        try:
+            if analysis.size >= MULTIPART_THRESHOLD:
+                # Large bodies go up as concurrent parts sliced from memory
+                result = upload_multipart(
+                    s3_client,
+                    bucket_name,
+                    key,
+                    content_bytes,
+                    size=analysis.size,
+                    metadata=metadata_str,
+                    content_type=metadata.get('Content-Type', 'binary/octet-stream'),
+                    checksum_algorithm=checksum_algorithm,
+                )
+                debug_info["parts"] = result["Parts"]
+                if checksum_algorithm:
+                    checksum = result.get(checksum_field(checksum_algorithm))
+            else:
+                checksum_args = {}
+                if checksum_algorithm:
+                    calculated = new_checksum(checksum_algorithm)
+                    calculated.update(content_bytes)
+                    checksum = calculated.b64digest()
+                    checksum_args = {
+                        'ChecksumAlgorithm': checksum_algorithm,
+                        checksum_field(checksum_algorithm): checksum,
+                    }
+                result = s3_client.put_object(
+                    Body=content_bytes,
+                    Bucket=bucket_name,
+                    Key=key,
+                    Metadata=metadata_str,
+                    ContentMD5=content_md5,
+                    ContentType=metadata.get('Content-Type', 'binary/octet-stream'),  # Set the Content-Type
+                    **checksum_args,
+                )
+        except Exception as exception:
+            record_operation_outcome(bucket_name, 'PutObject', exception)
+            raise
+        record_operation_outcome(bucket_name, 'PutObject')
+
+        response = {
             "status": 200,
             "message": "File written successfully to S3.",
             "md5": metadata.get("md5", ""),
             "debug": debug_info if debug else {},
         }
+        if checksum:
+            response["checksum"] = checksum
+        return response
         
     except Exception as e:
         # Catch any unhandled exceptions and return an error message
@@ -310,7 +401,8 @@ def _post_to_s3(
 def _post_to_local(
     path: str,
     content: Union[str, bytes],
-    debug: bool = False) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    debug: bool = False,
+    analysis: Optional[ContentAnalysis] = None) -> Dict[str, Union[int, str, Dict[str, str]]]:
     """
     # Posts content to a local directory.
 
@@ -322,6 +414,7 @@ def _post_to_local(
     | path  | string    | The local path where the file should be written. |   |
     | content  | string or bytes | Content to post |  |
     | debug  | boolean  | Flag to enable/disable debugging | False |
+    | analysis | ContentAnalysis | Analysis of `content` from `post_file`; computed if missing | None |
 
     ## Returns
     A dictionary containing the status of the post operation to the local
@@ -346,16 +439,18 @@ def _post_to_local(
     """
 
     debug_info = {}
+    if analysis is None:
+        analysis = analyze_content(content)
+    # The bytes written are the bytes that were hashed, so the file needs no
+    # second read to find its MD5
+    post_local_md5 = analysis.md5
 
     try:
         # Post to the local file system
-        with open(path, "wb" if isinstance(content, bytes) else "w") as file:
+        with open(path, "wb") as file:
             debug_info['post_start'] = f"Starting post with content={content}"
-            result = file.write(content)
+            result = file.write(analysis.data)
 
-            # Get MD5 of written file
-            post_local_md5 = get_md5_hash_filename(path)
-            
             # If result is greater than or equal to 0, the write is considered successful
             if result >= 0:
                 return {
@@ -379,3 +474,255 @@ def _post_to_local(
             "debug": debug_info if debug else {},
         }
 
+
+def _metadata_dict(metadata) -> Dict[str, str]:
+    """@private Return `metadata` as a dict, raising `ValueError` if it cannot be converted."""
+    if metadata is None:
+        return {}
+    try:
+        return dict(metadata)
+    except Exception as exception:
+        raise ValueError(str(exception)) from exception
+
+
+def _post_stream(
+        path: str,
+        content: Union[str, io.IOBase, Iterable[bytes]],
+        md5: Optional[str],
+        metadata: Optional[Dict[str, str]],
+        debug: bool,
+        buffer_size: Optional[int] = None,
+        checksum_algorithm: Optional[str] = None) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    """
+    # Posts a file path, file object or chunk iterator without buffering it.
+
+    This is a helper function for post_file. The source is read in chunks of
+    `KFM_STREAM_CHUNK_SIZE` bytes while its MD5 hash and size are computed.
+
+    ## Args
+
+    | Name      | Type                         | Description | Default |
+    |-----------|------------------------------|-------------|---------|
+    | path      | string                       | Local path or S3 URI to write to. |   |
+    | content   | string, file or iterator     | Path of a local file, an open binary file or an iterator of byte chunks. |   |
+    | md5       | string                       | Expected MD5 hash; a mismatch fails with 409. | None |
+    | metadata  | dictionary                   | Additional metadata to include with the file. | None |
+    | debug     | boolean                      | Flag to enable/disable debugging | False |
+    | buffer_size | int                        | Upper bound on the bytes buffered in memory. | None |
+    | checksum_algorithm | string              | Additional checksum for S3 to validate and store. | None |
+
+    ## Returns
+    The same dictionary as `post_file`, with `content_size` set to the number
+    of bytes written.
+    """
+    debug_info = {}
+    try:
+        metadata = _metadata_dict(metadata)
+    except ValueError as exception:
+        logging.exception(f"Exception: {str(exception)}")
+        return {
+            "status": 400,
+            "message": f"Bad metadata - should be python dictionary: {str(exception)}" if debug else "Bad metadata - should be python dictionary.",
+            "debug": debug_info if debug else {},
+        }
+
+    try:
+        raw, owned = open_source(content)
+    except Exception as exception:
+        return {
+            "status": 400,
+            "message": f"Failed to read file at path provided in content: {str(exception)}",
+            "debug": {} if not debug else {"exception": str(exception)}
+        }
+
+    chunk_size = min(DEFAULT_CHUNK_SIZE, buffer_size) if buffer_size else None
+    reader = HashingReader(raw, chunk_size=chunk_size, close_raw=False)
+    try:
+        if path.startswith("s3://"):
+            return _post_stream_to_s3(path, raw, reader, md5, metadata, debug, buffer_size, checksum_algorithm)
+        return _post_stream_to_local(path, reader, md5, debug)
+    except Exception as exception:
+        debug_info["exception"] = str(exception)
+        logging.exception(f"Exception: {str(exception)}")
+        return {
+            "status": 500,
+            "message": f"Failed to post file: {str(exception)}" if debug else "Failed to post file.",
+            "md5": None,
+            "debug": debug_info if debug else {},
+        }
+    finally:
+        if owned:
+            raw.close()
+
+
+def _seek_position(raw) -> Optional[int]:
+    """@private Current position of a seekable file, or `None` if it cannot be rewound."""
+    try:
+        if raw.seekable():
+            return raw.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+    return None
+
+
+def _post_stream_to_s3(
+        path: str,
+        raw,
+        reader: HashingReader,
+        md5: Optional[str],
+        metadata: Dict[str, str],
+        debug: bool,
+        buffer_size: Optional[int] = None,
+        checksum_algorithm: Optional[str] = None) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    """
+    @private Upload a stream to S3 with `put_object`, or as a multipart upload
+    from `KFM_MULTIPART_THRESHOLD` bytes.
+
+    S3 needs the MD5 hash and size before the body, so a seekable source is
+    hashed in one pass and rewound, and anything else is spooled to a
+    temporary file while it is hashed. Either way at most one chunk is held in
+    memory and the upload reads the body straight from the file.
+
+    A single `put_object` gets its additional checksum from the same pass;
+    multipart uploads checksum each part as it is sent.
+    """
+    debug_info = {}
+    bucket_name, key = path[5:].split("/", 1)
+
+    start = _seek_position(raw)
+    head = reader.peek(MIME_SAMPLE_BYTES)
+    spool = None
+    calculated = new_checksum(checksum_algorithm) if checksum_algorithm else None
+    if start is None:
+        spool = tempfile.SpooledTemporaryFile(max_size=reader.chunk_size)
+        for chunk in reader:
+            spool.write(chunk)
+            if calculated is not None:
+                calculated.update(chunk)
+        spool.seek(0)
+        body = spool
+    else:
+        for chunk in reader:
+            if calculated is not None:
+                calculated.update(chunk)
+        raw.seek(start)
+        body = raw
+    checksum = None
+
+    try:
+        calculated_md5 = reader.md5
+        if md5 and md5 != calculated_md5:
+            return {
+                "status": 409,
+                "message": "Conflict - Provided MD5 does not match calculated MD5.",
+                "debug": debug_info if debug else {},
+            }
+        md5 = calculated_md5
+        content_type = get_mime_type_content(head, name=path)
+        metadata = {
+            "md5": md5,
+            "file-size-bytes": reader.size,
+            "Content-Type": content_type,
+            **metadata,
+        }
+        metadata["md5"] = md5
+
+        s3_client = get_current_manager().client_for(bucket_name)
+        try:
+            if reader.size >= MULTIPART_THRESHOLD:
+                # Parts are read from the file with pread as they are sent
+                result = upload_multipart(
+                    s3_client,
+                    bucket_name,
+                    key,
+                    body,
+                    size=reader.size,
+                    metadata=metadata,
+                    concurrency=parts_in_buffer(buffer_size, reader.size),
+                    content_type=metadata.get('Content-Type', 'binary/octet-stream'),
+                    checksum_algorithm=checksum_algorithm,
+                )
+                debug_info["parts"] = result["Parts"]
+                if checksum_algorithm:
+                    checksum = result.get(checksum_field(checksum_algorithm))
+            else:
+                checksum_args = {}
+                if calculated is not None:
+                    checksum = calculated.b64digest()
+                    checksum_args = {
+                        'ChecksumAlgorithm': checksum_algorithm,
+                        checksum_field(checksum_algorithm): checksum,
+                    }
+                s3_client.put_object(
+                    Body=body,
+                    Bucket=bucket_name,
+                    Key=key,
+                    ContentLength=reader.size,
+                    Metadata={k: str(v) for k, v in metadata.items()},
+                    ContentMD5=base64.b64encode(bytes.fromhex(md5)).decode('utf-8'),
+                    ContentType=metadata.get('Content-Type', 'binary/octet-stream'),
+                    **checksum_args,
+                )
+        except Exception as exception:
+            record_operation_outcome(bucket_name, 'PutObject', exception)
+            raise
+        record_operation_outcome(bucket_name, 'PutObject')
+    finally:
+        if spool is not None:
+            spool.close()
+
+    response = {
+        "status": 200,
+        "message": "File written successfully to S3.",
+        "md5": md5,
+        "content_size": reader.size,
+        "debug": debug_info if debug else {},
+    }
+    if checksum:
+        response["checksum"] = checksum
+    return response
+
+
+def _post_stream_to_local(
+        path: str,
+        reader: HashingReader,
+        md5: Optional[str],
+        debug: bool) -> Dict[str, Union[int, str, Dict[str, str]]]:
+    """
+    @private Write a stream to a local file in one pass.
+
+    Chunks go to a temporary file next to `path`, which replaces `path` only
+    once the whole stream has been written and its MD5 hash checked, so a
+    failed or mismatched upload never leaves a partial file behind.
+    """
+    debug_info = {}
+    partial = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(partial, "xb") as file:
+            for chunk in reader:
+                file.write(chunk)
+        if md5 and md5 != reader.md5:
+            os.unlink(partial)
+            return {
+                "status": 409,
+                "message": "Conflict - Provided MD5 does not match calculated MD5.",
+                "debug": debug_info if debug else {},
+            }
+        os.replace(partial, path)
+    except OSError as e:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        return {
+            "status": 500,
+            "message": f"Failed to post file: {e}",
+            "md5": None,
+            "debug": debug_info if debug else {},
+        }
+
+    return {
+        "status": 200,
+        "message": "File written successfully.",
+        "md5": reader.md5,
+        "content_size": reader.size,
+        "debug": debug_info if debug else {},
+    }
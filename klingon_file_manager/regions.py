@@ -0,0 +1,296 @@
+# regions.py
+"""
+# Regions Overview
+
+Bucket to region discovery for the Klingon File Manager.
+
+An S3 client is bound to one regional endpoint. A request for a bucket in
+another region is answered with a redirect, retried against the right
+endpoint and, with signature version 4, often re-signed, which adds a round
+trip or two to every call. This module remembers which region each bucket
+lives in so `FileManager.client_for()` can hand out a client bound to the
+bucket's own endpoint from the second request on.
+
+Regions are discovered with one `head_bucket` request on first contact and
+kept in memory for the life of the process. Set `KFM_REGION_CACHE_FILE` to
+also persist them to a JSON file shared by every process on the host, and
+`KFM_REGION_DISCOVERY=0` to turn discovery off. A bucket missing from memory
+is looked up in the file again whenever the file has changed, so a region
+discovered by another process is used without a request of its own.
+
+# Contents
+
+## RegionCache
+Bucket to region map with optional file persistence.
+
+## get_region_cache
+Returns the process-wide `RegionCache`.
+
+## get_bucket_region
+Returns a bucket's region, discovering it on first use.
+
+## invalidate_bucket_regions
+Drops one or all cached bucket regions.
+
+# Usage Examples
+
+To look up the region of a bucket:
+```python
+>>> get_bucket_region('my-bucket')
+'eu-west-1'
+```
+
+To forget a bucket that was recreated in another region:
+```python
+>>> invalidate_bucket_regions('my-bucket')
+```
+"""
+
+import os
+import time
+import threading
+from typing import Any, Optional
+
+from .credentials import _SharedJsonFile
+from .utils import logger, renew_lock_after_fork
+
+REGION_DISCOVERY = os.getenv('KFM_REGION_DISCOVERY', '1').lower() not in ('0', 'false', 'no')
+"""@private Whether operations look up bucket regions at all."""
+
+UNKNOWN_REGION_TTL = 300.0
+"""@private Seconds a failed lookup is remembered before it is retried."""
+
+
+class RegionCache(_SharedJsonFile):
+    """
+    # Region Cache
+
+    Maps bucket names to the AWS region that hosts them. Buckets rarely move,
+    so known regions never expire; use `invalidate()` if a bucket is
+    recreated elsewhere. Failed lookups are remembered in memory for a few
+    minutes so an unreachable bucket does not cost an extra request on every
+    operation.
+
+    ## Attributes
+
+    | Attribute | Type  | Description |
+    |-----------|-------|-------------|
+    | `path`    | `str` | Optional JSON file shared by every process on the host. |
+
+    ## Methods
+
+    | Method          | Description |
+    |-----------------|-------------|
+    | `get()`         | Returns the cached region of a bucket. |
+    | `set()`         | Stores the region of a bucket. |
+    | `discover()`    | Looks up the region of a bucket with `head_bucket`. |
+    | `invalidate()`  | Drops one or all cached regions. |
+
+    ## Usage Example
+    ```python
+    >>> cache = RegionCache(path='/var/tmp/kfm-regions.json')
+    >>> cache.set('my-bucket', 'eu-west-1')
+    >>> cache.get('my-bucket')
+    'eu-west-1'
+    ```
+    """
+
+    _file_label = 'regions'
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        renew_lock_after_fork(self)
+        self._regions = {}
+        self._unknown = {}
+        self._file_stamp = None
+
+    def _load(self) -> None:
+        """
+        @private Merge the shared cache file into memory if it changed since
+        it was last read. Callers hold `_lock`.
+        """
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        # The file is replaced rather than rewritten, so a new inode also
+        # catches writes within the resolution of the modification time
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._file_stamp:
+            return
+        self._file_stamp = stamp
+        with self._file_lock():
+            entries = self._read_file()
+        for bucket_name, region in entries.items():
+            if isinstance(region, str):
+                self._regions.setdefault(bucket_name, region)
+
+    def get(self, bucket_name: str) -> Optional[str]:
+        """
+        # Get
+
+        Returns the cached region of `bucket_name`, or `None` when it is not
+        known.
+
+        ## Arguments
+
+        | Name        | Type | Description | Default |
+        |-------------|------|-------------|---------|
+        | bucket_name | str  | Name of the bucket. |   |
+        """
+        with self._lock:
+            region = self._regions.get(bucket_name)
+            if region is None:
+                self._load()
+                region = self._regions.get(bucket_name)
+            return region
+
+    def set(self, bucket_name: str, region: str) -> None:
+        """
+        # Set
+
+        Stores the region of `bucket_name` and, when `path` is set, writes it
+        to the shared cache file.
+
+        ## Arguments
+
+        | Name        | Type | Description | Default |
+        |-------------|------|-------------|---------|
+        | bucket_name | str  | Name of the bucket. |   |
+        | region      | str  | AWS region hosting the bucket. |   |
+        """
+        with self._lock:
+            self._unknown.pop(bucket_name, None)
+            if self._regions.get(bucket_name) == region:
+                return
+            self._regions[bucket_name] = region
+            if self.path:
+                with self._file_lock():
+                    entries = self._read_file()
+                    entries[bucket_name] = region
+                    self._write_file(entries)
+
+    def discover(self, bucket_name: str, s3_client: Any) -> Optional[str]:
+        """
+        # Discover
+
+        Returns the region of `bucket_name`, sending one `head_bucket`
+        request through `s3_client` when it is not cached. S3 reports the
+        region in the `x-amz-bucket-region` header even when the request
+        itself is redirected or denied. Returns `None` when the region cannot
+        be determined.
+
+        ## Arguments
+
+        | Name        | Type         | Description | Default |
+        |-------------|--------------|-------------|---------|
+        | bucket_name | str          | Name of the bucket. |   |
+        | s3_client   | boto3.client | Client used for the lookup. |   |
+        """
+        region = self.get(bucket_name)
+        if region is not None:
+            return region
+        with self._lock:
+            if self._unknown.get(bucket_name, 0) > time.monotonic():
+                return None
+
+        try:
+            response = s3_client.head_bucket(Bucket=bucket_name)
+        except Exception as exception:
+            response = getattr(exception, 'response', None)
+            if not isinstance(response, dict):
+                logger.debug(f"Region lookup for {bucket_name} failed: {exception}")
+                response = {}
+        headers = (response.get('ResponseMetadata') or {}).get('HTTPHeaders') or {}
+        region = headers.get('x-amz-bucket-region')
+
+        if isinstance(region, str) and region:
+            self.set(bucket_name, region)
+            return region
+        with self._lock:
+            self._unknown[bucket_name] = time.monotonic() + UNKNOWN_REGION_TTL
+        return None
+
+    def invalidate(self, bucket_name: Optional[str] = None) -> None:
+        """
+        # Invalidate
+
+        Drops the cached region of `bucket_name`, or every region when no
+        bucket is given, both in memory and in the shared cache file.
+
+        ## Arguments
+
+        | Name        | Type | Description | Default |
+        |-------------|------|-------------|---------|
+        | bucket_name | str  | Name of the bucket to drop. | None |
+        """
+        with self._lock:
+            if bucket_name is None:
+                self._regions.clear()
+                self._unknown.clear()
+            else:
+                self._regions.pop(bucket_name, None)
+                self._unknown.pop(bucket_name, None)
+            if self.path and os.path.exists(self.path):
+                with self._file_lock():
+                    entries = {} if bucket_name is None else self._read_file()
+                    entries.pop(bucket_name, None)
+                    self._write_file(entries)
+
+
+_region_cache = RegionCache(path=os.getenv('KFM_REGION_CACHE_FILE') or None)
+"""@private Process-wide bucket region cache."""
+
+
+def get_region_cache() -> RegionCache:
+    """
+    # Get Region Cache
+
+    Returns the process-wide `RegionCache`. It is persisted to
+    `KFM_REGION_CACHE_FILE` when that variable is set.
+    """
+    return _region_cache
+
+
+def get_bucket_region(bucket_name: str, s3_client: Any = None) -> Optional[str]:
+    """
+    # Get Bucket Region
+
+    Returns the region of `bucket_name`, discovering it on first use.
+    Returns `None` when discovery is disabled with `KFM_REGION_DISCOVERY=0`
+    or the region cannot be determined.
+
+    ## Arguments
+
+    | Name        | Type         | Description | Default |
+    |-------------|--------------|-------------|---------|
+    | bucket_name | str          | Name of the bucket. |   |
+    | s3_client   | boto3.client | Client used for the lookup, otherwise the shared client. | None |
+    """
+    if not REGION_DISCOVERY:
+        return None
+    region = _region_cache.get(bucket_name)
+    if region is not None:
+        return region
+    if s3_client is None:
+        from .utils import get_s3_client
+        s3_client = get_s3_client()
+    return _region_cache.discover(bucket_name, s3_client)
+
+
+def invalidate_bucket_regions(bucket_name: Optional[str] = None) -> None:
+    """
+    # Invalidate Bucket Regions
+
+    Drops the cached region of `bucket_name`, or of every bucket.
+
+    ## Arguments
+
+    | Name        | Type | Description | Default |
+    |-------------|------|-------------|---------|
+    | bucket_name | str  | Name of the bucket to drop. | None |
+    """
+    _region_cache.invalidate(bucket_name)
@@ -0,0 +1,760 @@
+# session.py
+"""
+# Session Overview
+
+Pooled, reusable S3 clients for the Klingon File Manager.
+
+Building a `boto3` client or resource costs endpoint resolution, credential
+lookup and, on the first request, a fresh TLS handshake. `FileManager` owns
+one configured S3 client (and resource) with a tunable connection pool and
+TCP keep-alive, so every operation routed through it reuses warm
+connections.
+
+The module level functions (`get_file`, `post_file`, `delete_file`,
+`move_file`, `manage_file` and the `utils` S3 helpers) use the *current*
+manager: the one activated with `FileManager.activate()` or, when none is
+active, a lazily created default instance.
+
+Managers are safe to share between threads and across `fork()`. boto3
+resources are not thread-safe, so each thread gets its own resource (and, with
+`thread_local_clients=True`, its own client). A manager inherited by a forked
+child process notices the PID change and rebuilds its connection pools
+instead of reusing sockets shared with the parent.
+
+Operations can also run with per-call `credentials` or a named `profile`.
+Managers for those identities live in a bounded LRU cache, so a multi-tenant
+service reuses each tenant's warm connections instead of building a new
+session per request. Idle tenants are evicted and their pools closed.
+
+# Contents
+
+## FileManager
+Session object that holds the S3 client and exposes the file operations.
+
+## get_current_manager
+Returns the active manager, falling back to the default instance.
+
+## get_default_manager
+Returns the process-wide default manager, creating it on first use.
+
+## set_default_manager
+Replaces the process-wide default manager.
+
+## reset_default_manager
+Closes and drops the process-wide default manager.
+
+## get_tenant_manager
+Returns the cached manager for a set of credentials or a profile.
+
+## use_credentials
+Context manager that routes operations through a tenant's manager.
+
+## clear_tenant_managers
+Closes and drops every cached tenant manager.
+
+# Usage Examples
+
+To use a dedicated manager with a larger connection pool:
+```python
+>>> manager = FileManager(max_pool_connections=100)
+>>> manager.get_file('s3://bucket/file')['status']
+200
+```
+
+To open connections to a bucket before the first request:
+```python
+>>> manager = FileManager(prewarm=['bucket'])
+```
+
+To fan operations out across threads or a forking `multiprocessing` pool:
+```python
+>>> from concurrent.futures import ThreadPoolExecutor
+>>> with ThreadPoolExecutor(16) as pool:
+...     results = list(pool.map(lambda path: manage_file('get', path), paths))
+```
+
+To serve a request with a tenant's own credentials:
+```python
+>>> get_file('s3://tenant-bucket/file', credentials={
+...     'aws_access_key_id': 'AKIA...',
+...     'aws_secret_access_key': '...',
+... })
+>>> get_file('s3://other-bucket/file', profile='tenant-b')
+```
+
+To route the module level functions through a manager:
+```python
+>>> with FileManager(max_pool_connections=20).activate():
+...     manage_file('get', 's3://bucket/file')
+```
+"""
+
+import os
+import time
+import hashlib
+import weakref
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .utils import logger
+
+DEFAULT_MAX_POOL_CONNECTIONS = int(os.getenv('KFM_MAX_POOL_CONNECTIONS', '50'))
+"""@private Default size of the S3 connection pool."""
+
+DEFAULT_TENANT_CACHE_SIZE = int(os.getenv('KFM_TENANT_CACHE_SIZE', '32'))
+"""@private Maximum number of cached tenant managers."""
+
+DEFAULT_TENANT_IDLE_SECONDS = float(os.getenv('KFM_TENANT_IDLE_SECONDS', '600'))
+"""@private Seconds a tenant manager may sit unused before it is evicted."""
+
+_current_manager = contextvars.ContextVar('klingon_file_manager_current_manager', default=None)
+"""@private Manager activated with `FileManager.activate()` in this context."""
+
+
+class FileManager:
+    """
+    # File Manager
+
+    Session object that owns one configured S3 client and resource and routes
+    file operations through them. Clients are created on first S3 use, so a
+    manager that only touches local paths never imports boto3.
+
+    ## Attributes
+
+    | Attribute              | Type    | Description |
+    |------------------------|---------|-------------|
+    | `max_pool_connections` | `int`   | Maximum number of pooled HTTP connections (`KFM_MAX_POOL_CONNECTIONS`, default 50). |
+    | `tcp_keepalive`        | `bool`  | Enable TCP keep-alive on pooled connections. |
+    | `connect_timeout`      | `float` | Connection timeout in seconds, `None` uses the botocore default. |
+    | `read_timeout`         | `float` | Read timeout in seconds, `None` uses the botocore default. |
+    | `max_attempts`         | `int`   | Total attempts per request, `None` uses the botocore default. |
+    | `region_name`          | `str`   | Region for the client, `None` uses the environment. |
+    | `aws_access_key_id`    | `str`   | Explicit access key, `None` uses the default credential chain. |
+    | `aws_secret_access_key`| `str`   | Secret key paired with `aws_access_key_id`. |
+    | `aws_session_token`    | `str`   | Session token for temporary credentials. |
+    | `profile_name`         | `str`   | Named profile from the shared AWS config. |
+    | `thread_local_clients` | `bool`  | Give each thread its own client instead of sharing one. Resources are always per thread. |
+
+    ## Methods
+
+    | Method             | Description |
+    |--------------------|-------------|
+    | `s3_client`        | The pooled S3 client, created on first access. |
+    | `s3_resource`      | The calling thread's S3 resource, created on first access. |
+    | `client_for()`     | The pooled S3 client for a bucket's own region. |
+    | `resource_for()`   | The calling thread's S3 resource for a bucket's own region. |
+    | `prewarm()`        | Opens pooled connections to the given buckets. |
+    | `activate()`       | Routes module level functions through this manager. |
+    | `get_file()`       | Same as `get.get_file` using this manager. |
+    | `post_file()`      | Same as `post.post_file` using this manager. |
+    | `delete_file()`    | Same as `delete.delete_file` using this manager. |
+    | `move_file()`      | Same as `manage.move_file` using this manager. |
+    | `manage_file()`    | Same as `manage.manage_file` using this manager. |
+    | `close()`          | Closes the pooled connections. |
+
+    ## Usage Example
+    ```python
+    >>> with FileManager(max_pool_connections=64, prewarm=['bucket']) as manager:
+    ...     manager.post_file('s3://bucket/file.txt', 'Hello, world!')
+    ...     manager.get_file('s3://bucket/file.txt')
+    ```
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: Optional[int] = None,
+        tcp_keepalive: bool = True,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        region_name: Optional[str] = None,
+        prewarm: Optional[Iterable[str]] = None,
+        thread_local_clients: bool = False,
+        aws_access_key_id: Optional[str] = None,
+        aws_secret_access_key: Optional[str] = None,
+        aws_session_token: Optional[str] = None,
+        profile_name: Optional[str] = None,
+    ):
+        self.max_pool_connections = max_pool_connections or DEFAULT_MAX_POOL_CONNECTIONS
+        self.tcp_keepalive = tcp_keepalive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.region_name = region_name
+        self.thread_local_clients = thread_local_clients
+        self.aws_access_key_id = aws_access_key_id
+        self.aws_secret_access_key = aws_secret_access_key
+        self.aws_session_token = aws_session_token
+        self.profile_name = profile_name
+        self._reset_state()
+        _managers.add(self)
+        if prewarm:
+            self.prewarm(prewarm, wait=False)
+
+    def _reset_state(self) -> None:
+        """
+        @private Drop every client without closing it.
+
+        Used on construction and in a forked child, where the inherited
+        connections belong to the parent process and must not be reused or
+        shut down.
+        """
+        self._pid = os.getpid()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._s3_client = None
+        self._regional_clients = {}
+        self._boto_session = None
+        self._created = []
+
+    @property
+    def identity(self) -> Optional[str]:
+        """
+        # Identity
+
+        Key naming the credentials this manager uses: the access key ID, the
+        profile as `profile:<name>`, or `None` for the default chain.
+        """
+        if self.aws_access_key_id:
+            return self.aws_access_key_id
+        if self.profile_name:
+            return f"profile:{self.profile_name}"
+        return None
+
+    def _check_fork(self) -> None:
+        """@private Rebuild the pools if this manager was inherited through fork()."""
+        if self._pid != os.getpid():
+            logger.debug("Process forked, rebuilding S3 connection pools")
+            self._reset_state()
+
+    def _build(self, kind: str, region_name: Optional[str] = None) -> Any:
+        """@private Create an S3 client or resource. Callers hold `_lock`."""
+        import boto3
+
+        logger.debug(f"Creating pooled S3 {kind} for {region_name or 'the default region'}")
+        source = boto3
+        if self.identity is not None:
+            # Explicit credentials need their own session; the module level
+            # factories always use the default credential chain.
+            if self._boto_session is None:
+                self._boto_session = boto3.session.Session(
+                    aws_access_key_id=self.aws_access_key_id,
+                    aws_secret_access_key=self.aws_secret_access_key,
+                    aws_session_token=self.aws_session_token,
+                    profile_name=self.profile_name,
+                )
+            source = self._boto_session
+        factory = source.client if kind == 'client' else source.resource
+        built = factory('s3', **self._client_kwargs(region_name))
+        self._created.append(built)
+        return built
+
+    def _config(self) -> Any:
+        """@private Build the botocore configuration for the S3 client."""
+        from botocore.config import Config
+
+        options = {
+            'max_pool_connections': self.max_pool_connections,
+            'tcp_keepalive': self.tcp_keepalive,
+        }
+        if self.connect_timeout is not None:
+            options['connect_timeout'] = self.connect_timeout
+        if self.read_timeout is not None:
+            options['read_timeout'] = self.read_timeout
+        if self.max_attempts is not None:
+            options['retries'] = {'max_attempts': self.max_attempts, 'mode': 'standard'}
+        return Config(**options)
+
+    def _client_kwargs(self, region_name: Optional[str] = None) -> Dict[str, Any]:
+        """@private Keyword arguments shared by the client and the resource."""
+        kwargs = {'config': self._config()}
+        region_name = region_name or self.region_name
+        if region_name:
+            kwargs['region_name'] = region_name
+        return kwargs
+
+    @property
+    def s3_client(self) -> Any:
+        """
+        # S3 Client
+
+        The pooled S3 client, created on first access and reused by every
+        operation routed through this manager. boto3 clients are thread-safe,
+        so one is shared by all threads unless `thread_local_clients` is set.
+        """
+        self._check_fork()
+        if self.thread_local_clients:
+            client = getattr(self._local, 's3_client', None)
+            if client is None:
+                with self._lock:
+                    client = self._local.s3_client = self._build('client')
+            return client
+        if self._s3_client is None:
+            with self._lock:
+                if self._s3_client is None:
+                    self._s3_client = self._build('client')
+        return self._s3_client
+
+    @property
+    def s3_resource(self) -> Any:
+        """
+        # S3 Resource
+
+        The calling thread's S3 resource, created on first access. boto3
+        resources are not thread-safe, so every thread gets its own.
+        """
+        self._check_fork()
+        resource = getattr(self._local, 's3_resource', None)
+        if resource is None:
+            with self._lock:
+                resource = self._local.s3_resource = self._build('resource')
+        return resource
+
+    def _region_for(self, bucket_name: str) -> Optional[str]:
+        """@private The bucket's region when it differs from the default client's."""
+        from .regions import get_bucket_region
+
+        region = get_bucket_region(bucket_name, self.s3_client)
+        if region is None:
+            return None
+        default = self.region_name or getattr(self.s3_client.meta, 'region_name', None)
+        return None if region == default else region
+
+    def client_for(self, bucket_name: str) -> Any:
+        """
+        # Client For
+
+        Returns a pooled S3 client bound to the regional endpoint of
+        `bucket_name`, so requests are not redirected from the default
+        region. The bucket's region is discovered on first use (see
+        `klingon_file_manager.regions`); until it is known the default client
+        is returned.
+
+        ## Arguments
+
+        | Name        | Type | Description | Default |
+        |-------------|------|-------------|---------|
+        | bucket_name | str  | Bucket the client will be used for. |   |
+        """
+        region = self._region_for(bucket_name)
+        if region is None:
+            return self.s3_client
+        clients = self._regional_clients
+        if self.thread_local_clients:
+            clients = self._local.__dict__.setdefault('regional_clients', {})
+        client = clients.get(region)
+        if client is None:
+            with self._lock:
+                client = clients.get(region)
+                if client is None:
+                    client = clients[region] = self._build('client', region)
+        return client
+
+    def resource_for(self, bucket_name: str) -> Any:
+        """
+        # Resource For
+
+        Returns the calling thread's S3 resource bound to the regional
+        endpoint of `bucket_name`. See `client_for()`.
+
+        ## Arguments
+
+        | Name        | Type | Description | Default |
+        |-------------|------|-------------|---------|
+        | bucket_name | str  | Bucket the resource will be used for. |   |
+        """
+        region = self._region_for(bucket_name)
+        if region is None:
+            return self.s3_resource
+        resources = self._local.__dict__.setdefault('regional_resources', {})
+        resource = resources.get(region)
+        if resource is None:
+            with self._lock:
+                resource = resources[region] = self._build('resource', region)
+        return resource
+
+    def prewarm(self, buckets: Iterable[str], connections: int = 1, wait: bool = True) -> None:
+        """
+        # Prewarm
+
+        Opens pooled connections ahead of the first real request by sending
+        `connections` concurrent `head_bucket` requests to each bucket. Errors
+        are logged and otherwise ignored.
+
+        ## Arguments
+
+        | Name        | Type          | Description | Default |
+        |-------------|---------------|-------------|---------|
+        | buckets     | Iterable[str] | Buckets to open connections to. |   |
+        | connections | int           | Connections to open per bucket. | 1 |
+        | wait        | bool          | Block until the connections are open. | True |
+        """
+        targets = [bucket for bucket in buckets for _ in range(max(1, connections))]
+        if not targets:
+            return
+
+        def warm(bucket: str) -> None:
+            try:
+                self.s3_client.head_bucket(Bucket=bucket)
+            except Exception as exception:
+                logger.debug(f"Prewarming connection to {bucket} failed: {exception}")
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(targets), self.max_pool_connections),
+            thread_name_prefix='kfm-prewarm',
+        )
+        for bucket in targets:
+            executor.submit(warm, bucket)
+        executor.shutdown(wait=wait)
+
+    @contextmanager
+    def activate(self):
+        """
+        # Activate
+
+        Context manager that routes the module level functions through this
+        manager for the duration of the block.
+        """
+        token = _current_manager.set(self)
+        try:
+            yield self
+        finally:
+            _current_manager.reset(token)
+
+    def get_file(self, path: str, debug: bool = False, **kwargs) -> Dict[str, Any]:
+        """Same as `klingon_file_manager.get.get_file` using this manager."""
+        from .get import get_file
+        with self.activate():
+            return get_file(path, debug, **kwargs)
+
+    def post_file(self, path: str, content: Any, md5: Optional[str] = None, metadata: Optional[dict] = None, debug: bool = False, **kwargs) -> Dict[str, Any]:
+        """Same as `klingon_file_manager.post.post_file` using this manager."""
+        from .post import post_file
+        with self.activate():
+            return post_file(path, content, md5=md5, metadata=metadata, debug=debug, **kwargs)
+
+    def delete_file(self, path: str, debug: bool = False, **kwargs) -> Dict[str, Any]:
+        """Same as `klingon_file_manager.delete.delete_file` using this manager."""
+        from .delete import delete_file
+        with self.activate():
+            return delete_file(path, debug, **kwargs)
+
+    def move_file(self, src_path: str, dst_path: str, debug: bool = False, **kwargs) -> Dict[str, Any]:
+        """Same as `klingon_file_manager.manage.move_file` using this manager."""
+        from .manage import move_file
+        with self.activate():
+            return move_file(src_path, dst_path, debug, **kwargs)
+
+    def manage_file(self, action: str, path: str, *args, **kwargs) -> Dict[str, Any]:
+        """Same as `klingon_file_manager.manage.manage_file` using this manager."""
+        from .manage import manage_file
+        with self.activate():
+            return manage_file(action, path, *args, **kwargs)
+
+    def close(self) -> None:
+        """
+        # Close
+
+        Closes the pooled connections of every thread. The clients are
+        rebuilt on next use. In a forked child the inherited connections are
+        dropped without being closed.
+        """
+        if self._pid != os.getpid():
+            self._reset_state()
+            return
+        with self._lock:
+            created = list(self._created)
+            if self._s3_client is not None and self._s3_client not in created:
+                created.append(self._s3_client)
+            self._reset_state()
+        for built in created:
+            # Resources close through their underlying client.
+            client = built.meta.client if hasattr(built, 'meta') and not hasattr(built, 'close') else built
+            close = getattr(client, 'close', None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as exception:
+                    logger.debug(f"Closing S3 client failed: {exception}")
+
+    def __enter__(self) -> 'FileManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_managers = weakref.WeakSet()
+"""@private Every live manager, so a forked child can reset them all."""
+
+
+def _after_fork_in_child() -> None:
+    """@private Drop the connection pools and locks inherited from the parent process."""
+    global _tenant_lock, _default_manager_lock
+    _tenant_lock = threading.Lock()
+    _default_manager_lock = threading.Lock()
+    for manager in list(_managers):
+        manager._reset_state()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+_default_manager = None
+"""@private Process-wide manager used when none is active."""
+
+_default_manager_lock = threading.Lock()
+
+
+def get_default_manager() -> FileManager:
+    """
+    # Get Default Manager
+
+    Returns the process-wide `FileManager`, creating it on first use.
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = FileManager()
+    return _default_manager
+
+
+def set_default_manager(manager: FileManager) -> None:
+    """
+    # Set Default Manager
+
+    Replaces the process-wide `FileManager` used by the module level
+    functions.
+
+    ## Arguments
+
+    | Name      | Type        | Description | Default |
+    |-----------|-------------|-------------|---------|
+    | manager   | FileManager | The manager to use by default. |   |
+    """
+    global _default_manager
+    with _default_manager_lock:
+        _default_manager = manager
+
+
+def reset_default_manager() -> None:
+    """
+    # Reset Default Manager
+
+    Closes and drops the process-wide `FileManager`. A new one is created on
+    next use.
+    """
+    global _default_manager
+    with _default_manager_lock:
+        manager, _default_manager = _default_manager, None
+    if manager is not None:
+        manager.close()
+
+
+def get_current_manager() -> FileManager:
+    """
+    # Get Current Manager
+
+    Returns the manager activated with `FileManager.activate()` in the current
+    context, or the default manager when none is active.
+    """
+    return _current_manager.get() or get_default_manager()
+
+
+
+class _TenantEntry:
+    """@private A cached tenant manager and its usage bookkeeping."""
+
+    __slots__ = ('manager', 'last_used', 'active', 'evicted')
+
+    def __init__(self, manager: FileManager):
+        self.manager = manager
+        self.last_used = time.monotonic()
+        self.active = 0
+        self.evicted = False
+
+
+_tenants = OrderedDict()
+"""@private Tenant managers keyed by credential identity, least recent first."""
+
+_tenant_lock = threading.Lock()
+
+_CREDENTIAL_ALIASES = {
+    'aws_access_key_id': 'aws_access_key_id',
+    'access_key': 'aws_access_key_id',
+    'aws_secret_access_key': 'aws_secret_access_key',
+    'secret_key': 'aws_secret_access_key',
+    'aws_session_token': 'aws_session_token',
+    'session_token': 'aws_session_token',
+    'region_name': 'region_name',
+    'region': 'region_name',
+}
+"""@private Accepted credential keys and the FileManager argument they map to."""
+
+
+def _normalize_credentials(credentials: Optional[Dict[str, str]], profile: Optional[str]) -> Dict[str, str]:
+    """@private Map a credentials dict and profile onto FileManager arguments."""
+    options = {}
+    for key, value in (credentials or {}).items():
+        if key not in _CREDENTIAL_ALIASES:
+            raise ValueError(f"Unknown credential field: {key}")
+        if value:
+            options[_CREDENTIAL_ALIASES[key]] = value
+    if profile:
+        options['profile_name'] = profile
+    if 'aws_access_key_id' in options and 'aws_secret_access_key' not in options:
+        raise ValueError("aws_secret_access_key is required with aws_access_key_id")
+    return options
+
+
+def _tenant_key(options: Dict[str, str]) -> Tuple:
+    """@private Cache key for a tenant. Secrets are stored only as digests."""
+    def digest(value: Optional[str]) -> Optional[str]:
+        return hashlib.sha256(value.encode()).hexdigest() if value else None
+
+    return (
+        options.get('aws_access_key_id'),
+        digest(options.get('aws_secret_access_key')),
+        digest(options.get('aws_session_token')),
+        options.get('profile_name'),
+        options.get('region_name'),
+    )
+
+
+def _evict_idle(now: float, max_size: int, idle_seconds: float) -> list:
+    """@private Drop idle and surplus tenants. Callers hold `_tenant_lock`."""
+    evicted = []
+    for key, entry in list(_tenants.items()):
+        surplus = len(_tenants) > max_size
+        idle = not entry.active and now - entry.last_used >= idle_seconds
+        if not surplus and not idle:
+            continue
+        # A busy manager leaves the cache now and is closed once released
+        del _tenants[key]
+        entry.evicted = True
+        if not entry.active:
+            evicted.append(entry.manager)
+    return evicted
+
+
+def _close_all(managers: Iterable[FileManager]) -> None:
+    """@private Close evicted managers outside the cache lock."""
+    for manager in managers:
+        logger.debug(f"Evicting tenant manager {manager.identity}")
+        manager.close()
+
+
+def _acquire_tenant(options: Dict[str, str]) -> _TenantEntry:
+    """@private Return the cached entry for `options` and mark it in use."""
+    key = _tenant_key(options)
+    now = time.monotonic()
+    with _tenant_lock:
+        entry = _tenants.get(key)
+        if entry is None:
+            entry = _tenants[key] = _TenantEntry(FileManager(**options))
+        _tenants.move_to_end(key)
+        entry.last_used = now
+        entry.active += 1
+        evicted = _evict_idle(now, DEFAULT_TENANT_CACHE_SIZE, DEFAULT_TENANT_IDLE_SECONDS)
+    _close_all(evicted)
+    return entry
+
+
+def _release_tenant(entry: _TenantEntry) -> None:
+    """@private Mark a tenant entry as no longer in use."""
+    with _tenant_lock:
+        entry.active -= 1
+        entry.last_used = time.monotonic()
+        close = entry.evicted and not entry.active
+    if close:
+        _close_all([entry.manager])
+
+
+def get_tenant_manager(
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+) -> FileManager:
+    """
+    # Get Tenant Manager
+
+    Returns the cached `FileManager` for a set of credentials or a named
+    profile, creating it on first use. Without either, the current manager is
+    returned.
+
+    The cache holds at most `KFM_TENANT_CACHE_SIZE` managers (default 32) and
+    evicts those unused for `KFM_TENANT_IDLE_SECONDS` (default 600). Prefer
+    `use_credentials()` for scoped work, since it keeps a busy manager from
+    being closed while requests are in flight.
+
+    ## Arguments
+
+    | Name        | Type | Description | Default |
+    |-------------|------|-------------|---------|
+    | credentials | dict | `aws_access_key_id`, `aws_secret_access_key` and optionally `aws_session_token` and `region_name`. The `access_key`, `secret_key`, `session_token` and `region` spellings are also accepted. | None |
+    | profile     | str  | Named profile from the shared AWS config. | None |
+
+    ## Raises
+
+    `ValueError` if `credentials` has unknown fields or an access key without
+    its secret.
+    """
+    options = _normalize_credentials(credentials, profile)
+    if not options:
+        return get_current_manager()
+    entry = _acquire_tenant(options)
+    _release_tenant(entry)
+    return entry.manager
+
+
+@contextmanager
+def use_credentials(
+    credentials: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+):
+    """
+    # Use Credentials
+
+    Context manager that routes the module level functions through the cached
+    manager for `credentials` or `profile`. Without either, the current
+    manager stays active. The arguments match `get_tenant_manager()`.
+
+    ## Usage Example
+    ```python
+    >>> with use_credentials(profile='tenant-b'):
+    ...     manage_file('get', 's3://bucket/file')
+    ```
+    """
+    options = _normalize_credentials(credentials, profile)
+    if not options:
+        yield get_current_manager()
+        return
+    entry = _acquire_tenant(options)
+    try:
+        with entry.manager.activate() as manager:
+            yield manager
+    finally:
+        _release_tenant(entry)
+
+
+def clear_tenant_managers() -> None:
+    """
+    # Clear Tenant Managers
+
+    Closes and drops every cached tenant manager. Managers still in use are
+    closed when their last operation finishes.
+    """
+    with _tenant_lock:
+        entries = list(_tenants.values())
+        _tenants.clear()
+        idle = []
+        for entry in entries:
+            entry.evicted = True
+            if not entry.active:
+                idle.append(entry.manager)
+    _close_all(idle)
@@ -0,0 +1,349 @@
+# streams.py
+"""
+# Streams Overview
+
+Streaming readers for the Klingon File Manager.
+
+`get_file(path, stream=True)` returns a `HashingReader` instead of the full
+content. It wraps a local file or an S3 `StreamingBody`, hands out the data in
+chunks and computes the MD5 hash and size as the chunks flow through, so
+memory stays bounded by the chunk size and the first byte is available as
+soon as it arrives.
+
+`post_file` accepts the same kind of sources: a path, an open binary file
+or an iterator of byte chunks is uploaded chunk by chunk with the MD5 hash,
+size and MIME type worked out on the way.
+
+# Contents
+
+## HashingReader
+Readable file object that hashes what it reads.
+
+## ChunkReader
+Readable file object over an iterator of byte chunks.
+
+## RangeReader
+Readable file object over a byte range of a local file.
+
+## is_stream
+Whether content is a file object or chunk iterator rather than data.
+
+## open_source
+Opens a path, file object or chunk iterator for reading.
+
+# Usage Examples
+
+To copy a large S3 object to disk without holding it in memory:
+```python
+>>> result = get_file('s3://bucket/large.bin', stream=True)
+>>> with result['content'] as reader, open('large.bin', 'wb') as file:
+...     for chunk in reader:
+...         file.write(chunk)
+>>> reader.md5 == result['md5']
+True
+```
+"""
+
+import io
+import os
+import hashlib
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+
+from .utils import _looks_binary
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('KFM_STREAM_CHUNK_SIZE', str(1024 * 1024)))
+"""@private Default number of bytes per streamed chunk."""
+
+
+class HashingReader(io.RawIOBase):
+    """
+    # Hashing Reader
+
+    Read-only file object over a local file or an S3 `StreamingBody` that
+    computes the MD5 hash and size of the data incrementally. It can be read
+    like any binary file or iterated for chunks of `chunk_size` bytes.
+
+    `md5` is only available once the stream has been read to the end; use
+    `verify()` to compare it with the hash stored alongside the object.
+
+    ## Attributes
+
+    | Attribute      | Type  | Description |
+    |----------------|-------|-------------|
+    | `chunk_size`   | `int` | Bytes per chunk when iterating (`KFM_STREAM_CHUNK_SIZE`, default 1 MiB). |
+    | `content_size` | `int` | Expected total size in bytes, `None` if unknown. |
+    | `expected_md5` | `str` | MD5 hash recorded for the object, `None` if unknown. |
+    | `size`         | `int` | Bytes read so far. |
+    | `close_raw`    | `bool`| Close the wrapped file when the reader is closed. |
+
+    ## Methods
+
+    | Method      | Description |
+    |-------------|-------------|
+    | `read()`    | Reads up to `size` bytes, or everything when `size` is -1. |
+    | `peek()`    | Returns the next bytes without consuming them. |
+    | `md5`       | Hex MD5 of the whole stream once it is exhausted, otherwise `None`. |
+    | `verify()`  | Compares `md5` with `expected_md5`. |
+    | `close()`   | Closes the underlying file or body. |
+
+    ## Usage Example
+    ```python
+    >>> with HashingReader(open('file.bin', 'rb')) as reader:
+    ...     data = reader.read()
+    >>> reader.md5
+    '6cd3556deb0da54bca060b4c39479839'
+    ```
+    """
+
+    def __init__(
+        self,
+        raw: Any,
+        chunk_size: Optional[int] = None,
+        content_size: Optional[int] = None,
+        expected_md5: Optional[str] = None,
+        close_raw: bool = True,
+    ):
+        super().__init__()
+        self._raw = raw
+        self.close_raw = close_raw
+        self.chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        self.content_size = content_size
+        self.expected_md5 = expected_md5
+        self.size = 0
+        self._hash = hashlib.md5()
+        self._buffer = b''
+        self._eof = False
+
+    def _fill(self, size: int) -> bytes:
+        """@private Read up to `size` bytes from the source, hashing them."""
+        if self._eof:
+            return b''
+        data = self._raw.read(size)
+        if not data:
+            self._eof = True
+            return b''
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._hash.update(data)
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def peek(self, size: int = 1) -> bytes:
+        """
+        # Peek
+
+        Returns up to `size` upcoming bytes without consuming them. Fewer
+        bytes are returned only at the end of the stream.
+        """
+        while len(self._buffer) < size:
+            data = self._fill(size - len(self._buffer))
+            if not data:
+                break
+            self._buffer += data
+        return self._buffer[:size]
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        # Read
+
+        Reads up to `size` bytes, or the rest of the stream when `size` is
+        negative.
+        """
+        if size is None or size < 0:
+            parts = [self._buffer]
+            self._buffer = b''
+            while True:
+                data = self._fill(self.chunk_size)
+                if not data:
+                    break
+                parts.append(data)
+            data = b''.join(parts)
+        elif self._buffer:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        else:
+            data = self._fill(size)
+        self.size += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        data = self.read(self.chunk_size)
+        if not data:
+            raise StopIteration
+        return data
+
+    @property
+    def md5(self) -> Optional[str]:
+        """Hex MD5 of the whole stream, or `None` until it has been read to the end."""
+        if not self._eof or self._buffer:
+            return None
+        return self._hash.hexdigest()
+
+    def verify(self) -> Optional[bool]:
+        """
+        # Verify
+
+        Returns `True` when the stream has been read to the end and its MD5
+        matches `expected_md5`, `False` when it does not and `None` when there
+        is nothing to compare yet.
+        """
+        md5 = self.md5
+        if md5 is None or self.expected_md5 is None:
+            return None
+        return md5 == self.expected_md5
+
+    def close(self) -> None:
+        if not self.closed and self.close_raw:
+            close = getattr(self._raw, 'close', None)
+            if callable(close):
+                close()
+        super().close()
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    # Chunk Reader
+
+    Read-only file object over an iterator of byte chunks, such as a
+    generator producing data on the fly. `str` chunks are encoded as UTF-8.
+    Only the chunk being consumed is held in memory.
+
+    ## Usage Example
+    ```python
+    >>> reader = ChunkReader(iter([b'Hello, ', b'world!']))
+    >>> reader.read()
+    b'Hello, world!'
+    ```
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not len(self._pending):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            self._pending = memoryview(chunk).cast('B')
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            close = getattr(self._chunks, 'close', None)
+            if callable(close):
+                close()
+        super().close()
+
+
+class RangeReader(io.RawIOBase):
+    """
+    # Range Reader
+
+    Read-only file object over `length` bytes of a local file starting at
+    `offset`. Reads use `os.pread`, so the file position is never moved and
+    several readers can share one descriptor. The file is closed with the
+    reader.
+
+    ## Usage Example
+    ```python
+    >>> reader = RangeReader(open('file.bin', 'rb'), offset=1024, length=16)
+    >>> len(reader.read())
+    16
+    ```
+    """
+
+    def __init__(self, file: Any, offset: int, length: int):
+        super().__init__()
+        self._file = file
+        self._position = offset
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = os.pread(self._file.fileno(), size, self._position)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        self._remaining = self._remaining - len(data) if data else 0
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def is_stream(content: Any) -> bool:
+    """
+    # Is Stream
+
+    Returns `True` when `content` is an open file object or an iterator of
+    chunks rather than `str` or bytes-like data held in memory.
+
+    ## Arguments
+
+    | Name    | Type | Description | Default |
+    |---------|------|-------------|---------|
+    | content | Any  | Content passed to `post_file`. |   |
+    """
+    if isinstance(content, (str, bytes, bytearray, memoryview, dict)):
+        return False
+    return hasattr(content, 'read') or hasattr(content, '__iter__')
+
+
+def open_source(content: Any) -> Tuple[Any, bool]:
+    """
+    # Open Source
+
+    Returns a readable binary file object for a path, an open file object or
+    an iterator of chunks, and whether the caller owns it and must close it.
+    Open file objects are read from their current position and left open.
+
+    ## Arguments
+
+    | Name    | Type                          | Description | Default |
+    |---------|-------------------------------|-------------|---------|
+    | content | str, file object or iterator  | Source to read. |   |
+    """
+    if isinstance(content, str):
+        return open(content, 'rb'), True
+    if hasattr(content, 'read'):
+        return content, False
+    return ChunkReader(content), True
+
+
+def _sniff_binary(prefix: bytes) -> bool:
+    """
+    @private Whether the first bytes of a stream look binary, by the same
+    rules as `is_binary_file`.
+
+    A prefix may end in the middle of a multi-byte UTF-8 character, which is
+    not counted against it.
+    """
+    return _looks_binary(memoryview(prefix).cast('B'), final=False)
@@ -0,0 +1,715 @@
+# transfer.py
+"""
+# Transfer Overview
+
+Parallel multipart transfers for the Klingon File Manager.
+
+A single `put_object` sends the whole body over one connection, cannot exceed
+5 GB and has to start again from the first byte after any error. Above
+`KFM_MULTIPART_THRESHOLD` bytes, `post_file` uploads through
+`upload_multipart()` instead: the object is split into parts that are sent
+concurrently over the pooled connections of the current `FileManager`, and a
+failed part is retried on its own.
+
+Parts are read straight from the source when they are sent: with `os.pread`
+when the source is a file, or as zero-copy slices when it is already in
+memory. At most `concurrency` parts are held in memory at once.
+
+Copies between two S3 locations never leave S3: objects over 5 GB, which
+`copy_object` cannot handle, are copied with `copy_multipart()` as parallel
+`UploadPartCopy` requests.
+
+Downloads work the other way round. Above `KFM_DOWNLOAD_THRESHOLD` bytes,
+`get_file` fetches the object with `download_multipart()`: byte ranges are
+requested concurrently and written straight into a preallocated buffer or
+file, a dropped range resumes from the last byte received, and the result is
+checked against the object's additional checksum, when it has one, or the
+`md5` metadata or, failing that, the multipart ETag.
+
+# Contents
+
+## upload_multipart
+Uploads a file or buffer to S3 as a parallel multipart upload.
+
+## copy_multipart
+Copies an object inside S3 with parallel `UploadPartCopy` requests.
+
+## download_multipart
+Downloads an S3 object into a buffer or file with parallel ranged GETs.
+
+## multipart_etag
+Computes the ETag S3 assigns to a multipart object.
+
+# Configuration
+
+| Variable                     | Default | Description |
+|------------------------------|---------|-------------|
+| `KFM_MULTIPART_THRESHOLD`    | 64 MiB  | Size from which `post_file` uses multipart uploads. |
+| `KFM_MULTIPART_PART_SIZE`    | 16 MiB  | Size of each part. Raised automatically to stay within 10,000 parts. |
+| `KFM_MULTIPART_CONCURRENCY`  | 8       | Parts uploaded at the same time. |
+| `KFM_MULTIPART_RETRIES`      | 3       | Extra attempts for a failed part before the transfer is abandoned. |
+| `KFM_DOWNLOAD_THRESHOLD`     | 64 MiB  | Size from which `get_file` uses ranged downloads. |
+| `KFM_COPY_PART_SIZE`         | 512 MiB | Size of each part of a server-side copy over 5 GB. |
+
+Part size, concurrency and retries apply to downloads as well.
+
+# Usage Examples
+
+To upload a large local file with 16 concurrent parts:
+```python
+>>> with open('/data/large.bin', 'rb') as file:
+...     upload_multipart(s3_client, 'bucket', 'large.bin', file, concurrency=16)
+```
+
+To restore a large object to disk:
+```python
+>>> with open('/data/large.bin', 'w+b') as file:
+...     download_multipart(s3_client, 'bucket', 'large.bin', target=file)['md5']
+'6cd3556deb0da54bca060b4c39479839'
+```
+"""
+
+import os
+import time
+import base64
+import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .hashing import etag_md5
+from .checksums import checksum_field, composite_checksum, new_checksum, stored_checksum
+from .streams import DEFAULT_CHUNK_SIZE
+from .utils import logger
+
+MULTIPART_THRESHOLD = int(os.getenv('KFM_MULTIPART_THRESHOLD', str(64 * 1024 * 1024)))
+"""@private Size in bytes from which uploads are split into parts."""
+
+MULTIPART_PART_SIZE = int(os.getenv('KFM_MULTIPART_PART_SIZE', str(16 * 1024 * 1024)))
+"""@private Default part size in bytes."""
+
+MULTIPART_CONCURRENCY = int(os.getenv('KFM_MULTIPART_CONCURRENCY', '8'))
+"""@private Default number of parts uploaded at the same time."""
+
+MULTIPART_RETRIES = int(os.getenv('KFM_MULTIPART_RETRIES', '3'))
+"""@private Default number of extra attempts per part."""
+
+DOWNLOAD_THRESHOLD = int(os.getenv('KFM_DOWNLOAD_THRESHOLD', str(64 * 1024 * 1024)))
+"""@private Size in bytes from which `get_file` downloads in ranges."""
+
+COPY_PART_SIZE = int(os.getenv('KFM_COPY_PART_SIZE', str(512 * 1024 * 1024)))
+"""@private Default part size in bytes for server-side multipart copies."""
+
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * 1024 * 1024
+"""@private Largest object, and part, S3 copies in a single request."""
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+"""@private Smallest part S3 accepts, except for the last one."""
+
+MAX_PARTS = 10000
+"""@private Largest number of parts in one S3 multipart upload."""
+
+
+def _part_size(size: int, part_size: Optional[int]) -> int:
+    """@private Part size honouring the S3 minimum and the 10,000 part limit."""
+    part_size = max(part_size or MULTIPART_PART_SIZE, MIN_PART_SIZE)
+    # Round up so the parts always fit in MAX_PARTS
+    return max(part_size, -(-size // MAX_PARTS))
+
+
+class _PartReader:
+    """
+    @private Reads `[offset, offset + length)` from a file or buffer.
+
+    Files with a descriptor are read with `os.pread`, so parts can be read
+    concurrently without moving the file position. Buffers are sliced without
+    copying. Other file objects are read under a lock.
+    """
+
+    def __init__(self, source: Any, base: int = 0):
+        self._base = base
+        self._view = None
+        self._fileno = None
+        self._source = source
+        self._lock = threading.Lock()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source).cast('B')
+            return
+        try:
+            self._fileno = source.fileno()
+        except (AttributeError, OSError, ValueError):
+            # In-memory spools and other file objects have no descriptor
+            self._fileno = None
+
+    def read(self, offset: int, length: int):
+        if self._view is not None:
+            return self._view[offset:offset + length]
+        position = self._base + offset
+        if self._fileno is not None:
+            parts = []
+            while length > 0:
+                data = os.pread(self._fileno, length, position)
+                if not data:
+                    break
+                parts.append(data)
+                position += len(data)
+                length -= len(data)
+            return b''.join(parts)
+        with self._lock:
+            self._source.seek(position)
+            return self._source.read(length)
+
+
+def parts_in_buffer(buffer_size: Optional[int], size: int, part_size: Optional[int] = None) -> Optional[int]:
+    """
+    @private Number of parts that can be in flight at once without holding
+    more than `buffer_size` bytes, at least one. `None` when there is no
+    limit.
+    """
+    if not buffer_size:
+        return None
+    return max(1, min(MULTIPART_CONCURRENCY, buffer_size // _part_size(size, part_size)))
+
+
+def multipart_etag(part_md5s: List[bytes]) -> str:
+    """
+    # Multipart ETag
+
+    Returns the ETag S3 gives a multipart object: the MD5 of the
+    concatenated binary part digests, followed by `-` and the part count.
+
+    ## Arguments
+
+    | Name      | Type        | Description | Default |
+    |-----------|-------------|-------------|---------|
+    | part_md5s | List[bytes] | Binary MD5 digest of each part, in order. |   |
+    """
+    return f"{hashlib.md5(b''.join(part_md5s)).hexdigest()}-{len(part_md5s)}"
+
+
+def upload_multipart(
+    s3_client: Any,
+    bucket_name: str,
+    key: str,
+    source: Any,
+    size: Optional[int] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    content_type: Optional[str] = None,
+    part_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+    checksum_algorithm: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    # Upload Multipart
+
+    Uploads `source` to `s3://bucket_name/key` as a multipart upload with
+    parts sent concurrently. Every part carries its own `ContentMD5`, is
+    retried with exponential backoff on failure, and the ETag of the
+    completed object is checked against the part digests. If a part still
+    fails after `retries` extra attempts the upload is aborted, so no
+    orphaned parts are left behind, and the error is raised.
+
+    With a `checksum_algorithm`, each part carries that checksum instead of
+    its MD5, computed on the thread sending the part, and S3 stores the
+    composite checksum of the parts with the object, which is checked in
+    place of the ETag.
+
+    ## Arguments
+
+    | Name         | Type                     | Description | Default |
+    |--------------|--------------------------|-------------|---------|
+    | s3_client    | boto3.client             | Client used for the upload. |   |
+    | bucket_name  | str                      | Destination bucket. |   |
+    | key          | str                      | Destination key. |   |
+    | source       | file or bytes-like       | Open binary file, read from its current position, or an in-memory buffer. |   |
+    | size         | int                      | Bytes to upload; defaults to the rest of the file or the buffer length. | None |
+    | metadata     | dict                     | Object metadata, e.g. `md5` and `file-size-bytes`. | None |
+    | content_type | str                      | `Content-Type` of the object. | None |
+    | part_size    | int                      | Bytes per part (`KFM_MULTIPART_PART_SIZE`). | None |
+    | concurrency  | int                      | Parts in flight at once (`KFM_MULTIPART_CONCURRENCY`). | None |
+    | retries      | int                      | Extra attempts per part (`KFM_MULTIPART_RETRIES`). | None |
+    | checksum_algorithm | str                | `CRC32C`, `CRC32` or `SHA256` checksum stored with the object. | None |
+
+    ## Returns
+    The `complete_multipart_upload` response, with `Parts` set to the number
+    of parts uploaded.
+
+    ## Raises
+    `IOError` if the completed object's ETag or checksum does not match the parts sent,
+    or whatever error made a part fail for good.
+    """
+    base = 0
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        base = source.tell()
+        if size is None:
+            source.seek(0, os.SEEK_END)
+            size = source.tell() - base
+            source.seek(base)
+    elif size is None:
+        size = memoryview(source).nbytes
+
+    part_size = _part_size(size, part_size)
+    retries = MULTIPART_RETRIES if retries is None else max(0, retries)
+    reader = _PartReader(source, base)
+    offsets = list(range(0, size, part_size)) or [0]
+    create_args = _create_args(metadata, content_type)
+    if checksum_algorithm:
+        create_args['ChecksumAlgorithm'] = checksum_algorithm
+        field = checksum_field(checksum_algorithm)
+
+    def send(upload_id: str, number: int, offset: int):
+        def attempt():
+            body = reader.read(offset, min(part_size, size - offset))
+            part_args = {}
+            if checksum_algorithm:
+                checksum = new_checksum(checksum_algorithm)
+                checksum.update(body)
+                digest = checksum.digest()
+                part_args['ChecksumAlgorithm'] = checksum_algorithm
+                part_args[field] = base64.b64encode(digest).decode('utf-8')
+            else:
+                digest = hashlib.md5(body).digest()
+                part_args['ContentMD5'] = base64.b64encode(digest).decode('utf-8')
+            response = s3_client.upload_part(
+                Bucket=bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=bytes(body) if isinstance(body, memoryview) else body,
+                **part_args,
+            )
+            part = {'PartNumber': number, 'ETag': response['ETag']}
+            if checksum_algorithm:
+                part[field] = part_args[field]
+            return part, digest
+        return _retry(attempt, retries, f"part {number} of s3://{bucket_name}/{key}")
+
+    logger.debug(f"Uploading s3://{bucket_name}/{key} in {len(offsets)} parts of {part_size} bytes")
+    response, digests = _run_multipart(s3_client, bucket_name, key, create_args, offsets, send, concurrency)
+
+    if checksum_algorithm:
+        expected = composite_checksum(checksum_algorithm, digests)
+        stored = response.get(field)
+        if isinstance(stored, str) and stored != expected:
+            raise IOError(f"Multipart {checksum_algorithm} {stored} does not match the uploaded parts ({expected}).")
+    else:
+        expected = multipart_etag(digests)
+        etag = response.get('ETag')
+        if isinstance(etag, str) and etag.strip('"') != expected:
+            raise IOError(f"Multipart ETag {etag} does not match the uploaded parts ({expected}).")
+
+    response['Parts'] = len(digests)
+    return response
+
+
+def copy_multipart(
+    s3_client: Any,
+    source_bucket: str,
+    source_key: str,
+    bucket_name: str,
+    key: str,
+    size: int,
+    metadata: Optional[Dict[str, Any]] = None,
+    content_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    part_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+    checksum_algorithm: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    # Copy Multipart
+
+    Copies `s3://source_bucket/source_key` to `s3://bucket_name/key` inside
+    S3 with parallel `UploadPartCopy` requests, which is required for objects
+    over 5 GB and much faster for large ones. No data passes through this
+    process. `metadata` and `content_type` are set on the new object, since
+    a multipart copy does not carry them over by itself.
+
+    ## Arguments
+
+    | Name          | Type         | Description | Default |
+    |---------------|--------------|-------------|---------|
+    | s3_client     | boto3.client | Client for the destination bucket's region. |   |
+    | source_bucket | str          | Source bucket. |   |
+    | source_key    | str          | Source key. |   |
+    | bucket_name   | str          | Destination bucket. |   |
+    | key           | str          | Destination key. |   |
+    | size          | int          | Size of the source object in bytes. |   |
+    | metadata      | dict         | Metadata of the new object, usually the source's. | None |
+    | content_type  | str          | `Content-Type` of the new object. | None |
+    | etag          | str          | Source ETag; parts fail if the source changes mid-copy. | None |
+    | part_size     | int          | Bytes per part (`KFM_COPY_PART_SIZE`). | None |
+    | concurrency   | int          | Parts copied at once (`KFM_MULTIPART_CONCURRENCY`). | None |
+    | retries       | int          | Extra attempts per part (`KFM_MULTIPART_RETRIES`). | None |
+    | checksum_algorithm | str     | Checksum S3 computes for each part and stores with the new object. | None |
+
+    ## Returns
+    The `complete_multipart_upload` response, with `Parts` set to the number
+    of parts copied.
+    """
+    part_size = min(_part_size(size, part_size or COPY_PART_SIZE), MAX_COPY_OBJECT_SIZE)
+    retries = MULTIPART_RETRIES if retries is None else max(0, retries)
+    offsets = list(range(0, size, part_size)) or [0]
+    copy_source = {'Bucket': source_bucket, 'Key': source_key}
+    create_args = _create_args(metadata, content_type)
+    if checksum_algorithm:
+        create_args['ChecksumAlgorithm'] = checksum_algorithm
+
+    def send(upload_id: str, number: int, offset: int):
+        copy_args = {
+            'Bucket': bucket_name,
+            'Key': key,
+            'UploadId': upload_id,
+            'PartNumber': number,
+            'CopySource': copy_source,
+        }
+        if size:
+            copy_args['CopySourceRange'] = f"bytes={offset}-{min(offset + part_size, size) - 1}"
+        if etag:
+            copy_args['CopySourceIfMatch'] = etag
+
+        def attempt():
+            result = s3_client.upload_part_copy(**copy_args)['CopyPartResult']
+            part = {'PartNumber': number, 'ETag': result['ETag']}
+            if checksum_algorithm and result.get(checksum_field(checksum_algorithm)):
+                part[checksum_field(checksum_algorithm)] = result[checksum_field(checksum_algorithm)]
+            return part, None
+        return _retry(attempt, retries, f"part {number} of s3://{bucket_name}/{key}")
+
+    logger.debug(
+        f"Copying s3://{source_bucket}/{source_key} to s3://{bucket_name}/{key} "
+        f"in {len(offsets)} parts of {part_size} bytes"
+    )
+    response, _ = _run_multipart(s3_client, bucket_name, key, create_args, offsets, send, concurrency)
+    response['Parts'] = len(offsets)
+    return response
+
+
+def _create_args(metadata: Optional[Dict[str, Any]], content_type: Optional[str]) -> Dict[str, Any]:
+    """@private `create_multipart_upload` arguments for the object's metadata."""
+    create_args = {}
+    if metadata:
+        create_args['Metadata'] = {k: str(v) for k, v in metadata.items()}
+    if content_type:
+        create_args['ContentType'] = content_type
+    return create_args
+
+
+def _retry(attempt: Callable[[], Any], retries: int, description: str) -> Any:
+    """@private Call `attempt`, retrying with exponential backoff when it fails."""
+    for number in range(retries + 1):
+        try:
+            return attempt()
+        except Exception as exception:
+            if number == retries:
+                raise
+            logger.info(f"Retrying {description}: {exception}")
+            time.sleep(min(0.2 * 2 ** number, 5))
+
+
+def _run_multipart(
+    s3_client: Any,
+    bucket_name: str,
+    key: str,
+    create_args: Dict[str, Any],
+    offsets: List[int],
+    send: Callable[[str, int, int], Tuple[Dict[str, Any], Any]],
+    concurrency: Optional[int],
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    @private Create a multipart upload, run `send(upload_id, number, offset)`
+    for every part concurrently and complete it. The upload is aborted if
+    anything fails, so no orphaned parts are left behind.
+    """
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=key, **create_args)['UploadId']
+    concurrency = max(1, concurrency or MULTIPART_CONCURRENCY)
+    executor = ThreadPoolExecutor(
+        max_workers=min(concurrency, len(offsets)),
+        thread_name_prefix='kfm-multipart',
+    )
+    try:
+        futures = [
+            executor.submit(send, upload_id, number, offset)
+            for number, offset in enumerate(offsets, 1)
+        ]
+        results = [future.result() for future in futures]
+        response = s3_client.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [part for part, _ in results]},
+        )
+    except BaseException:
+        # Stop sending parts nobody will use, then drop the ones already sent
+        executor.shutdown(wait=True, cancel_futures=True)
+        try:
+            s3_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        except Exception as exception:
+            logger.info(f"Could not abort multipart upload {upload_id}: {exception}")
+        raise
+    executor.shutdown()
+    return response, [extra for _, extra in results]
+
+
+def _etag_parts(etag: Any) -> Optional[int]:
+    """@private Number of parts encoded in a multipart ETag, otherwise `None`."""
+    match = re.fullmatch(r'"?([0-9a-f]{32})-(\d+)"?', etag) if isinstance(etag, str) else None
+    return int(match.group(2)) if match else None
+
+
+def _checksum_parts(value: str) -> Optional[int]:
+    """@private Number of parts encoded in a composite checksum, otherwise `None`."""
+    match = re.fullmatch(r'[A-Za-z0-9+/=]+-(\d+)', value)
+    return int(match.group(1)) if match else None
+
+
+class _PartWriter:
+    """
+    @private Writes `data` at `offset` of a preallocated buffer or file.
+
+    Files are written with `os.pwrite`, so ranges can land concurrently
+    without moving the file position.
+    """
+
+    def __init__(self, target: Any, size: int):
+        self.buffer = None
+        self._fileno = None
+        if target is None:
+            self.buffer = bytearray(size)
+            self._view = memoryview(self.buffer)
+            return
+        target.flush()
+        self._fileno = target.fileno()
+        os.ftruncate(self._fileno, size)
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fileno, 0, size)
+            except OSError:
+                # Not every filesystem can reserve blocks; the file still has its size
+                pass
+
+    def write(self, offset: int, data: bytes) -> None:
+        if self.buffer is not None:
+            self._view[offset:offset + len(data)] = data
+            return
+        view = memoryview(data)
+        while len(view):
+            written = os.pwrite(self._fileno, view, offset)
+            view = view[written:]
+            offset += written
+
+    def read(self, offset: int, length: int):
+        if self.buffer is not None:
+            return self._view[offset:offset + length]
+        return os.pread(self._fileno, length, offset)
+
+
+def download_multipart(
+    s3_client: Any,
+    bucket_name: str,
+    key: str,
+    target: Any = None,
+    response: Optional[Dict[str, Any]] = None,
+    part_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+    buffer_size: Optional[int] = None,
+    checksum: bool = False,
+) -> Dict[str, Any]:
+    """
+    # Download Multipart
+
+    Downloads `s3://bucket_name/key` with byte ranges fetched concurrently
+    and written in place into `target`, or into a new `bytearray` when no
+    target is given. A range whose connection drops is requested again from
+    the last byte received. Every range is pinned to the object's ETag with
+    `IfMatch`, so an object replaced mid-download fails instead of mixing
+    versions.
+
+    The MD5 of the object is compared with the `md5` metadata. It is computed
+    in a second pass over the written data: as soon as a range and every
+    range before it have landed, the range is read back from the buffer
+    (without copying) or from the file (usually still in the page cache)
+    and hashed, while later ranges are still downloading. Objects without
+    `md5` metadata are checked against their ETag: directly when it is the
+    MD5 of a single-part upload, or as a multipart ETag with the ranges
+    aligned to the uploaded parts, whose digests are computed as the data
+    arrives.
+
+    When `response` carries an S3 additional checksum (see `checksums`), or
+    `checksum` asks for one, the data is checked against that checksum
+    instead and no MD5 is computed: a composite checksum is rebuilt from the
+    checksums of ranges aligned to the parts, and a full-object checksum is
+    computed by reading the written ranges back in order, as for the MD5.
+    `md5` is then the stored `md5` metadata, if any.
+
+    ## Arguments
+
+    | Name        | Type         | Description | Default |
+    |-------------|--------------|-------------|---------|
+    | s3_client   | boto3.client | Client used for the download. |   |
+    | bucket_name | str          | Source bucket. |   |
+    | key         | str          | Source key. |   |
+    | target      | file         | Binary file opened for reading and writing; its content is replaced. | None |
+    | response    | dict         | `GetObject` response already in flight; its body supplies the first range. | None |
+    | part_size   | int          | Bytes per range (`KFM_MULTIPART_PART_SIZE`). | None |
+    | concurrency | int          | Ranges in flight at once (`KFM_MULTIPART_CONCURRENCY`). | None |
+    | retries     | int          | Extra attempts per range (`KFM_MULTIPART_RETRIES`). | None |
+    | buffer_size | int          | Upper bound on the bytes held in memory in flight, shared by the ranges. | None |
+    | checksum    | bool         | Ask S3 for the object's additional checksum when fetching `response`. | False |
+
+    ## Returns
+    A dictionary with `content` (the `bytearray`, or `None` when writing to
+    `target`), `size`, `md5`, `etag`, `parts`, `checksum` (the stored
+    additional checksum, if any) and `verified`, which names what the
+    download was checked against (`'checksum'`, `'md5'`, `'etag'` or `None`).
+
+    ## Raises
+    `IOError` if the data does not match the stored checksum, MD5 or ETag,
+    or whatever error made a range fail for good.
+    """
+    if response is None:
+        head_args = {'ChecksumMode': 'ENABLED'} if checksum else {}
+        response = s3_client.head_object(Bucket=bucket_name, Key=key, **head_args)
+    first_body = response.get('Body')
+    size = response['ContentLength']
+    etag = response.get('ETag')
+    # A single-part ETag outside SSE-KMS is the MD5 and serves just as well
+    metadata_md5 = (response.get('Metadata') or {}).get('md5')
+    expected_md5 = metadata_md5 or etag_md5(response)
+    stored = stored_checksum(response)
+    retries = MULTIPART_RETRIES if retries is None else max(0, retries)
+    concurrency = max(1, concurrency or MULTIPART_CONCURRENCY)
+    # Each range holds one chunk at a time, so the buffer is split between them
+    chunk_size = DEFAULT_CHUNK_SIZE
+    if buffer_size:
+        chunk_size = max(64 * 1024, min(chunk_size, buffer_size // concurrency))
+
+    # A composite checksum, or the multipart ETag when there is no MD5 to
+    # compare against, is rebuilt from the digests of ranges aligned to the
+    # uploaded parts
+    range_size = _part_size(size, part_size)
+    if stored:
+        layout_parts = _checksum_parts(stored[1])
+    else:
+        layout_parts = None if expected_md5 else _etag_parts(etag)
+    if layout_parts == 1:
+        range_size = max(size, 1)
+    elif layout_parts:
+        try:
+            first_part = s3_client.head_object(Bucket=bucket_name, Key=key, PartNumber=1, IfMatch=etag)
+            first_size = first_part.get('ContentLength')
+            if isinstance(first_size, int) and first_size > 0 and -(-size // first_size) == layout_parts:
+                range_size = first_size
+            else:
+                layout_parts = None
+        except Exception as exception:
+            logger.debug(f"Part layout of s3://{bucket_name}/{key} unavailable: {exception}")
+            layout_parts = None
+        if layout_parts is None and stored:
+            # The composite checksum cannot be rebuilt, fall back to the MD5
+            stored = None
+
+    if stored and layout_parts:
+        new_part_digest, new_whole_digest = (lambda: new_checksum(stored[0])), None
+    elif stored:
+        new_part_digest, new_whole_digest = None, (lambda: new_checksum(stored[0]))
+    elif layout_parts:
+        new_part_digest, new_whole_digest = hashlib.md5, hashlib.md5
+    else:
+        new_part_digest, new_whole_digest = None, hashlib.md5
+
+    writer = _PartWriter(target, size)
+    offsets = list(range(0, size, range_size))
+    logger.debug(f"Downloading s3://{bucket_name}/{key} in {len(offsets)} ranges of {range_size} bytes")
+
+    def fetch(offset: int, body: Any = None):
+        end = min(offset + range_size, size)
+        position = offset
+        digest = new_part_digest() if new_part_digest else None
+        for attempt in range(retries + 1):
+            try:
+                if body is None:
+                    get_args = {'Bucket': bucket_name, 'Key': key, 'Range': f"bytes={position}-{end - 1}"}
+                    if etag:
+                        get_args['IfMatch'] = etag
+                    body = s3_client.get_object(**get_args)['Body']
+                while position < end:
+                    chunk = body.read(min(chunk_size, end - position))
+                    if not chunk:
+                        raise IOError(f"Connection closed at byte {position} of s3://{bucket_name}/{key}")
+                    writer.write(position, chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+                    position += len(chunk)
+                return digest.digest() if digest is not None else None
+            except Exception as exception:
+                if attempt == retries:
+                    raise
+                logger.info(f"Resuming s3://{bucket_name}/{key} at byte {position}: {exception}")
+                time.sleep(min(0.2 * 2 ** attempt, 5))
+            finally:
+                close = getattr(body, 'close', None)
+                if callable(close):
+                    close()
+                body = None
+
+    whole = new_whole_digest() if new_whole_digest else None
+    digests = []
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(offsets))),
+        thread_name_prefix='kfm-download',
+    )
+    try:
+        futures = [
+            executor.submit(fetch, offset, first_body if index == 0 else None)
+            for index, offset in enumerate(offsets)
+        ]
+        if not offsets and first_body is not None:
+            first_body.close()
+        # Read each range back and hash it as soon as everything before it
+        # has landed
+        for offset, future in zip(offsets, futures):
+            digests.append(future.result())
+            if whole is None:
+                continue
+            end = min(offset + range_size, size)
+            for position in range(offset, end, chunk_size):
+                whole.update(writer.read(position, min(chunk_size, end - position)))
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    verified = None
+    if stored:
+        algorithm, value = stored
+        actual = composite_checksum(algorithm, digests) if layout_parts else whole.b64digest()
+        if actual != value:
+            raise IOError(f"{algorithm} {actual} of s3://{bucket_name}/{key} does not match the stored {algorithm} {value}.")
+        md5 = expected_md5
+        verified = 'checksum'
+    else:
+        md5 = whole.hexdigest() if whole is not None else None
+        if expected_md5:
+            if md5 != expected_md5:
+                raise IOError(f"MD5 {md5} of s3://{bucket_name}/{key} does not match the stored MD5 {expected_md5}.")
+            verified = 'md5' if metadata_md5 else 'etag'
+        elif layout_parts:
+            expected = multipart_etag(digests)
+            if etag.strip('"') != expected:
+                raise IOError(f"Multipart ETag {etag} of s3://{bucket_name}/{key} does not match the data ({expected}).")
+            verified = 'etag'
+
+    return {
+        'content': writer.buffer,
+        'size': size,
+        'md5': md5,
+        'etag': etag,
+        'parts': len(offsets),
+        'checksum': stored[1] if stored else None,
+        'verified': verified,
+    }
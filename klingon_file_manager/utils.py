@@ -76,34 +76,160 @@ To fetch AWS credentials:
 ```
 """
 import re
+import codecs
 import logging
 import os
-
-loglevel = os.getenv('PYTHON_LOGLEVEL', 'INFO').upper()
-logging.basicConfig(
-    level=getattr(logging, loglevel, logging.INFO),
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-logger = logging.getLogger(__name__)
-from boto3 import Session
-from dotenv import load_dotenv
+import importlib
+import threading
+import weakref
 from typing import List, Dict, Union, Any, Callable
 import hashlib
-import boto3
-from botocore.exceptions import NoCredentialsError, ClientError
-import magic
-import os
 from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 import time
-import logging
 from urllib.parse import urlparse
 
-# Load environment variables from .env file
-load_dotenv()
+FAST_STARTUP = os.getenv('KFM_FAST_STARTUP', '').strip().lower() in ('1', 'true', 'yes', 'on')
+"""
+@private When set (`KFM_FAST_STARTUP=1`), importing the package performs no
+I/O: logging is left to the application and the `.env` file is only loaded
+on first AWS use.
+"""
+
+loglevel = os.getenv('PYTHON_LOGLEVEL', 'INFO').upper()
+if not FAST_STARTUP:
+    logging.basicConfig(
+        level=getattr(logging, loglevel, logging.INFO),
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+logger = logging.getLogger(__name__)
+
+# Heavy third party dependencies are imported on first use rather than at
+# import time. Each entry maps a module level name to the module (and
+# optionally the attribute) it is loaded from.
+_LAZY_IMPORTS = {
+    'boto3': ('boto3', None),
+    'Session': ('boto3', 'Session'),
+    'NoCredentialsError': ('botocore.exceptions', 'NoCredentialsError'),
+    'ClientError': ('botocore.exceptions', 'ClientError'),
+    'magic': ('magic', None),
+    'load_dotenv': ('dotenv', 'load_dotenv'),
+}
+_AWS_NAMES = ('boto3', 'Session', 'NoCredentialsError', 'ClientError')
+
+_BINARY_CHECK_SLICE = 1024 * 1024
+"""@private Bytes of a buffer decoded at a time by `is_binary_file`."""
+
+BINARY_SAMPLE_BYTES = int(os.getenv('KFM_BINARY_SAMPLE_BYTES', str(64 * 1024)))
+"""@private Bytes from the start of a payload inspected by `is_binary_file`."""
+
+_BINARY_TAIL_BYTES = 4096
+"""@private Bytes from the end of a payload inspected by `is_binary_file`."""
+
+_CONTROL_BYTES = bytes(byte for byte in range(32) if byte not in b'\t\n\r\f\b\x1b') + b'\x7f'
+"""@private Control bytes that are rare in text; tab, newlines, form feed, backspace and escape are not counted."""
+
+_CONTROL_RATIO = 0.3
+"""@private Share of control bytes above which content is binary."""
+_lazy_lock = threading.RLock()
+_env_loaded = False
+
+
+def _require(*names: str) -> None:
+    """
+    @private Import the given lazy dependencies into the module namespace.
+
+    Names that are already present (including names replaced by
+    `unittest.mock.patch`) are left untouched.
+    """
+    for name in names:
+        if name in globals():
+            continue
+        with _lazy_lock:
+            if name in globals():
+                continue
+            module_name, attribute = _LAZY_IMPORTS[name]
+            value = importlib.import_module(module_name)
+            if attribute:
+                value = getattr(value, attribute)
+            globals()[name] = value
+
+
+def _load_env() -> None:
+    """@private Load environment variables from the .env file once."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lazy_lock:
+        if not _env_loaded:
+            _require('load_dotenv')
+            load_dotenv()
+            _env_loaded = True
+
+
+def _require_aws() -> None:
+    """@private Load the AWS SDK and the .env file before the first AWS call."""
+    _load_env()
+    _require(*_AWS_NAMES)
+
+
+_fork_lock_owners = weakref.WeakValueDictionary()
+"""@private Live objects, keyed by `id()` as mappings are not hashable, whose `_lock` is replaced in a forked child."""
+
+
+def renew_lock_after_fork(owner: Any) -> None:
+    """
+    @private Give `owner` a new `threading.Lock` as `_lock` in every child
+    forked from now on.
+
+    fork() copies a lock in whatever state it is in, and a lock held by
+    another thread of the parent would never be released in the child.
+    """
+    _fork_lock_owners[id(owner)] = owner
+
+
+def _after_fork_in_child() -> None:
+    """@private Replace the locks inherited from the parent process."""
+    global _lazy_lock
+    _lazy_lock = threading.RLock()
+    for owner in list(_fork_lock_owners.values()):
+        owner._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_s3_client() -> Any:
+    """
+    # Get S3 Client
+
+    Returns the pooled S3 client of the current `FileManager` (see
+    `klingon_file_manager.session`), creating it on first use.
+
+    ## Returns
+    A `boto3` S3 client.
+    """
+    _load_env()
+    from .session import get_current_manager
+    return get_current_manager().s3_client
 
-# Load s3 client
-s3_client = boto3.client('s3')
+
+def __getattr__(name: str) -> Any:
+    """@private Resolve lazily imported dependencies and the shared S3 client."""
+    if name == 's3_client':
+        return get_s3_client()
+    if name in _LAZY_IMPORTS:
+        if name in _AWS_NAMES:
+            _load_env()
+        _require(name)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Load environment variables from .env file
+if not FAST_STARTUP:
+    _load_env()
 
 def timing_decorator(func: Callable) -> Callable:
     """
@@ -166,7 +292,7 @@ def get_mime_type(file_path: str) -> dict:
     if file_path.startswith('s3://'):
         try:
             bucket_name, key = file_path[5:].split('/', 1)
-            obj = s3_client.get_object(Bucket=bucket_name, Key=key)
+            obj = get_s3_client().get_object(Bucket=bucket_name, Key=key)
             return {
                 'status': 200,
                 'message': 'Success',
@@ -184,9 +310,12 @@ def get_mime_type(file_path: str) -> dict:
     # Check if it's a local file
     if os.path.exists(file_path):
         try:
-            with open(file_path, 'rb') as file:
-                content = file.read(1024)
-            mime_type = magic.from_buffer(content, mime=True)
+            from .mime import get_mime_detector
+            detector = get_mime_detector()
+            mime_type = detector.from_name(file_path)
+            if mime_type is None:
+                with open(file_path, 'rb') as file:
+                    mime_type = detector.sniff(file.read(detector.sniff_bytes))
             return {
                 'status': 200,
                 'message': 'Success',
@@ -210,7 +339,7 @@ def get_mime_type(file_path: str) -> dict:
 
 #@timing_decorator
 #@lru_cache(maxsize=128)
-def parallel_check_bucket_permissions(bucket_names: List[str], s3_client: Any) -> Dict[str, Any]:
+def parallel_check_bucket_permissions(bucket_names: List[str], s3_client: Any, max_workers: int = None, probe_writes: bool = True) -> Dict[str, Any]:
     """
     # Check permissions of multiple S3 buckets in parallel
 
@@ -223,6 +352,8 @@ def parallel_check_bucket_permissions(bucket_names: List[str], s3_client: Any) -
     |-----------|-------------------|-------------|---------|
     | bucket_names | List[str]      | A list of S3 bucket names to check. |   |
     | s3        | boto3.client      | S3 client object |   |
+    | max_workers | int             | Upper bound on concurrent probes, `None` uses the executor default. | None |
+    | probe_writes | bool           | Probe PutObject/DeleteObject by writing to the bucket. | True |
 
     ## Returns
     A dictionary where the keys are the bucket names and the values are the permissions for each bucket.
@@ -236,14 +367,16 @@ def parallel_check_bucket_permissions(bucket_names: List[str], s3_client: Any) -
     The `check_bucket_permissions` function should be defined to take a bucket name
     and an S3 client object, and return the permissions for the bucket.
     """
-    with ThreadPoolExecutor() as executor:
-        results = list(executor.map(lambda bucket_name: (bucket_name, check_bucket_permissions(bucket_name, s3_client)), bucket_names))
+    # Only pass probe_writes through when it differs from the default
+    options = {} if probe_writes else {'probe_writes': False}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda bucket_name: (bucket_name, check_bucket_permissions(bucket_name, s3_client, **options)), bucket_names))
     
     return {bucket_name: permissions for bucket_name, permissions in results}
 
 #@timing_decorator
 #@lru_cache(maxsize=128)
-def check_bucket_permissions(bucket_name, s3_client):
+def check_bucket_permissions(bucket_name, s3_client, probe_writes: bool = True):
     logger.debug(f"Checking permissions for bucket: {bucket_name}")
     logger.debug(f"Checking permissions for s3_client: {s3_client}")
     """
@@ -257,6 +390,7 @@ def check_bucket_permissions(bucket_name, s3_client):
     |-----------|-------------------|-------------|---------|
     | bucket_name | string          | The name of the bucket to check permissions for. |   |
     | s3        | boto3.client      | S3 client |   |
+    | probe_writes | bool           | Probe PutObject and DeleteObject by writing and deleting a test object. When False nothing is written and both are reported as `None` (unknown). | True |
 
     ## Returns
     Python dictionary containing the permissions as follows:
@@ -277,7 +411,8 @@ def check_bucket_permissions(bucket_name, s3_client):
     | DeleteObject | boolean        | True if the user has DeleteObject permission, False otherwise |
         
     """
-    
+    _require_aws()
+
     # Set the default permissions to False
     permissions = {
         'ListBucket': False,
@@ -320,6 +455,13 @@ def check_bucket_permissions(bucket_name, s3_client):
                 permissions['GetBucketAcl'] = False
                 logger.info(f"Error checking GetBucketAcl permission: {e}")
 
+    # Without write probes PutObject and DeleteObject stay unknown until a
+    # real operation records them
+    if bucket_exists and not probe_writes:
+        permissions['PutObject'] = None
+        permissions['DeleteObject'] = None
+        return permissions
+
     # Check PutObject permission
     if bucket_exists:
         try:
@@ -356,7 +498,7 @@ def check_bucket_permissions(bucket_name, s3_client):
     return permissions
 
 #@timing_decorator
-def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key: str = None) -> Dict[str, Union[int, str]]:
+def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key: str = None, refresh: bool = False, lazy: bool = None) -> Dict[str, Union[int, str]]:
     """
     # Get AWS credentials and check access to S3 buckets
     
@@ -364,10 +506,18 @@ def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key:
     function finds them, it checks if they are valid and returns them along
     with a list of buckets and the permissions the credentials have to each.
 
+    The bucket permission map is cached per access key ID (see
+    `klingon_file_manager.credentials.PermissionCache`), so repeated calls with
+    the same credentials make no API calls while the cache is warm.
+
     ## Args
     | Name      | Type              | Description | Default |
     |-----------|-------------------|-------------|---------|
     | debug     | bool              | Flag to enable debugging. | False |
+    | access_key | str              | AWS access key ID, otherwise read from the environment. | None |
+    | secret_key | str              | AWS secret access key, otherwise read from the environment. | None |
+    | refresh   | bool              | Ignore the permission cache and probe the buckets again. | False |
+    | lazy      | bool              | Skip the up-front bucket scan and return a `BucketPermissions` mapping that discovers each bucket on first access without writing to it. | `KFM_LAZY_PERMISSIONS` |
 
     ## Returns
     A dictionary containing AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY as well
@@ -399,6 +549,9 @@ def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key:
     ```
     """
 
+    # Make sure the .env file has been loaded before reading the environment
+    _load_env()
+
     # Get AWS credentials from arguments or environment variables
     access_key = access_key or os.getenv('AWS_ACCESS_KEY_ID')
     secret_key = secret_key or os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -413,7 +566,26 @@ def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key:
             'message': 'Failed Dependency - Missing or Incomplete AWS credentials in .env or environment',
         }
 
+    # Return the cached permission map if these credentials were checked
+    # recently
+    from .credentials import LAZY_PERMISSIONS, get_bucket_permissions, get_permission_cache
+    lazy = LAZY_PERMISSIONS if lazy is None else lazy
+    permission_cache = get_permission_cache()
+    cached_access = None if refresh or lazy else permission_cache.get(access_key, secret_key)
+    if cached_access is not None:
+        logger.debug(f"Using cached bucket permissions for {access_key}")
+        return {
+            'status': 200,
+            'message': 'AWS credentials retrieved successfully.',
+            'credentials': {
+                'AWS_ACCESS_KEY_ID': access_key,
+                'AWS_SECRET_ACCESS_KEY': secret_key,
+            },
+            'access': cached_access
+        }
+
     # Check if the credentials are valid
+    _require_aws()
     try:
         session = Session(aws_access_key_id=access_key, aws_secret_access_key=secret_key)
         logger.debug(f"Session Details: {session.__dict__}")
@@ -441,6 +613,20 @@ def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key:
             'status': 403,
             'message': 'Access Denied - AWS credentials are invalid',
         }
+    s3_client = session.client('s3')
+
+    # In lazy mode buckets are only probed when an operation first targets them
+    if lazy:
+        return {
+            'status': 200,
+            'message': 'AWS credentials retrieved successfully.',
+            'credentials': {
+                'AWS_ACCESS_KEY_ID': access_key,
+                'AWS_SECRET_ACCESS_KEY': secret_key,
+            },
+            'access': get_bucket_permissions(access_key, s3_client=s3_client)
+        }
+
     response = s3_client.list_buckets()
     buckets = response['Buckets']
 
@@ -450,6 +636,8 @@ def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key:
     if 'access' in response:
         logger.info(f"Final buckets in response: {list(response['access'].keys())}")
 
+    permission_cache.set(access_key, secret_key, access)
+
     return {
         'status': 200,
         'message': 'AWS credentials retrieved successfully.',
@@ -460,28 +648,70 @@ def get_aws_credentials(debug: bool = False, access_key: str = None, secret_key:
         'access': access
     }
 
+def _looks_binary(view: memoryview, final: bool = True, partial_start: bool = False) -> bool:
+    """
+    @private Whether bytes look binary: they contain a NUL byte, more than
+    `_CONTROL_RATIO` control bytes, or are not valid UTF-8.
+
+    The bytes are checked in slices, so large buffers are never copied or
+    decoded as a whole. `final=False` accepts a multi-byte character cut off
+    at the end and `partial_start=True` one cut off at the start, for
+    samples taken from inside a payload.
+    """
+    if partial_start:
+        # Skip the continuation bytes of a character that began before the sample
+        skip = 0
+        while skip < min(3, len(view)) and 0x80 <= view[skip] < 0xC0:
+            skip += 1
+        view = view[skip:]
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    controls = 0
+    try:
+        for start in range(0, len(view), _BINARY_CHECK_SLICE):
+            chunk = bytes(view[start:start + _BINARY_CHECK_SLICE])
+            if b'\x00' in chunk:
+                return True
+            controls += len(chunk) - len(chunk.translate(None, _CONTROL_BYTES))
+            decoder.decode(chunk)
+        decoder.decode(b'', final=final)
+    except UnicodeDecodeError:
+        return True
+    return controls > _CONTROL_RATIO * len(view)
+
+
 #@timing_decorator
-def is_binary_file(file_path_or_content: Union[str, bytes]) -> bool:
+def is_binary_file(
+    file_path_or_content: Union[str, bytes, bytearray, memoryview],
+    full_scan: bool = False,
+) -> bool:
     """
     Determine if the provided content or file path represents binary or text content.
 
+    Content is binary when it contains a NUL byte, when more than 30% of it
+    is control characters, or when it is not valid UTF-8. By default only the
+    first `KFM_BINARY_SAMPLE_BYTES` (64 KiB) and the last 4 KiB are
+    inspected, so the check costs the same whatever the size of the content.
+    Content no larger than the samples is always inspected in full.
+
     Args:
-    | Name                | Type          | Description                               |
-    |---------------------|---------------|-------------------------------------------|
-    | file_path_or_content| str or bytes  | The path to the file or the content.      |
+    | Name                | Type          | Description                               | Default |
+    |---------------------|---------------|-------------------------------------------|---------|
+    | file_path_or_content| str, bytes, bytearray or memoryview | The path to the file or the content. |   |
+    | full_scan           | bool          | Inspect every byte of the content, for an exact answer. | False |
 
     Returns:
     A boolean indicating if the content is binary (True) or text (False).
     """
     try:
-        # Check if content is bytes
-        if isinstance(file_path_or_content, bytes):
-            try:
-                # Attempt to decode as UTF-8, if it fails, it's likely binary
-                file_path_or_content.decode('utf-8')
-                return False  # Decoding succeeded, likely text
-            except UnicodeDecodeError:
-                return True  # Decoding failed, likely binary
+        if isinstance(file_path_or_content, (bytes, bytearray, memoryview)):
+            view = memoryview(file_path_or_content).cast('B')
+            if full_scan or len(view) <= BINARY_SAMPLE_BYTES + _BINARY_TAIL_BYTES:
+                return _looks_binary(view)
+            # A character may straddle either edge of the samples
+            return (
+                _looks_binary(view[:BINARY_SAMPLE_BYTES], final=False)
+                or _looks_binary(view[-_BINARY_TAIL_BYTES:], partial_start=True)
+            )
 
         # If content is string, perform further checks
         elif isinstance(file_path_or_content, str):
@@ -563,7 +793,8 @@ def get_s3_metadata(s3_url):
     
     # Fetch the object metadata
     try:
-        response = s3_client.head_object(Bucket=bucket_name, Key=key)
+        from .session import get_current_manager
+        response = get_current_manager().client_for(bucket_name).head_object(Bucket=bucket_name, Key=key)
         logger.info(response)
     except Exception as e:
         logger.info(f"Error: {e}")
@@ -614,27 +845,24 @@ def get_file_size(content: Union[str, bytes]) -> int:
         return len(content)
 
 
-def get_mime_type_content(content: Union[str, bytes]) -> str:
+def get_mime_type_content(content: Union[str, bytes], name: str = None) -> str:
     """
     Determines the MIME type of the given content.
 
+    Only the first `KFM_MIME_SNIFF_BYTES` of the content are examined, by a
+    `magic.Magic` instance reused by the calling thread. When `name` has a
+    known extension the content is not examined at all. See
+    `mime.MimeDetector`.
+
     Args:
         content (Union[str, bytes]): The content for which to determine the MIME type.
+        name (str): Path or S3 URL of the content, whose extension is tried first.
 
     Returns:
         str: The MIME type of the content.
     """
-    # Initialize magic
-    magic_mime = magic.Magic(mime=True)
-
-    # If content is a string, convert to bytes
-    if isinstance(content, str):
-        content = content.encode('utf-8')
-
-    # Get MIME type
-    mime_type = magic_mime.from_buffer(content)
-
-    return mime_type
+    from .mime import get_mime_detector
+    return get_mime_detector().detect(content, name)
 
 def get_md5_hash_filename(filename: str, debug=False) -> str:
     """
@@ -648,7 +876,16 @@ def get_md5_hash_filename(filename: str, debug=False) -> str:
     | debug     | bool    | Flag to return debugging information | False  |
 
     Returns:
-    The MD5 hash of the file, with optional debugging information.
+    The MD5 hash of the file, with optional debugging information, or `None`
+    when the file does not exist.
+
+    Local files are hashed through the MD5 cache, so a file that has not
+    changed since it was last hashed costs a single `stat` call. See
+    `md5cache.cached_md5`.
+
+    For S3 objects the hash comes from a `HeadObject` request where possible:
+    the `md5` metadata, or the ETag of a single-part object without SSE-KMS.
+    Other objects are streamed and hashed. See `hashing.resolve_md5`.
     """
     debug_info = {
         'filename_provided': filename,
@@ -663,13 +900,19 @@ def get_md5_hash_filename(filename: str, debug=False) -> str:
     # Check if the filename is an S3 URL
     if filename.startswith('s3://'):
         debug_info['steps'].append('Filename is an S3 URL')
-        # Fetch the metadata of the S3 object
-        metadata = get_s3_metadata(filename)
-        debug_info['steps'].append('S3 metadata retrieved')
-        debug_info['metadata'] = metadata
-        debug_info['md5_from_metadata'] = metadata['md5']
-        # Extract the MD5 hash from the metadata
-        md5_hash = metadata['md5']
+        from .hashing import resolve_md5
+        try:
+            resolved = resolve_md5(filename)
+        except Exception as e:
+            # Objects that cannot be read are reported like missing local files
+            debug_info['steps'].append(f'Error reading S3 object: {e}')
+            if debug:
+                debug_info['error'] = str(e)
+                debug_info['result'] = None
+                return debug_info
+            return None
+        debug_info['steps'].append(f"MD5 hash taken from {resolved['source']}")
+        md5_hash = resolved['md5']
         if debug:
             debug_info['result'] = md5_hash
             return debug_info
@@ -684,13 +927,11 @@ def get_md5_hash_filename(filename: str, debug=False) -> str:
         return None
 
     try:
-        # Open the file and read the contents
-        with open(filename, 'rb') as file:
-            content = file.read()
-            debug_info['steps'].append('File content read')
-        # Return the MD5 hash of the file contents
-        md5_hash = get_md5_hash(content)
-        debug_info['steps'].append('MD5 hash computed')
+        # Files whose stat key is unchanged since they were last hashed are
+        # not read again
+        from .md5cache import hash_local_file
+        md5_hash, from_cache = hash_local_file(filename)
+        debug_info['steps'].append('MD5 hash taken from cache' if from_cache else 'MD5 hash computed')
     except Exception as e:
         debug_info['steps'].append(f'Error reading file: {e}')
         if debug:
@@ -719,14 +960,10 @@ def check_file_exists(file_path: str) -> bool:
     """
     # Check if the file_path is an S3 URL
     if file_path.startswith('s3://'):
-        # Fetch the metadata of the S3 object
+        # Fetch the metadata of the S3 object; a failed HEAD reports an
+        # 'Error', while an object without user metadata returns {}
         metadata = get_s3_metadata(file_path)
-        # If metadata is returned, the file exists
-        if metadata:
-            return True
-        # If no metadata is returned, the file does not exist
-        else:
-            return False
+        return 'Error' not in metadata
 
     # If the file_path is not an S3 URL, assume it's a local file path
     else:
@@ -739,7 +976,8 @@ def compare_s3_local_file(local_file, s3_file):
     Validates that a file on S3 has the same content as a local file by downloading and comparing them.
     """
     # Download the S3 file to a tmp file name
-    s3 = boto3.resource('s3')
+    from .session import get_current_manager
+    s3 = get_current_manager().s3_resource
     s3.meta.client.download_file(s3_bucket_name, s3_file, 'tests/tmp')
     # Make sure that the tmp file was created
     assert os.path.exists('tests/tmp')
@@ -0,0 +1,58 @@
+# conftest.py
+"""
+# Shared Test Fixtures
+
+Fixtures shared by every test module. The package keeps several process-wide
+caches (validated credentials, bucket permission maps, pooled S3 clients, tenant managers, bucket regions) which would otherwise
+leak state from one test into the next.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_klingon_file_manager_caches():
+    """
+    # Reset Klingon File Manager Caches
+    Clears the process-wide caches before and after every test. Dropping the
+    default `FileManager` makes sure each test builds its S3 client inside its
+    own `boto3` patches.
+    """
+    from klingon_file_manager.credentials import invalidate_bucket_permissions
+    from klingon_file_manager.regions import invalidate_bucket_regions
+    from klingon_file_manager.session import clear_tenant_managers, reset_default_manager
+    invalidate_bucket_permissions()
+    invalidate_bucket_regions()
+    reset_default_manager()
+    clear_tenant_managers()
+    yield
+    invalidate_bucket_permissions()
+    invalidate_bucket_regions()
+    reset_default_manager()
+    clear_tenant_managers()
+
+
+@pytest.fixture
+def head_client():
+    """
+    # Head Client
+    Factory for mocked S3 clients whose `head_object` describes one object,
+    13 bytes with an MD5 ETag and no metadata unless overridden by keyword,
+    and whose `get_object_acl` returns the owner-only default ACL.
+    """
+    def make(**head):
+        client = MagicMock()
+        client.head_object.return_value = {
+            "ContentLength": 13,
+            "ETag": '"6cd3556deb0da54bca060b4c39479839"',
+            "Metadata": {},
+            **head,
+        }
+        client.get_object_acl.return_value = {
+            "Owner": {"ID": "owner"},
+            "Grants": [{"Grantee": {"Type": "CanonicalUser", "ID": "owner"}, "Permission": "FULL_CONTROL"}],
+        }
+        return client
+
+    return make
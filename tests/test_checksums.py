@@ -0,0 +1,192 @@
+# test_checksums.py
+"""
+# Checksums Tests
+
+This module contains pytest unit tests for the S3 additional checksums in the
+`klingon_file_manager.checksums` module and their use by uploads, downloads
+and moves. CRC32 and SHA256 are used because they need no optional package.
+"""
+import io
+import re
+import zlib
+import base64
+import struct
+import hashlib
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from klingon_file_manager import move_file, post_file
+from klingon_file_manager.checksums import composite_checksum, new_checksum, stored_checksum
+from klingon_file_manager.transfer import MIN_PART_SIZE, download_multipart, upload_multipart
+
+
+def crc32(data):
+    """Base64 CRC32 of `data`, as S3 encodes it."""
+    return base64.b64encode(struct.pack(">I", zlib.crc32(data))).decode()
+
+
+class FakeChecksumClient:
+    """In-memory stand-in for an S3 client that validates CRC32 checksums."""
+
+    def __init__(self, data=b"", part_size=None, checksum=None, metadata=None):
+        self.lock = threading.Lock()
+        self.parts = {}
+        self.created = None
+        self.data = data
+        self.part_size = part_size
+        self.checksum = checksum
+        self.metadata = metadata or {}
+
+    def create_multipart_upload(self, **kwargs):
+        self.created = kwargs
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **kwargs):
+        assert "ContentMD5" not in kwargs
+        assert kwargs["ChecksumAlgorithm"] == "CRC32"
+        assert kwargs["ChecksumCRC32"] == crc32(kwargs["Body"])
+        with self.lock:
+            self.parts[kwargs["PartNumber"]] = kwargs["Body"]
+        return {"ETag": '"part"'}
+
+    def complete_multipart_upload(self, **kwargs):
+        parts = kwargs["MultipartUpload"]["Parts"]
+        assert all(part["ChecksumCRC32"] == crc32(self.parts[part["PartNumber"]]) for part in parts)
+        digests = [base64.b64decode(part["ChecksumCRC32"]) for part in parts]
+        return {"ETag": '"multipart-etag"', "ChecksumCRC32": composite_checksum("CRC32", digests)}
+
+    def head_object(self, **kwargs):
+        size = len(self.data)
+        if "PartNumber" in kwargs:
+            size = min(self.part_size, size)
+        return {
+            "ContentLength": size,
+            "ETag": '"etag"',
+            "Metadata": self.metadata,
+            "ChecksumCRC32": self.checksum,
+        }
+
+    def get_object(self, **kwargs):
+        start, end = map(int, re.fullmatch(r"bytes=(\d+)-(\d+)", kwargs["Range"]).groups())
+        return {"Body": io.BytesIO(self.data[start:end + 1])}
+
+
+def test_checksums_match_s3_encoding():
+    """
+    # Checksums Match S3 Encoding
+    Verifies that CRC32 and SHA256 are base64 encoded big-endian digests and
+    that a composite checksum ends with the part count.
+    """
+    checksum = new_checksum("crc32")
+    checksum.update(b"Hello, ")
+    checksum.update(b"world!")
+    sha256 = new_checksum("SHA256")
+    sha256.update(b"Hello, world!")
+
+    assert checksum.b64digest() == crc32(b"Hello, world!")
+    assert sha256.b64digest() == base64.b64encode(hashlib.sha256(b"Hello, world!").digest()).decode()
+    assert composite_checksum("CRC32", [checksum.digest()]).endswith("-1")
+    assert stored_checksum({"ChecksumSHA256": sha256.b64digest()}) == ("SHA256", sha256.b64digest())
+    with pytest.raises(ValueError):
+        new_checksum("MD4")
+
+
+def test_upload_multipart_sends_part_checksums():
+    """
+    # Upload Multipart Sends Part Checksums
+    Ensures that each part carries its checksum instead of a `ContentMD5` and
+    that the composite checksum of the completed object is returned.
+    """
+    data = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 100)
+    client = FakeChecksumClient()
+
+    response = upload_multipart(
+        client, "bucket", "key", data, part_size=MIN_PART_SIZE, checksum_algorithm="CRC32",
+    )
+
+    assert response["Parts"] == 3
+    assert client.created["ChecksumAlgorithm"] == "CRC32"
+    assert response["ChecksumCRC32"].endswith("-3")
+
+
+def test_download_multipart_verifies_composite_checksum():
+    """
+    # Download Multipart Verifies Composite Checksum
+    Checks that ranges are aligned to the parts, verified against the
+    composite checksum, and that the stored MD5 is returned without hashing.
+    """
+    part_size = MIN_PART_SIZE + 1
+    data = b"c" * (part_size * 2 + 10)
+    digests = [base64.b64decode(crc32(data[i:i + part_size])) for i in range(0, len(data), part_size)]
+    client = FakeChecksumClient(
+        data, part_size=part_size, checksum=composite_checksum("CRC32", digests), metadata={"md5": "stored"},
+    )
+
+    with patch("klingon_file_manager.transfer.hashlib.md5") as md5:
+        result = download_multipart(client, "bucket", "key", checksum=True)
+
+    md5.assert_not_called()
+    assert result["content"] == data
+    assert result["parts"] == 3
+    assert result["verified"] == "checksum"
+    assert result["md5"] == "stored"
+
+
+def test_download_multipart_rejects_full_object_checksum_mismatch():
+    """
+    # Download Multipart Rejects Full Object Checksum Mismatch
+    Verifies that data not matching a full-object checksum raises an error.
+    """
+    client = FakeChecksumClient(b"data", checksum=crc32(b"other"))
+
+    with pytest.raises(IOError):
+        download_multipart(client, "bucket", "key", checksum=True)
+
+
+def test_post_file_sends_checksum():
+    """
+    # Post File Sends Checksum
+    Ensures that a single `put_object` carries the additional checksum next
+    to the MD5, and that the checksum is returned.
+    """
+    client = MagicMock()
+
+    with patch("boto3.client", return_value=client):
+        result = post_file("s3://bucket/hello.txt", "Hello, world!", checksum_algorithm="CRC32")
+
+    assert result["status"] == 200
+    assert result["checksum"] == crc32(b"Hello, world!")
+    kwargs = client.put_object.call_args.kwargs
+    assert kwargs["ChecksumAlgorithm"] == "CRC32"
+    assert kwargs["ChecksumCRC32"] == crc32(b"Hello, world!")
+    assert kwargs["Metadata"]["md5"] == hashlib.md5(b"Hello, world!").hexdigest()
+
+
+def test_post_file_rejects_unknown_algorithm():
+    """
+    # Post File Rejects Unknown Algorithm
+    Checks that an unsupported checksum algorithm is a bad request.
+    """
+    assert post_file("s3://bucket/hello.txt", "Hello", checksum_algorithm="MD4")["status"] == 400
+
+
+@pytest.mark.parametrize("stored, moved", [(True, True), (False, False)])
+def test_move_file_to_s3_compares_checksums(tmp_path, stored, moved):
+    """
+    # Move File To S3 Compares Checksums
+    Verifies that a move to S3 compares the checksum S3 reports for the new
+    object with the one sent, and keeps the source when they differ.
+    """
+    source = tmp_path / "hello.txt"
+    source.write_bytes(b"Hello, world!")
+    client = MagicMock()
+    client.head_object.return_value = {"ChecksumCRC32": crc32(b"Hello, world!" if stored else b"other")}
+
+    with patch("boto3.client", return_value=client):
+        result = move_file(str(source), "s3://bucket/hello.txt", checksum_algorithm="CRC32")
+
+    assert (result["status"] == 200) is moved
+    assert source.exists() is not moved
+    client.head_object.assert_called_once_with(Bucket="bucket", Key="hello.txt", ChecksumMode="ENABLED")
@@ -0,0 +1,124 @@
+# test_copy.py
+"""
+# Copy File Tests
+
+This module contains pytest unit tests for the `copy_file` function from the
+`klingon_file_manager.copy` module, the 'copy' action of `manage_file` and
+S3 to S3 moves.
+"""
+from unittest.mock import MagicMock, patch
+
+from klingon_file_manager import copy_file, manage_file, move_file
+from klingon_file_manager.transfer import MIN_PART_SIZE
+
+MD5 = "6cd3556deb0da54bca060b4c39479839"
+
+
+def test_copy_s3_to_s3_uses_copy_object(head_client):
+    """
+    # Copy S3 To S3 Uses Copy Object
+    Verifies that a copy between buckets is a single server-side
+    `copy_object` that keeps the source metadata.
+    """
+    client = head_client(ContentLength=1024, ContentType="application/octet-stream", Metadata={"md5": MD5})
+
+    with patch("boto3.client", return_value=client):
+        result = copy_file("s3://source/file.bin", "s3://backup/file.bin", debug=True)
+
+    assert result["status"] == 200
+    assert result["md5"] == "6cd3556deb0da54bca060b4c39479839"
+    assert result["debug"]["method"] == "copy_object"
+    client.copy_object.assert_called_once_with(
+        CopySource={"Bucket": "source", "Key": "file.bin"},
+        Bucket="backup",
+        Key="file.bin",
+        MetadataDirective="COPY",
+        CopySourceIfMatch='"6cd3556deb0da54bca060b4c39479839"',
+    )
+    client.get_object.assert_not_called()
+
+
+def test_copy_s3_to_s3_large_object_uses_upload_part_copy(head_client):
+    """
+    # Copy S3 To S3 Large Object Uses Upload Part Copy
+    Ensures that objects over the `copy_object` limit are copied in parallel
+    `UploadPartCopy` parts with the metadata set on the new object.
+    """
+    size = 3 * MIN_PART_SIZE
+    client = head_client(ContentLength=size, ContentType="application/octet-stream", Metadata={"md5": MD5})
+    client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    client.upload_part_copy.return_value = {"CopyPartResult": {"ETag": '"part"'}}
+    client.complete_multipart_upload.return_value = {"ETag": '"copied-3"'}
+
+    with patch("klingon_file_manager.copy.MAX_COPY_OBJECT_SIZE", MIN_PART_SIZE), \
+            patch("klingon_file_manager.transfer.COPY_PART_SIZE", MIN_PART_SIZE), \
+            patch("boto3.client", return_value=client):
+        result = copy_file("s3://source/large.bin", "s3://backup/large.bin", debug=True)
+
+    assert result["status"] == 200
+    assert result["debug"]["parts"] == 3
+    client.copy_object.assert_not_called()
+    client.create_multipart_upload.assert_called_once_with(
+        Bucket="backup",
+        Key="large.bin",
+        Metadata={"md5": "6cd3556deb0da54bca060b4c39479839"},
+        ContentType="application/octet-stream",
+    )
+    ranges = {call.kwargs["CopySourceRange"] for call in client.upload_part_copy.call_args_list}
+    assert ranges == {
+        f"bytes=0-{MIN_PART_SIZE - 1}",
+        f"bytes={MIN_PART_SIZE}-{2 * MIN_PART_SIZE - 1}",
+        f"bytes={2 * MIN_PART_SIZE}-{size - 1}",
+    }
+    client.complete_multipart_upload.assert_called_once()
+
+
+def test_manage_file_copy_action_local(tmp_path):
+    """
+    # Manage File Copy Action Local
+    Checks that the 'copy' action copies a local file and leaves the source
+    in place.
+    """
+    src_path = tmp_path / "source.txt"
+    dst_path = tmp_path / "copy.txt"
+    src_path.write_bytes(b"Hello, world!")
+
+    result = manage_file("copy", str(src_path), dst_path=str(dst_path))
+
+    assert result["status"] == 200
+    assert result["destination"] == str(dst_path)
+    assert dst_path.read_bytes() == src_path.read_bytes() == b"Hello, world!"
+
+
+def test_copy_missing_local_file_to_s3_fails(tmp_path):
+    """
+    # Copy Missing Local File To S3 Fails
+    Ensures that a missing local source is reported instead of being uploaded
+    as text content.
+    """
+    client = MagicMock()
+
+    with patch("boto3.client", return_value=client):
+        result = copy_file(str(tmp_path / "missing.txt"), "s3://bucket/file.txt")
+
+    assert result["status"] == 500
+    client.put_object.assert_not_called()
+
+
+def test_move_file_s3_to_s3_copies_server_side(head_client):
+    """
+    # Move File S3 To S3 Copies Server Side
+    Verifies that a move between S3 locations copies inside S3 and then
+    deletes the source, without downloading the object.
+    """
+    client = head_client(ContentLength=1024, ContentType="application/octet-stream", Metadata={"md5": MD5})
+
+    with patch("boto3.client", return_value=client), \
+            patch("klingon_file_manager.manage.get_file") as mock_get_file:
+        result = move_file("s3://source/file.bin", "s3://backup/file.bin")
+
+    assert result["status"] == 200
+    assert result["md5"] == "6cd3556deb0da54bca060b4c39479839"
+    client.copy_object.assert_called_once()
+    client.delete_object.assert_called_once_with(Bucket="source", Key="file.bin")
+    mock_get_file.assert_not_called()
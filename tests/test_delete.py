@@ -9,6 +9,7 @@ under various conditions.
 """
 import pytest
 from unittest.mock import MagicMock, patch
+from botocore.exceptions import NoCredentialsError
 from klingon_file_manager.delete import delete_file
 
 
@@ -47,11 +48,12 @@ def test_delete_local_file_failure():
 def test_delete_s3_file_success():
     """
     # Delete S3 File Success
-    Tests successful deletion of a file from S3. It mocks AWS credential retrieval and the `boto3.client` to simulate S3 interactions.
-    Verifies that `delete_object` is called with the correct parameters and that the response indicates successful deletion from S3.
+    Tests successful deletion of a file from S3. It mocks the `boto3.client` to simulate S3 interactions.
+    Verifies that `delete_object` is called with the correct parameters, that no credential check is made
+    up front and that the response indicates successful deletion from S3.
     """
-    # Patch the get_aws_credentials function to return successful status to simulate having valid AWS credentials.
-    with patch("klingon_file_manager.delete.get_aws_credentials", return_value={"status": 200}):
+    # Fail the test if the slow credential and bucket permission scan is used.
+    with patch("klingon_file_manager.utils.get_aws_credentials", side_effect=AssertionError("credential scan")):
         # Mock the boto3 client to simulate interaction with AWS S3 without making actual network calls.
         with patch("boto3.client") as mock_client:
             mock_s3 = MagicMock()
@@ -67,11 +69,15 @@ def test_delete_s3_file_success():
 def test_delete_s3_file_no_credentials():
     """
     # Delete S3 File No Credentials
-    Tests file deletion from S3 when AWS credentials are missing. It simulates missing credentials by returning a 403 status.
+    Tests file deletion from S3 when AWS credentials are missing. It simulates missing credentials by making
+    `delete_object` raise `NoCredentialsError`.
     Verifies that the response indicates failure due to missing AWS credentials.
     """
-    # Patch the get_aws_credentials function to return a 403 status to simulate missing AWS credentials.
-    with patch("klingon_file_manager.delete.get_aws_credentials", return_value={"status": 403}):
+    # Mock the boto3 client so that the delete request fails for lack of credentials.
+    with patch("boto3.client") as mock_client:
+        mock_s3 = MagicMock()
+        mock_s3.delete_object.side_effect = NoCredentialsError()
+        mock_client.return_value = mock_s3
         # Call the delete_file function with the S3 URI of the file we want to delete.
         response = delete_file("s3://bucket/file")
         # Assert that the response indicates a failure due to missing AWS credentials.
@@ -81,23 +87,21 @@ def test_delete_s3_file_no_credentials():
 def test_delete_s3_file_failure():
     """
     # Delete S3 File Failure
-    Tests S3 file deletion when an S3-related exception occurs. It mocks AWS credential retrieval and the `boto3.client`, causing an exception.
+    Tests S3 file deletion when an S3-related exception occurs. It mocks the `boto3.client`, causing an exception.
     Verifies that the response indicates a failure in deleting from S3 and contains exception details in debug mode.
     """
-    # Patch the get_aws_credentials function to return successful status to simulate having valid AWS credentials.
-    with patch("klingon_file_manager.delete.get_aws_credentials", return_value={"status": 200}):
-        # Mock the boto3 client and simulate an exception during the S3 delete operation.
-        with patch("boto3.client") as mock_client:
-            mock_s3 = MagicMock()
-            mock_s3.delete_object.side_effect = Exception("S3 Error")
-            mock_client.return_value = mock_s3
-            # Call the delete_file function with the S3 URI of the file we want to delete and debug mode enabled.
-            response = delete_file("s3://bucket/file", debug=True)
-            # Assert that the response status and message indicate a failure in deleting from S3.
-            assert response["status"] == 500
-            assert response["message"] == "Failed to delete file from S3."
-            # Assert that the debug information contains the exception details.
-            assert "exception" in response["debug"]
+    # Mock the boto3 client and simulate an exception during the S3 delete operation.
+    with patch("boto3.client") as mock_client:
+        mock_s3 = MagicMock()
+        mock_s3.delete_object.side_effect = Exception("S3 Error")
+        mock_client.return_value = mock_s3
+        # Call the delete_file function with the S3 URI of the file we want to delete and debug mode enabled.
+        response = delete_file("s3://bucket/file", debug=True)
+        # Assert that the response status and message indicate a failure in deleting from S3.
+        assert response["status"] == 500
+        assert response["message"] == "Failed to delete file from S3."
+        # Assert that the debug information contains the exception details.
+        assert "exception" in response["debug"]
 
 def test_delete_file_general_exception():
     """
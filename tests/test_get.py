@@ -212,3 +212,128 @@ def test_get_file_from_local_exception(mock_open_file, mock_is_binary_file):
     assert response["status"] == 500
     assert "File Read Error" in response["debug"]["exception"]
 
+
+def test_get_file_stream_from_local(tmp_path):
+    """
+    # Get File Stream from Local
+    Tests that `stream=True` returns a reader over the local file which yields
+    chunks and computes the MD5 hash and size as it is consumed.
+    """
+    import hashlib
+    data = b"0123456789" * 1000
+    path = tmp_path / "large.bin"
+    path.write_bytes(data)
+
+    response = get_file(str(path), stream=True)
+    assert response["status"] == 200
+    assert response["content_size"] == len(data)
+    assert response["binary"] is False
+    with response["content"] as reader:
+        reader.chunk_size = 4096
+        chunks = list(reader)
+    assert [len(chunk) for chunk in chunks] == [4096, 4096, 1808]
+    assert b"".join(chunks) == data
+    assert reader.size == len(data)
+    assert reader.md5 == hashlib.md5(data).hexdigest()
+
+def test_get_file_stream_from_s3():
+    """
+    # Get File Stream from S3
+    Tests that `stream=True` wraps the S3 `StreamingBody` without reading it
+    up front and verifies the computed MD5 against the stored metadata.
+    """
+    import io
+    import hashlib
+    data = b"\x00\xff" * 16384
+    body = io.BytesIO(data)
+    with patch('boto3.resource') as mock_resource:
+        mock_resource.return_value.Object.return_value.get.return_value = {
+            "Body": body,
+            "ContentLength": len(data),
+            "Metadata": {"md5": hashlib.md5(data).hexdigest()},
+        }
+        response = get_file("s3://mocked_bucket/mocked_key", stream=True)
+
+    reader = response["content"]
+    assert response["binary"] is True
+    assert response["md5"] == hashlib.md5(data).hexdigest()
+    assert body.tell() < len(data)
+    assert reader.verify() is None
+    assert reader.read(100) + reader.read() == data
+    assert reader.verify() is True
+    reader.close()
+    assert body.closed
+
+def test_get_file_range_from_local(tmp_path):
+    """
+    # Get File Range from Local
+    Tests that `offset` and `length` read only the requested slice of a local
+    file, that a negative offset counts back from the end, and that a range
+    past the end of the file is rejected with 416.
+    """
+    import hashlib
+    data = bytes(range(256)) * 4
+    path = tmp_path / "indexed.bin"
+    path.write_bytes(data)
+
+    response = get_file(str(path), offset=100, length=28)
+    assert response["status"] == 200
+    assert response["content"] == data[100:128]
+    assert response["md5"] == hashlib.md5(data[100:128]).hexdigest()
+    assert response["range"] == {"offset": 100, "length": 28, "total_size": 1024}
+
+    response = get_file(str(path), offset=-16)
+    assert response["content"] == data[-16:]
+    assert response["range"]["offset"] == 1008
+
+    response = get_file(str(path), offset=1000, length=100, stream=True)
+    with response["content"] as reader:
+        assert reader.read() == data[1000:]
+    assert response["range"]["length"] == 24
+
+    assert get_file(str(path), offset=1024)["status"] == 416
+    assert get_file(str(path), offset=-1, length=1)["status"] == 400
+
+def test_get_file_range_from_s3():
+    """
+    # Get File Range from S3
+    Tests that a byte range is fetched with an S3 `Range` GET and that the
+    returned range is read from `Content-Range`.
+    """
+    with patch('boto3.resource') as mock_resource:
+        s3_object = mock_resource.return_value.Object.return_value
+        s3_object.get.return_value = {
+            "Body": MagicMock(read=lambda: b"footer"),
+            "ContentRange": "bytes 994-999/1000",
+        }
+        response = get_file("s3://mocked_bucket/mocked_key", offset=-6)
+
+    s3_object.get.assert_called_once_with(Range="bytes=-6")
+    assert response["content"] == b"footer"
+    assert response["range"] == {"offset": 994, "length": 6, "total_size": 1000}
+
+def test_get_file_mmap_from_local(tmp_path):
+    """
+    # Get File mmap from Local
+    Tests that `mmap=True` returns a read-only memoryview over the file,
+    hashed and classified without a copy, and that ranges slice the mapping.
+    """
+    import hashlib
+    data = "naïve text\n".encode("utf-8") * 1000
+    path = tmp_path / "mapped.txt"
+    path.write_bytes(data)
+
+    response = get_file(str(path), mmap=True)
+    view = response["content"]
+    assert isinstance(view, memoryview) and view.readonly
+    assert view == data
+    assert response["binary"] is False
+    assert response["md5"] == hashlib.md5(data).hexdigest()
+
+    response = get_file(str(path), mmap=True, offset=12, length=10)
+    assert response["content"].tobytes() == data[12:22]
+    assert response["range"] == {"offset": 12, "length": 10, "total_size": len(data)}
+
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    assert get_file(str(empty), mmap=True)["content"] == b""
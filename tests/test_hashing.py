@@ -0,0 +1,201 @@
+# test_hashing.py
+"""
+# Hashing Tests
+
+This module contains pytest unit tests for the single-pass content analysis
+in the `klingon_file_manager.hashing` module and its use by `post_file`, and
+for resolving the MD5 of S3 objects without downloading them.
+"""
+import io
+import hashlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from klingon_file_manager import check_file_exists, get_md5_hash_filename, post_file
+from klingon_file_manager.hashing import MIME_SAMPLE_BYTES, analyze_content, etag_md5, resolve_md5
+
+
+def test_analyze_content_encodes_and_hashes_once():
+    """
+    # Analyze Content Encodes And Hashes Once
+    Verifies that `str` content is encoded to UTF-8 and its MD5 and byte size
+    are computed from the encoded bytes.
+    """
+    analysis = analyze_content("Grüße, world!")
+    data = "Grüße, world!".encode("utf-8")
+    assert analysis.data == data
+    assert analysis.md5 == hashlib.md5(data).hexdigest()
+    assert analysis.size == len(data)
+    assert analyze_content(analysis) is analysis
+
+
+def test_analyze_content_samples_mime_lazily():
+    """
+    # Analyze Content Samples MIME Lazily
+    Ensures that only a bounded sample is kept for MIME detection and that
+    the type is detected once, on first access.
+    """
+    analysis = analyze_content(b"\x00" * (MIME_SAMPLE_BYTES * 2))
+    assert len(analysis.sample) == MIME_SAMPLE_BYTES
+
+    with patch("klingon_file_manager.utils.get_mime_type_content", return_value="application/octet-stream") as mock_mime:
+        assert analysis.content_type == "application/octet-stream"
+        assert analysis.content_type == "application/octet-stream"
+    mock_mime.assert_called_once_with(analysis.sample)
+
+
+def test_post_to_s3_analyses_content_once():
+    """
+    # Post To S3 Analyses Content Once
+    Checks that a post to S3 analyses the content a single time and sends the
+    resulting MD5, size and bytes with the upload.
+    """
+    content = "Hello, world!"
+    client = MagicMock()
+
+    with patch("klingon_file_manager.post.analyze_content", wraps=analyze_content) as mock_analyze, \
+            patch("boto3.client", return_value=client):
+        result = post_file("s3://bucket/hello.txt", content)
+
+    assert result["status"] == 200
+    assert result["md5"] == hashlib.md5(content.encode()).hexdigest()
+    mock_analyze.assert_called_once_with(content)
+    kwargs = client.put_object.call_args.kwargs
+    assert kwargs["Body"] == content.encode()
+    assert kwargs["Metadata"]["md5"] == result["md5"]
+    assert kwargs["Metadata"]["file-size-bytes"] == "13"
+
+
+def test_post_to_local_skips_mime_detection(tmp_path):
+    """
+    # Post To Local Skips MIME Detection
+    Verifies that a local post writes the analysed bytes and never detects a
+    MIME type it has nowhere to store.
+    """
+    path = tmp_path / "hello.txt"
+
+    with patch("klingon_file_manager.utils.get_mime_type_content") as mock_mime:
+        result = post_file(str(path), "Hello, world!")
+
+    assert result["status"] == 200
+    assert result["md5"] == hashlib.md5(b"Hello, world!").hexdigest()
+    assert path.read_bytes() == b"Hello, world!"
+    mock_mime.assert_not_called()
+
+
+class DroppingBody(io.BytesIO):
+    """Body whose connection drops after `limit` bytes."""
+
+    def __init__(self, data, limit):
+        super().__init__(data)
+        self.limit = limit
+
+    def read(self, size=-1):
+        if self.tell() >= self.limit:
+            raise ConnectionError("connection reset")
+        return super().read(min(size, self.limit - self.tell()))
+
+
+@pytest.mark.parametrize("head, expected", [
+    ({"ETag": '"6cd3556deb0da54bca060b4c39479839"'}, "6cd3556deb0da54bca060b4c39479839"),
+    ({"ETag": '"6cd3556deb0da54bca060b4c39479839-2"'}, None),
+    ({"ETag": '"6cd3556deb0da54bca060b4c39479839"', "ServerSideEncryption": "aws:kms"}, None),
+    ({"ETag": '"6cd3556deb0da54bca060b4c39479839"', "SSECustomerAlgorithm": "AES256"}, None),
+    ({"ETag": '"6cd3556deb0da54bca060b4c39479839"', "ServerSideEncryption": "AES256"},
+     "6cd3556deb0da54bca060b4c39479839"),
+])
+def test_etag_md5_only_trusts_single_part_unencrypted_etags(head, expected):
+    """
+    # ETag MD5 Only Trusts Single Part Unencrypted ETags
+    Verifies that multipart, SSE-KMS and SSE-C ETags are not taken for MD5s.
+    """
+    assert etag_md5(head) == expected
+
+
+def test_get_md5_hash_filename_uses_etag_without_download():
+    """
+    # Get MD5 Hash Filename Uses ETag Without Download
+    Ensures that an object without `md5` metadata is answered from its ETag
+    with a single HEAD instead of raising `KeyError`.
+    """
+    md5 = hashlib.md5(b"Hello, world!").hexdigest()
+    client = MagicMock()
+    client.head_object.return_value = {"ETag": f'"{md5}"', "Metadata": {}}
+
+    with patch("boto3.client", return_value=client):
+        assert get_md5_hash_filename("s3://bucket/hello.txt") == md5
+
+    client.get_object.assert_not_called()
+
+
+def test_resolve_md5_hashes_kms_object_resuming_dropped_connection():
+    """
+    # Resolve MD5 Hashes KMS Object Resuming Dropped Connection
+    Checks that an SSE-KMS object is streamed and hashed, and that a dropped
+    connection resumes with a ranged GET pinned to the ETag.
+    """
+    data = b"x" * 5000
+    client = MagicMock()
+    client.head_object.return_value = {
+        "ETag": '"0123456789abcdef0123456789abcdef"',
+        "ContentLength": len(data),
+        "ServerSideEncryption": "aws:kms",
+        "Metadata": {},
+    }
+    client.get_object.side_effect = [
+        {"Body": DroppingBody(data, 1000)},
+        {"Body": io.BytesIO(data[1000:])},
+    ]
+
+    with patch("boto3.client", return_value=client), patch("klingon_file_manager.hashing.time.sleep"):
+        result = resolve_md5("s3://bucket/secret.bin")
+
+    assert result == {"md5": hashlib.md5(data).hexdigest(), "source": "hash"}
+    assert client.get_object.call_args.kwargs["Range"] == "bytes=1000-"
+    assert client.get_object.call_args.kwargs["IfMatch"] == '"0123456789abcdef0123456789abcdef"'
+
+
+def test_resolve_md5_fails_at_once_on_replaced_object():
+    """
+    # Resolve MD5 Fails At Once On Replaced Object
+    Verifies that the `PreconditionFailed` raised when the pinned object has
+    been replaced is not retried, while a 5xx response is.
+    """
+    from botocore.exceptions import ClientError
+
+    def client_error(code, status):
+        return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "GetObject")
+
+    data = b"x" * 100
+    client = MagicMock()
+    client.head_object.return_value = {
+        "ETag": '"0123456789abcdef0123456789abcdef-2"', "ContentLength": len(data), "Metadata": {},
+    }
+    client.get_object.side_effect = client_error("PreconditionFailed", 412)
+
+    with patch("boto3.client", return_value=client), patch("klingon_file_manager.hashing.time.sleep") as sleep:
+        with pytest.raises(ClientError):
+            resolve_md5("s3://bucket/replaced.bin")
+        sleep.assert_not_called()
+        assert client.get_object.call_count == 1
+
+        client.get_object.side_effect = [client_error("SlowDown", 503), {"Body": io.BytesIO(data)}]
+        assert resolve_md5("s3://bucket/replaced.bin")["md5"] == hashlib.md5(data).hexdigest()
+        sleep.assert_called_once()
+
+
+def test_get_md5_hash_filename_missing_object_returns_none():
+    """
+    # Get MD5 Hash Filename Missing Object Returns None
+    Verifies that a missing S3 object is reported like a missing local file.
+    """
+    client = MagicMock()
+    client.head_object.side_effect = Exception("Not Found")
+
+    with patch("boto3.client", return_value=client):
+        assert get_md5_hash_filename("s3://bucket/missing.txt") is None
+        assert check_file_exists("s3://bucket/missing.txt") is False
+        client.head_object.side_effect = None
+        client.head_object.return_value = {"ETag": '"etag"'}
+        assert check_file_exists("s3://bucket/plain.txt") is True
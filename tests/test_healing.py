@@ -0,0 +1,169 @@
+# test_healing.py
+"""
+# Healing Tests
+
+This module contains pytest unit tests for the background MD5 metadata
+healing in the `klingon_file_manager.healing` module and its use by
+`get_file`.
+"""
+import io
+import hashlib
+import threading
+from unittest.mock import MagicMock, patch
+
+from klingon_file_manager import get_file
+from klingon_file_manager.healing import MD5Healer, get_md5_healer
+
+MD5 = "6cd3556deb0da54bca060b4c39479839"
+ETAG = '"0123456789abcdef0123456789abcdef-2"'
+
+
+def test_healer_replaces_metadata_keeping_object_settings(head_client):
+    """
+    # Healer Replaces Metadata Keeping Object Settings
+    Verifies that the object is copied onto itself with `md5` added to its
+    metadata, pinned to the hashed ETag, and that the content type, storage
+    class and KMS encryption are carried over.
+    """
+    client = head_client(
+        Metadata={"owner": "etl"},
+        ContentType="text/csv",
+        StorageClass="STANDARD_IA",
+        ServerSideEncryption="aws:kms",
+        SSEKMSKeyId="key-1",
+    )
+    healer = MD5Healer(rate=0)
+
+    assert healer.schedule(client, "bucket", "data.csv", MD5, ETAG)
+    healer.wait()
+
+    client.head_object.assert_called_once_with(Bucket="bucket", Key="data.csv", IfMatch=ETAG)
+    client.copy_object.assert_called_once_with(
+        CopySource={"Bucket": "bucket", "Key": "data.csv"},
+        Bucket="bucket",
+        Key="data.csv",
+        Metadata={"owner": "etl", "md5": MD5},
+        MetadataDirective="REPLACE",
+        ContentType="text/csv",
+        StorageClass="STANDARD_IA",
+        ServerSideEncryption="aws:kms",
+        SSEKMSKeyId="key-1",
+        CopySourceIfMatch=ETAG,
+    )
+
+
+def test_healer_keeps_object_grants(head_client):
+    """
+    # Healer Keeps Object Grants
+    Ensures that the grants of a public or shared object are sent with the
+    copy, so healing does not make it private, and that an object whose ACL
+    cannot be read is left alone.
+    """
+    client = head_client()
+    client.get_object_acl.return_value = {
+        "Owner": {"ID": "owner"},
+        "Grants": [
+            {"Grantee": {"Type": "CanonicalUser", "ID": "owner"}, "Permission": "FULL_CONTROL"},
+            {"Grantee": {"Type": "CanonicalUser", "ID": "partner"}, "Permission": "READ"},
+            {"Grantee": {"Type": "Group", "URI": "http://acs.amazonaws.com/groups/global/AllUsers"},
+             "Permission": "READ"},
+        ],
+    }
+    unreadable = head_client()
+    unreadable.get_object_acl.side_effect = Exception("AccessDenied")
+    healer = MD5Healer(rate=0)
+
+    healer.schedule(client, "bucket", "public.bin", MD5)
+    healer.schedule(unreadable, "bucket", "unreadable.bin", MD5)
+    healer.wait()
+
+    kwargs = client.copy_object.call_args.kwargs
+    assert kwargs["GrantFullControl"] == 'id="owner"'
+    assert kwargs["GrantRead"] == 'id="partner", uri="http://acs.amazonaws.com/groups/global/AllUsers"'
+    unreadable.copy_object.assert_not_called()
+
+
+def test_healer_skips_objects_it_cannot_or_need_not_copy(head_client):
+    """
+    # Healer Skips Objects It Cannot Or Need Not Copy
+    Ensures that objects which already have an MD5, or are encrypted with
+    SSE-C, are not copied.
+    """
+    healer = MD5Healer(rate=0)
+    healed = head_client(Metadata={"md5": MD5})
+    customer_key = head_client(SSECustomerAlgorithm="AES256")
+
+    healer.schedule(healed, "bucket", "healed.bin", MD5)
+    healer.schedule(customer_key, "bucket", "secret.bin", MD5)
+    healer.wait()
+
+    healed.copy_object.assert_not_called()
+    customer_key.copy_object.assert_not_called()
+
+
+def test_healer_queues_each_object_once(head_client):
+    """
+    # Healer Queues Each Object Once
+    Checks that an object already waiting is not queued again and that a
+    full queue drops new objects.
+    """
+    release = threading.Event()
+
+    def head_object(**kwargs):
+        release.wait()
+        return {"Metadata": {"md5": MD5}}
+
+    client = head_client()
+    client.head_object.side_effect = head_object
+    healer = MD5Healer(rate=0, max_queue=2)
+
+    assert healer.schedule(client, "bucket", "a", MD5)
+    assert not healer.schedule(client, "bucket", "a", MD5)
+    assert healer.schedule(client, "bucket", "b", MD5)
+    assert not healer.schedule(client, "bucket", "c", MD5)
+    release.set()
+    healer.wait()
+
+    assert healer.schedule(client, "bucket", "a", MD5)
+    healer.wait()
+
+
+def test_healer_is_rate_limited():
+    """
+    # Healer Is Rate Limited
+    Verifies that copies are spaced by the configured rate.
+    """
+    healer = MD5Healer(rate=2)
+
+    with patch("klingon_file_manager.healing.time.monotonic", return_value=100.0), \
+            patch("klingon_file_manager.healing.time.sleep") as sleep:
+        healer._throttle()
+        healer._throttle()
+
+    sleep.assert_called_once_with(0.5)
+
+
+def test_get_file_heals_missing_md5(head_client):
+    """
+    # Get File Heals Missing MD5
+    Ensures that a get which had to hash an object without `md5` metadata
+    queues the hash to be written back, and that objects whose ETag is the
+    MD5 are left alone.
+    """
+    content = b"Hello, world!"
+    client = head_client()
+    resource = MagicMock()
+    resource.Object.return_value.metadata = {}
+    resource.Object.return_value.get.return_value = {"Body": io.BytesIO(content), "ETag": ETAG}
+
+    with patch("boto3.client", return_value=client), patch("boto3.resource", return_value=resource):
+        result = get_file("s3://bucket/hello.txt", debug=True, heal_md5=True)
+        get_md5_healer().wait()
+
+    assert result["md5"] == hashlib.md5(content).hexdigest()
+    assert result["debug"]["md5_heal"] is True
+    assert client.copy_object.call_args.kwargs["Metadata"] == {"md5": result["md5"]}
+
+    resource.Object.return_value.get.return_value = {"Body": io.BytesIO(content), "ETag": f'"{MD5}"'}
+    with patch("boto3.client", return_value=client), patch("boto3.resource", return_value=resource):
+        assert get_file("s3://bucket/hello.txt", debug=True, heal_md5=True)["debug"]["md5_heal"] is False
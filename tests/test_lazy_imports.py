@@ -0,0 +1,86 @@
+# test_lazy_imports.py
+"""
+# Lazy Import Tests
+
+This module contains pytest unit tests that guard the package's startup cost.
+Importing `klingon_file_manager` and working with local files must not import
+boto3, botocore or libmagic. Each test runs in a fresh interpreter so that
+modules imported by other tests do not leak in.
+"""
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code, **env):
+    """
+    # Run Python
+    Runs `code` in a fresh interpreter with the project on the path and returns
+    its stdout.
+    """
+    environment = dict(os.environ, PYTHONPATH=PROJECT_ROOT, **env)
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=environment,
+    ).stdout.strip()
+
+
+def test_import_does_not_load_heavy_dependencies():
+    """
+    # Import Does Not Load Heavy Dependencies
+    Ensures that importing the package and its public names leaves boto3,
+    botocore and magic unimported.
+    """
+    output = run_python(
+        "import sys\n"
+        "import klingon_file_manager\n"
+        "from klingon_file_manager import manage_file, get_file, post_file, delete_file, move_file\n"
+        "print(sorted(m for m in ('boto3', 'botocore', 'magic') if m in sys.modules))\n"
+    )
+    assert output == "[]"
+
+
+def test_local_get_does_not_load_aws(tmp_path):
+    """
+    # Local Get Does Not Load AWS
+    Ensures that reading a local file never imports the AWS SDK.
+    """
+    path = tmp_path / "local.txt"
+    path.write_text("hello")
+    output = run_python(
+        "import sys\n"
+        "from klingon_file_manager import get_file\n"
+        f"assert get_file({str(path)!r})['status'] == 200\n"
+        "print(sorted(m for m in ('boto3', 'botocore') if m in sys.modules))\n"
+    )
+    assert output == "[]"
+
+
+def test_fast_startup_skips_dotenv():
+    """
+    # Fast Startup Skips Dotenv
+    Ensures that `KFM_FAST_STARTUP=1` defers loading of the .env file.
+    """
+    output = run_python(
+        "import sys\n"
+        "import klingon_file_manager.utils\n"
+        "print('dotenv' in sys.modules)\n",
+        KFM_FAST_STARTUP="1",
+    )
+    assert output == "False"
+
+
+def test_lazy_names_are_still_patchable():
+    """
+    # Lazy Names Are Still Patchable
+    Ensures that lazily imported names such as `Session` can be resolved as
+    module attributes.
+    """
+    from klingon_file_manager import utils
+    from boto3 import Session
+    assert utils.Session is Session
@@ -0,0 +1,162 @@
+# test_md5cache.py
+"""
+# MD5 Cache Tests
+
+This module contains pytest unit tests for the local file content hash cache
+in the `klingon_file_manager.md5cache` module and its use by
+`get_md5_hash_filename` and `get_file`. Test files are given an old
+modification time, as files modified in the last two seconds are not cached.
+"""
+import os
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from klingon_file_manager import get_file, get_md5_hash_filename
+from klingon_file_manager.md5cache import (
+    MD5Cache,
+    MemoryMD5Cache,
+    SQLiteMD5Cache,
+    XattrMD5Cache,
+    cached_md5,
+    get_md5_cache,
+    set_md5_cache,
+    stat_key,
+)
+
+OLD_MTIME_NS = 1_600_000_000_000_000_000
+
+
+@pytest.fixture
+def memory_cache():
+    """Install an empty in-memory cache for the test, restoring the previous one."""
+    previous = get_md5_cache()
+    cache = MemoryMD5Cache()
+    set_md5_cache(cache)
+    yield cache
+    set_md5_cache(previous)
+
+
+def write_old(path, content, mtime_ns=OLD_MTIME_NS):
+    """Write `content` to `path` and backdate its modification time."""
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_repeat_hash_takes_only_a_stat(tmp_path, memory_cache):
+    """
+    # Repeat Hash Takes Only A Stat
+    Verifies that a file is read the first time it is hashed and served from
+    the cache afterwards, by both `cached_md5` and `get_md5_hash_filename`.
+    """
+    path = write_old(tmp_path / "data.bin", b"Hello, world!")
+    expected = hashlib.md5(b"Hello, world!").hexdigest()
+
+    assert cached_md5(path) == expected
+    with patch("klingon_file_manager.md5cache.hashlib.md5") as md5:
+        assert cached_md5(path) == expected
+        steps = get_md5_hash_filename(path, debug=True)["steps"]
+    md5.assert_not_called()
+    assert "MD5 hash taken from cache" in steps
+
+
+def test_changed_file_is_hashed_again(tmp_path, memory_cache):
+    """
+    # Changed File Is Hashed Again
+    Ensures that a new size or modification time invalidates the entry, and
+    that a file modified just now is hashed but not cached.
+    """
+    path = write_old(tmp_path / "data.bin", b"Hello, world!")
+    cached_md5(path)
+
+    write_old(tmp_path / "data.bin", b"Hello, there!", OLD_MTIME_NS + 1)
+    assert cached_md5(path) == hashlib.md5(b"Hello, there!").hexdigest()
+
+    (tmp_path / "data.bin").write_bytes(b"Goodbye")
+    assert stat_key(os.stat(path)) is None
+    assert cached_md5(path) == hashlib.md5(b"Goodbye").hexdigest()
+    assert len(memory_cache._entries) == 1
+
+
+def test_memory_cache_drops_least_recently_used():
+    """
+    # Memory Cache Drops Least Recently Used
+    Checks that the in-memory cache keeps at most `max_entries` files.
+    """
+    cache = MemoryMD5Cache(max_entries=2)
+    cache.put("a", (1, 1, 5, 10), "a" * 32)
+    cache.put("b", (1, 2, 5, 10), "b" * 32)
+    assert cache.get("a", (1, 1, 5, 10)) == "a" * 32
+    cache.put("c", (1, 3, 5, 10), "c" * 32)
+
+    assert cache.get("b", (1, 2, 5, 10)) is None
+    assert cache.get("a", (1, 1, 5, 11)) is None
+    assert cache.get("c", (1, 3, 5, 10)) == "c" * 32
+
+
+def test_incomplete_backend_cannot_be_created():
+    """
+    # Incomplete Backend Cannot Be Created
+    Ensures that a backend missing `put()` fails when it is constructed
+    rather than on its first lookup.
+    """
+    class GetOnlyCache(MD5Cache):
+        def get(self, path, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyCache()
+
+
+def test_sqlite_cache_persists_between_instances(tmp_path):
+    """
+    # SQLite Cache Persists Between Instances
+    Verifies that entries written by one `SQLiteMD5Cache` are read by another
+    over the same database, and only for a matching stat key.
+    """
+    database = str(tmp_path / "cache" / "md5.sqlite3")
+    SQLiteMD5Cache(database).put("data.bin", (1, 2, 13, 10), "d" * 32)
+
+    cache = SQLiteMD5Cache(database)
+    assert cache.get("data.bin", (1, 2, 13, 10)) == "d" * 32
+    assert cache.get("data.bin", (1, 2, 13, 11)) is None
+
+
+def test_xattr_cache_stores_key_with_file(tmp_path):
+    """
+    # Xattr Cache Stores Key With File
+    Ensures that the xattr backend returns a hash only for the stat key it
+    was stored under.
+    """
+    path = write_old(tmp_path / "data.bin", b"Hello, world!")
+    try:
+        cache = XattrMD5Cache()
+        os.setxattr(path, "user.kfm.test", b"1")
+    except OSError:
+        pytest.skip("Extended attributes are not supported here")
+    key = stat_key(os.stat(path))
+
+    cache.put(path, key, "e" * 32)
+
+    assert cache.get(path, key) == "e" * 32
+    assert cache.get(path, key[:3] + (key[3] + 1,)) is None
+    assert os.stat(path).st_mtime_ns == OLD_MTIME_NS
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_get_file_uses_cached_hash(tmp_path, memory_cache, mmap):
+    """
+    # Get File Uses Cached Hash
+    Checks that a local get takes the MD5 from the cache when the file is
+    unchanged, whether it is read or memory mapped.
+    """
+    path = write_old(tmp_path / "data.bin", b"Hello, world!")
+    cached_md5(path)
+
+    with patch("klingon_file_manager.get.get_md5_hash") as get_md5_hash:
+        result = get_file(path, mmap=mmap)
+
+    get_md5_hash.assert_not_called()
+    assert result["md5"] == hashlib.md5(b"Hello, world!").hexdigest()
@@ -0,0 +1,90 @@
+# test_mime.py
+"""
+# MIME Tests
+
+This module contains pytest unit tests for the MIME detection in the
+`klingon_file_manager.mime` module and its use by `post_file`. libmagic is
+mocked where a test counts how it is called.
+"""
+import threading
+from unittest.mock import MagicMock, patch
+
+from klingon_file_manager import get_mime_type_content, post_file
+from klingon_file_manager.mime import MimeDetector
+
+
+def test_detector_reuses_one_magic_per_thread():
+    """
+    # Detector Reuses One Magic Per Thread
+    Verifies that each thread creates a single `magic.Magic` and reuses it
+    for every detection.
+    """
+    magic = MagicMock()
+    detector = MimeDetector()
+
+    with patch("klingon_file_manager.utils.magic", magic, create=True):
+        detector.sniff(b"one")
+        detector.sniff(b"two")
+        thread = threading.Thread(target=detector.sniff, args=(b"three",))
+        thread.start()
+        thread.join()
+
+    assert magic.Magic.call_count == 2
+    magic.Magic.assert_called_with(mime=True)
+
+
+def test_sniff_passes_only_a_bounded_prefix():
+    """
+    # Sniff Passes Only A Bounded Prefix
+    Ensures that libmagic is given at most `sniff_bytes` of the content,
+    whether it is bytes, a memory view or a string.
+    """
+    magic = MagicMock()
+    detector = MimeDetector(sniff_bytes=16)
+
+    with patch("klingon_file_manager.utils.magic", magic, create=True):
+        detector.sniff(b"x" * 1000)
+        detector.sniff(memoryview(b"y" * 1000))
+        detector.sniff("é" * 1000)
+
+    samples = [call.args[0] for call in magic.Magic.return_value.from_buffer.call_args_list]
+    assert samples[:2] == [b"x" * 16, b"y" * 16]
+    assert len(samples[2]) == 16
+
+
+def test_known_extensions_skip_sniffing():
+    """
+    # Known Extensions Skip Sniffing
+    Checks that a known extension decides the MIME type without libmagic,
+    and that compressed, generic, unknown or disabled extensions fall back
+    to it.
+    """
+    detector = MimeDetector(from_extension=True)
+
+    with patch.object(MimeDetector, "sniff", return_value="text/plain") as sniff:
+        assert detector.detect(b"{}", name="s3://bucket/report.pdf") == "application/pdf"
+        sniff.assert_not_called()
+        assert detector.detect(b"a,b", name="/data/table.csv.gz") == "text/plain"
+        assert detector.detect(b"a,b", name="/data/table.unknown-ext") == "text/plain"
+        assert detector.detect(b"%PDF-1.4", name="/data/x.bin") == "text/plain"
+        assert MimeDetector(from_extension=False).detect(b"%PDF", name="report.pdf") == "text/plain"
+    assert sniff.call_count == 4
+    assert get_mime_type_content(b"Hello, world!") == "text/plain"
+    assert get_mime_type_content(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n", name="x.bin") == "application/pdf"
+
+
+def test_post_file_takes_content_type_from_extension():
+    """
+    # Post File Takes Content Type From Extension
+    Verifies that an upload to a key with a known extension gets its
+    `Content-Type` without the content being sniffed.
+    """
+    client = MagicMock()
+
+    with patch("boto3.client", return_value=client), \
+            patch.object(MimeDetector, "sniff") as sniff:
+        result = post_file("s3://bucket/data.json", '{"hello": "world"}')
+
+    assert result["status"] == 200
+    sniff.assert_not_called()
+    assert client.put_object.call_args.kwargs["ContentType"] == "application/json"
@@ -5,9 +5,14 @@ This module contains pytest unit tests for the `move_file` function from the
 `klingon_file_manager.manage` module. It tests the file moving process under various conditions.
 
 """
+import io
+import os
+import base64
+import errno
+import hashlib
 import pytest
 from unittest.mock import patch, MagicMock, call
-from klingon_file_manager import move_file
+from klingon_file_manager import copy_local_file, move_file
 
 
 # Mock the get_file, post_file, and delete_file functions
@@ -500,3 +505,222 @@ def test_move_file_exception_raised(
         result["message"]
         == "An error occurred while moving the file: Test exception"
     )
+
+
+def test_move_file_local_rename(tmp_path):
+    """
+    # Move File Local Rename Test
+    Tests that a move between two local paths on one filesystem is a rename
+    and never reads the file through `get_file`.
+    """
+    src_path = tmp_path / "source.bin"
+    dst_path = tmp_path / "destination.bin"
+    src_path.write_bytes(b"Hello, world!")
+
+    with patch("klingon_file_manager.manage.get_file") as mock_get_file:
+        result = move_file(str(src_path), str(dst_path), debug=True)
+
+    assert result["status"] == 200
+    assert result["debug"]["method"] == "rename"
+    assert dst_path.read_bytes() == b"Hello, world!"
+    assert not src_path.exists()
+    mock_get_file.assert_not_called()
+
+
+def test_move_file_local_across_filesystems(tmp_path):
+    """
+    # Move File Local Across Filesystems Test
+    Tests that a local move the kernel cannot rename is copied in the kernel,
+    verified when requested, and only then removed from the source.
+    """
+    src_path = tmp_path / "source.bin"
+    dst_path = tmp_path / "destination.bin"
+    data = os.urandom(256 * 1024)
+    src_path.write_bytes(data)
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if src == str(src_path):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_replace(src, dst)
+
+    with patch("klingon_file_manager.local.os.replace", side_effect=replace):
+        result = move_file(str(src_path), str(dst_path), debug=True, verify=True)
+
+    assert result["status"] == 200
+    assert result["debug"]["method"] != "rename"
+    assert result["md5"] == hashlib.md5(data).hexdigest()
+    assert dst_path.read_bytes() == data
+    assert sorted(os.listdir(tmp_path)) == ["destination.bin"]
+
+
+def test_copy_local_file_buffered_fallback(tmp_path):
+    """
+    # Copy Local File Buffered Fallback Test
+    Tests that `copy_local_file` falls back to a buffered copy when no
+    in-kernel copy is available.
+    """
+    src_path = tmp_path / "source.txt"
+    dst_path = tmp_path / "copy.txt"
+    src_path.write_bytes(b"Hello, world!\n" * 100)
+
+    with patch("klingon_file_manager.local._clone", return_value=False), \
+            patch("klingon_file_manager.local._copy_in_kernel", return_value=None):
+        result = copy_local_file(str(src_path), str(dst_path))
+
+    assert result == {"method": "buffered", "md5": None}
+    assert dst_path.read_bytes() == src_path.read_bytes()
+
+
+
+def test_copy_local_file_never_installs_a_short_copy(tmp_path):
+    """
+    # Copy Local File Never Installs A Short Copy Test
+    Tests that a `copy_file_range` that copies nothing falls back to another
+    method, that one stopping part way fails, and that a failed cross
+    filesystem move leaves the source in place.
+    """
+    src_path = tmp_path / "source.bin"
+    dst_path = tmp_path / "destination.bin"
+    data = os.urandom(100_000)
+    src_path.write_bytes(data)
+
+    with patch("klingon_file_manager.local._clone", return_value=False), \
+            patch("klingon_file_manager.local.os.copy_file_range", return_value=0, create=True):
+        result = copy_local_file(str(src_path), str(dst_path))
+    assert result["method"] != "copy_file_range"
+    assert dst_path.read_bytes() == data
+
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if src == str(src_path):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_replace(src, dst)
+
+    dst_path.unlink()
+    with patch("klingon_file_manager.local._clone", return_value=False), \
+            patch("klingon_file_manager.local.os.copy_file_range", side_effect=[4096, 0], create=True), \
+            patch("klingon_file_manager.local.os.replace", side_effect=replace):
+        result = move_file(str(src_path), str(dst_path))
+    assert result["status"] == 500
+    assert src_path.read_bytes() == data
+    assert sorted(os.listdir(tmp_path)) == ["source.bin"]
+
+
+def s3_object_client(data, metadata):
+    """Build a mocked S3 client serving `data` through ranged GETs."""
+    client = MagicMock()
+    client.head_object.return_value = {
+        "ContentLength": len(data),
+        "ETag": '"etag"',
+        "Metadata": metadata,
+    }
+
+    def get_object(Range=None, **kwargs):
+        if Range is None:
+            return {"Body": io.BytesIO(data)}
+        start, end = map(int, Range[len("bytes="):].split("-"))
+        return {"Body": io.BytesIO(data[start:end + 1])}
+
+    client.get_object.side_effect = get_object
+    return client
+
+
+def test_move_file_local_to_s3_streams(tmp_path):
+    """
+    # Move File Local To S3 Streams Test
+    Tests that a local to S3 move uploads from the file on disk with its
+    `ContentMD5` for S3 to check, and deletes the source without reading the
+    object back.
+    """
+    src_path = tmp_path / "video.bin"
+    data = os.urandom(64 * 1024)
+    src_path.write_bytes(data)
+    md5 = hashlib.md5(data).hexdigest()
+    client = MagicMock()
+
+    with patch("boto3.client", return_value=client), \
+            patch("klingon_file_manager.manage.get_file") as mock_get_file:
+        result = move_file(str(src_path), "s3://bucket/video.bin", buffer_size=16 * 1024)
+
+    assert result["status"] == 200
+    assert result["md5"] == md5
+    assert client.put_object.call_args.kwargs["ContentLength"] == len(data)
+    assert client.put_object.call_args.kwargs["ContentMD5"] == base64.b64encode(hashlib.md5(data).digest()).decode()
+    client.head_object.assert_not_called()
+    assert not src_path.exists()
+    mock_get_file.assert_not_called()
+
+
+def test_move_file_s3_to_local_streams(tmp_path):
+    """
+    # Move File S3 To Local Streams Test
+    Tests that an S3 to local move downloads straight into the destination
+    file and deletes the source object once the MD5 matches.
+    """
+    data = os.urandom(64 * 1024)
+    client = s3_object_client(data, {"md5": hashlib.md5(data).hexdigest()})
+    dst_path = tmp_path / "video.bin"
+
+    with patch("boto3.client", return_value=client):
+        result = move_file("s3://bucket/video.bin", str(dst_path))
+
+    assert result["status"] == 200
+    assert dst_path.read_bytes() == data
+    client.delete_object.assert_called_once_with(Bucket="bucket", Key="video.bin")
+
+
+def test_move_file_s3_to_local_keeps_source_on_mismatch(tmp_path):
+    """
+    # Move File S3 To Local Keeps Source On Mismatch Test
+    Tests that the source object is kept when the downloaded data does not
+    match its stored MD5.
+    """
+    data = os.urandom(1024)
+    client = s3_object_client(data, {"md5": hashlib.md5(b"other").hexdigest()})
+
+    with patch("boto3.client", return_value=client):
+        result = move_file("s3://bucket/video.bin", str(tmp_path / "video.bin"))
+
+    assert result["status"] == 500
+    client.delete_object.assert_not_called()
+    assert os.listdir(tmp_path) == []
+
+
+def test_move_file_s3_to_local_keeps_unverifiable_source(tmp_path):
+    """
+    # Move File S3 To Local Keeps Unverifiable Source Test
+    Tests that a download with no MD5 or checksum to check against is kept
+    but the source is not deleted, and the object is downloaded only once.
+    """
+    data = os.urandom(64 * 1024)
+    client = s3_object_client(data, {})
+
+    with patch("boto3.client", return_value=client):
+        result = move_file("s3://bucket/video.bin", str(tmp_path / "video.bin"))
+
+    assert result["status"] == 409
+    assert "verify=True" in result["message"]
+    client.delete_object.assert_not_called()
+    assert client.get_object.call_count == 1
+    assert (tmp_path / "video.bin").read_bytes() == data
+
+
+def test_move_file_s3_to_local_verify_hashes_unverifiable_source(tmp_path):
+    """
+    # Move File S3 To Local Verify Hashes Unverifiable Source Test
+    Tests that `verify` hashes a source with no MD5 or checksum a second
+    time and deletes it once the download matches.
+    """
+    data = os.urandom(64 * 1024)
+    client = s3_object_client(data, {})
+
+    with patch("boto3.client", return_value=client):
+        result = move_file("s3://bucket/video.bin", str(tmp_path / "video.bin"), debug=True, verify=True)
+
+    assert result["status"] == 200
+    assert result["md5"] == hashlib.md5(data).hexdigest()
+    assert result["debug"]["verified"] is None
+    assert client.get_object.call_count == 2
+    client.delete_object.assert_called_once_with(Bucket="bucket", Key="video.bin")
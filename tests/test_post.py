@@ -16,6 +16,7 @@ Scenarios include:
     - posts that have additional metadata
     - S3 authentication failures
     - S3 invalid bucket name failures
+    - streamed posts from file objects and chunk iterators
 
 """
 import pytest
@@ -24,6 +25,8 @@ import os
 import hashlib
 import logging
 import boto3
+import base64
+from unittest.mock import MagicMock, patch
 
 
 def test_post_to_local_success():
@@ -322,3 +325,67 @@ def test_post_to_local_with_md5():
 # Run the test with pytest
 if __name__ == "__main__":
     pytest.main()
+
+
+def test_post_stream_to_local(tmp_path):
+    """
+    Tests that a chunk iterator is written to a local file in one pass with
+    its MD5 hash and size computed on the way, and that no partial file is
+    left behind when the provided MD5 does not match.
+    """
+    chunks = [b"a" * 1000, b"b" * 1000, b"c" * 24]
+    data = b"".join(chunks)
+    destination = tmp_path / "streamed.bin"
+
+    result = post_file(str(destination), iter(chunks))
+    assert result["status"] == 200
+    assert result["md5"] == hashlib.md5(data).hexdigest()
+    assert result["content_size"] == len(data)
+    assert destination.read_bytes() == data
+
+    result = post_file(str(tmp_path / "bad.bin"), iter(chunks), md5="0" * 32)
+    assert result["status"] == 409
+    assert os.listdir(tmp_path) == ["streamed.bin"]
+
+
+def test_post_stream_file_object_to_s3(tmp_path):
+    """
+    Tests that an open file is uploaded to S3 straight from disk, rewound
+    after hashing, with the MD5, size and MIME type in the request, and that
+    the caller's file is left open.
+    """
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"Hello world!\n" * 1000)
+    client = MagicMock()
+    client.put_object.side_effect = lambda **kwargs: kwargs["Body"].read()
+
+    with patch("boto3.client", return_value=client), open(source, "rb") as file:
+        result = post_file("s3://bucket/source.txt", file)
+        assert not file.closed
+
+    md5 = hashlib.md5(source.read_bytes()).hexdigest()
+    assert result["status"] == 200
+    assert result["md5"] == md5
+    kwargs = client.put_object.call_args.kwargs
+    assert kwargs["ContentLength"] == 13000
+    assert kwargs["Metadata"]["md5"] == md5
+    assert kwargs["ContentType"] == "text/plain"
+    assert kwargs["ContentMD5"] == base64.b64encode(bytes.fromhex(md5)).decode()
+
+
+def test_post_stream_iterator_to_s3_is_spooled():
+    """
+    Tests that a non-seekable chunk iterator is spooled before upload so the
+    MD5 hash can be sent ahead of the body.
+    """
+    chunks = (bytes([i]) * 100 for i in range(256))
+    uploaded = {}
+    client = MagicMock()
+    client.put_object.side_effect = lambda **kwargs: uploaded.update(body=kwargs["Body"].read())
+
+    with patch("boto3.client", return_value=client):
+        result = post_file("s3://bucket/generated.bin", chunks)
+
+    assert result["status"] == 200
+    assert result["md5"] == hashlib.md5(uploaded["body"]).hexdigest()
+    assert len(uploaded["body"]) == 25600
@@ -0,0 +1,115 @@
+# test_regions.py
+"""
+# Region Tests
+
+This module contains pytest unit tests for the bucket region cache in the
+`klingon_file_manager.regions` module and the regional clients handed out by
+`FileManager.client_for()`.
+"""
+import json
+from unittest.mock import MagicMock, patch
+from klingon_file_manager.regions import RegionCache
+from klingon_file_manager.session import FileManager
+
+
+def head_bucket_response(region):
+    """Build a `head_bucket` response carrying the bucket region header."""
+    return {"ResponseMetadata": {"HTTPHeaders": {"x-amz-bucket-region": region}}}
+
+
+def test_discover_reads_region_header_once():
+    """
+    # Discover Reads Region Header Once
+    Verifies that the region is read from the `head_bucket` response and that
+    later lookups are answered from the cache.
+    """
+    cache = RegionCache()
+    client = MagicMock()
+    client.head_bucket.return_value = head_bucket_response("eu-west-1")
+    assert cache.discover("bucket", client) == "eu-west-1"
+    assert cache.discover("bucket", client) == "eu-west-1"
+    client.head_bucket.assert_called_once_with(Bucket="bucket")
+
+
+def test_discover_reads_region_from_error_response():
+    """
+    # Discover Reads Region From Error Response
+    Ensures that a redirected or denied `head_bucket` still yields the region
+    S3 reports in the error response.
+    """
+    error = Exception("moved")
+    error.response = head_bucket_response("ap-southeast-2")
+    client = MagicMock()
+    client.head_bucket.side_effect = error
+    assert RegionCache().discover("bucket", client) == "ap-southeast-2"
+
+
+def test_failed_discovery_is_not_repeated():
+    """
+    # Failed Discovery Is Not Repeated
+    Ensures that a bucket whose region cannot be determined does not cost a
+    `head_bucket` request on every lookup.
+    """
+    cache = RegionCache()
+    client = MagicMock()
+    client.head_bucket.side_effect = Exception("no network")
+    assert cache.discover("bucket", client) is None
+    assert cache.discover("bucket", client) is None
+    assert client.head_bucket.call_count == 1
+
+
+def test_regions_are_persisted(tmp_path):
+    """
+    # Regions Are Persisted
+    Verifies that regions written to the shared file are visible to another
+    cache and that invalidation removes them.
+    """
+    path = str(tmp_path / "regions.json")
+    RegionCache(path=path).set("bucket", "us-west-2")
+    assert json.load(open(path)) == {"bucket": "us-west-2"}
+    other = RegionCache(path=path)
+    assert other.get("bucket") == "us-west-2"
+    other.invalidate("bucket")
+    assert RegionCache(path=path).get("bucket") is None
+
+
+def test_regions_written_later_are_picked_up(tmp_path):
+    """
+    # Regions Written Later Are Picked Up
+    Ensures that a cache which already read the shared file sees a region
+    written afterwards by another process instead of discovering it again,
+    and does not re-read an unchanged file on every miss.
+    """
+    path = str(tmp_path / "regions.json")
+    cache = RegionCache(path=path)
+    RegionCache(path=path).set("first", "us-west-2")
+    assert cache.get("first") == "us-west-2"
+
+    RegionCache(path=path).set("second", "eu-west-1")
+    client = MagicMock()
+    assert cache.discover("second", client) == "eu-west-1"
+    client.head_bucket.assert_not_called()
+
+    with patch.object(RegionCache, "_read_file") as read_file:
+        assert cache.get("third") is None
+    read_file.assert_not_called()
+
+
+def test_client_for_uses_regional_client():
+    """
+    # Client For Uses Regional Client
+    Verifies that a bucket outside the default region gets its own pooled
+    client bound to that region, and a bucket in the default region reuses
+    the default client.
+    """
+    manager = FileManager(region_name="us-east-1")
+    default = manager._s3_client = MagicMock()
+    default.head_bucket.side_effect = lambda Bucket: head_bucket_response(
+        "eu-central-1" if Bucket == "far" else "us-east-1"
+    )
+    with patch("boto3.client") as mock_client:
+        far = manager.client_for("far")
+        assert manager.client_for("far") is far
+        assert manager.client_for("near") is default
+    mock_client.assert_called_once()
+    assert mock_client.call_args.kwargs["region_name"] == "eu-central-1"
@@ -0,0 +1,296 @@
+# test_session.py
+"""
+# Session Tests
+
+This module contains pytest unit tests for the `FileManager` session object in
+the `klingon_file_manager.session` module.
+"""
+import os
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from klingon_file_manager import delete_file, post_file
+from klingon_file_manager.session import (
+    FileManager,
+    get_current_manager,
+    get_default_manager,
+    get_tenant_manager,
+    use_credentials,
+)
+
+
+def test_client_is_built_once_and_reused():
+    """
+    # Client Is Built Once And Reused
+    Verifies that several S3 operations share one pooled client.
+    """
+    with patch("boto3.client") as mock_client:
+        mock_client.return_value = MagicMock()
+        manager = FileManager(max_pool_connections=64)
+        manager.delete_file("s3://bucket/file1")
+        manager.delete_file("s3://bucket/file2")
+        manager.post_file("s3://bucket/file3", "Hello, world!")
+
+    assert mock_client.call_count == 1
+    config = mock_client.call_args.kwargs["config"]
+    assert config.max_pool_connections == 64
+    assert config.tcp_keepalive is True
+
+
+def test_module_functions_use_default_manager():
+    """
+    # Module Functions Use Default Manager
+    Ensures that the module level functions reuse the default manager's client.
+    """
+    with patch("boto3.client") as mock_client:
+        mock_s3 = MagicMock()
+        mock_client.return_value = mock_s3
+        delete_file("s3://bucket/file1")
+        delete_file("s3://bucket/file2")
+
+    assert mock_client.call_count == 1
+    assert mock_s3.delete_object.call_count == 2
+    assert get_default_manager().s3_client is mock_s3
+
+
+def test_activate_routes_module_functions():
+    """
+    # Activate Routes Module Functions
+    Ensures that module level functions called inside `activate()` use that
+    manager rather than the default one.
+    """
+    manager = FileManager()
+    manager._s3_client = MagicMock()
+    with manager.activate():
+        assert get_current_manager() is manager
+        delete_file("s3://bucket/file")
+    assert get_current_manager() is not manager
+    manager._s3_client.delete_object.assert_called_once_with(Bucket="bucket", Key="file")
+
+
+def test_prewarm_opens_connections():
+    """
+    # Prewarm Opens Connections
+    Verifies that prewarming sends the requested number of `head_bucket`
+    requests per bucket and ignores failures.
+    """
+    manager = FileManager(max_pool_connections=4)
+    manager._s3_client = MagicMock()
+    manager._s3_client.head_bucket.side_effect = [None, Exception("denied"), None, None]
+    manager.prewarm(["bucket1", "bucket2"], connections=2)
+    assert manager._s3_client.head_bucket.call_count == 4
+
+
+def test_close_drops_clients():
+    """
+    # Close Drops Clients
+    Ensures that closing a manager releases its client so it is rebuilt on
+    next use.
+    """
+    manager = FileManager()
+    client = manager._s3_client = MagicMock()
+    with manager:
+        pass
+    client.close.assert_called_once()
+    assert manager._s3_client is None
+
+
+def test_resources_are_per_thread():
+    """
+    # Resources Are Per Thread
+    Ensures that each thread gets its own S3 resource while the client is
+    shared, since boto3 resources are not thread-safe.
+    """
+    manager = FileManager()
+    with patch('boto3.resource', side_effect=lambda *a, **k: MagicMock()), \
+            patch('boto3.client', side_effect=lambda *a, **k: MagicMock()):
+        main_resource = manager.s3_resource
+        main_client = manager.s3_client
+        seen = {}
+
+        def worker():
+            seen['resource'] = manager.s3_resource
+            seen['client'] = manager.s3_client
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    assert manager.s3_resource is main_resource
+    assert seen['resource'] is not main_resource
+    assert seen['client'] is main_client
+
+
+def test_thread_local_clients():
+    """
+    # Thread Local Clients
+    Ensures that `thread_local_clients=True` gives each thread its own client.
+    """
+    manager = FileManager(thread_local_clients=True)
+    with patch('boto3.client', side_effect=lambda *a, **k: MagicMock()):
+        main_client = manager.s3_client
+        seen = {}
+        thread = threading.Thread(target=lambda: seen.update(client=manager.s3_client))
+        thread.start()
+        thread.join()
+    assert manager.s3_client is main_client
+    assert seen['client'] is not main_client
+
+
+def test_rebuilds_clients_after_fork():
+    """
+    # Rebuilds Clients After Fork
+    Ensures that a manager inherited by a forked child drops the parent's
+    clients without closing them and builds new ones.
+    """
+    manager = FileManager()
+    with patch('boto3.client', side_effect=lambda *a, **k: MagicMock()):
+        parent_client = manager.s3_client
+        with patch('klingon_file_manager.session.os.getpid', return_value=manager._pid + 1):
+            child_client = manager.s3_client
+    assert child_client is not parent_client
+    parent_client.close.assert_not_called()
+
+
+def test_fork_hook_resets_managers():
+    """
+    # Fork Hook Resets Managers
+    Ensures that the after-fork hook drops the clients of every live manager.
+    """
+    from klingon_file_manager.session import _after_fork_in_child
+    manager = FileManager()
+    client = manager._s3_client = MagicMock()
+    _after_fork_in_child()
+    assert manager._s3_client is None
+    client.close.assert_not_called()
+
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() is not available")
+def test_forked_child_does_not_inherit_held_locks():
+    """
+    # Forked Child Does Not Inherit Held Locks
+    Forks while another thread holds every module and cache lock, and checks
+    that the child can take each of them.
+    """
+    from klingon_file_manager import credentials, healing, md5cache, mime, regions, session, utils
+
+    provider = credentials.CredentialProvider()
+    cache = md5cache.MemoryMD5Cache()
+    region_cache = regions.RegionCache()
+    locks = {
+        "provider": lambda: provider._lock,
+        "memory cache": lambda: cache._lock,
+        "region cache": lambda: region_cache._lock,
+        "permission cache": lambda: credentials.get_permission_cache()._lock,
+        "bucket permissions": lambda: credentials._bucket_permissions_lock,
+        "default manager": lambda: session._default_manager_lock,
+        "tenants": lambda: session._tenant_lock,
+        "healer": lambda: healing._healer_lock,
+        "md5 cache": lambda: md5cache._md5_cache_lock,
+        "detector": lambda: mime._detector_lock,
+        "lazy imports": lambda: utils._lazy_lock,
+    }
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        for lock in locks.values():
+            lock().acquire()
+        held.set()
+        release.wait()
+        for lock in locks.values():
+            lock().release()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            stuck = [name for name, lock in locks.items() if not lock().acquire(timeout=1)]
+            os._exit(len(stuck))
+        _, status = os.waitpid(pid, 0)
+    finally:
+        release.set()
+        holder.join()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+TENANT_A = {"aws_access_key_id": "AKIATENANTA", "aws_secret_access_key": "secret-a"}
+TENANT_B = {"access_key": "AKIATENANTB", "secret_key": "secret-b"}
+
+
+def test_tenant_managers_are_cached_per_credentials():
+    """
+    # Tenant Managers Are Cached Per Credentials
+    Verifies that the same credentials reuse one manager, other credentials
+    get their own and that the clients use an explicit boto3 session.
+    """
+    with patch("boto3.session.Session") as mock_session:
+        first = get_tenant_manager(TENANT_A)
+        assert get_tenant_manager(dict(TENANT_A)) is first
+        assert get_tenant_manager(TENANT_B) is not first
+        assert get_tenant_manager(profile="tenant-c").identity == "profile:tenant-c"
+        first.s3_client
+    mock_session.assert_called_once_with(
+        aws_access_key_id="AKIATENANTA",
+        aws_secret_access_key="secret-a",
+        aws_session_token=None,
+        profile_name=None,
+    )
+
+
+def test_operations_use_per_call_credentials():
+    """
+    # Operations Use Per Call Credentials
+    Verifies that `credentials=` routes a single operation through the
+    tenant's client while the default manager is left untouched.
+    """
+    with patch("boto3.session.Session") as mock_session, patch("boto3.client") as mock_default:
+        result = delete_file("s3://bucket/file", credentials=TENANT_A)
+    assert result["status"] == 200
+    mock_session.return_value.client.return_value.delete_object.assert_called_once_with(
+        Bucket="bucket", Key="file"
+    )
+    mock_default.assert_not_called()
+
+
+def test_invalid_credentials_are_rejected():
+    """
+    # Invalid Credentials Are Rejected
+    Ensures that unknown fields and access keys without a secret raise
+    `ValueError` instead of silently using the default chain.
+    """
+    with pytest.raises(ValueError):
+        get_tenant_manager({"access_key": "AKIA"})
+    with pytest.raises(ValueError):
+        get_tenant_manager({"password": "x"})
+
+
+def test_tenant_cache_evicts_least_recently_used():
+    """
+    # Tenant Cache Evicts Least Recently Used
+    Verifies that the cache is bounded and that evicted managers are closed,
+    except while an operation is still using them.
+    """
+    with patch("klingon_file_manager.session.DEFAULT_TENANT_CACHE_SIZE", 1):
+        with use_credentials(TENANT_A) as busy:
+            busy._s3_client = MagicMock()
+            client = busy._s3_client
+            idle = get_tenant_manager(TENANT_B)
+            assert get_current_manager() is busy
+            client.close.assert_not_called()
+        client.close.assert_called_once()
+        assert get_tenant_manager(TENANT_A) is not busy
+        assert get_tenant_manager(TENANT_B) is not idle
+
+
+def test_tenant_cache_evicts_idle_managers():
+    """
+    # Tenant Cache Evicts Idle Managers
+    Verifies that managers unused for longer than the idle timeout are dropped.
+    """
+    first = get_tenant_manager(TENANT_A)
+    with patch("klingon_file_manager.session.DEFAULT_TENANT_IDLE_SECONDS", 0):
+        get_tenant_manager(TENANT_B)
+    assert get_tenant_manager(TENANT_A) is not first
@@ -0,0 +1,318 @@
+# test_transfer.py
+"""
+# Transfer Tests
+
+This module contains pytest unit tests for the multipart upload and ranged
+download engines in the `klingon_file_manager.transfer` module, and for
+`post_file` and `get_file` switching to them above their thresholds.
+"""
+import io
+import array
+import re
+import base64
+import hashlib
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from klingon_file_manager import download_file, get_file, post_file
+from klingon_file_manager.transfer import MIN_PART_SIZE, download_multipart, multipart_etag, upload_multipart
+
+
+class FakeMultipartClient:
+    """In-memory stand-in for the multipart calls of an S3 client."""
+
+    def __init__(self, fail_parts=None):
+        self.lock = threading.Lock()
+        self.parts = {}
+        self.created = None
+        self.completed = None
+        self.aborted = False
+        self.fail_parts = dict(fail_parts or {})
+
+    def create_multipart_upload(self, **kwargs):
+        self.created = kwargs
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **kwargs):
+        number = kwargs["PartNumber"]
+        with self.lock:
+            if self.fail_parts.get(number, 0) > 0:
+                self.fail_parts[number] -= 1
+                raise ConnectionError(f"part {number} dropped")
+        body = kwargs["Body"]
+        assert kwargs["ContentMD5"] == base64.b64encode(hashlib.md5(body).digest()).decode()
+        with self.lock:
+            self.parts[number] = body
+        return {"ETag": f'"{hashlib.md5(body).hexdigest()}"'}
+
+    def complete_multipart_upload(self, **kwargs):
+        self.completed = kwargs
+        numbers = [part["PartNumber"] for part in kwargs["MultipartUpload"]["Parts"]]
+        digests = [hashlib.md5(self.parts[number]).digest() for number in numbers]
+        return {"ETag": f'"{multipart_etag(digests)}"'}
+
+    def abort_multipart_upload(self, **kwargs):
+        self.aborted = True
+
+    def body(self):
+        return b"".join(self.parts[number] for number in sorted(self.parts))
+
+
+def test_upload_multipart_from_file_in_parts(tmp_path):
+    """
+    # Upload Multipart From File In Parts
+    Verifies that a file is split into ordered parts, each with its own MD5,
+    and that the metadata and content type are set on the upload.
+    """
+    data = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 100)
+    path = tmp_path / "large.bin"
+    path.write_bytes(data)
+    client = FakeMultipartClient()
+
+    with open(path, "rb") as file:
+        response = upload_multipart(
+            client, "bucket", "large.bin", file,
+            metadata={"md5": "abc", "file-size-bytes": len(data)},
+            content_type="application/octet-stream",
+            part_size=MIN_PART_SIZE, concurrency=3,
+        )
+
+    assert response["Parts"] == 3
+    assert client.body() == data
+    assert client.created["Metadata"] == {"md5": "abc", "file-size-bytes": str(len(data))}
+    assert client.created["ContentType"] == "application/octet-stream"
+    assert [part["PartNumber"] for part in client.completed["MultipartUpload"]["Parts"]] == [1, 2, 3]
+
+
+def test_upload_multipart_retries_failed_part():
+    """
+    # Upload Multipart Retries Failed Part
+    Ensures that a part failing transiently is retried on its own.
+    """
+    data = b"x" * (MIN_PART_SIZE + 10)
+    client = FakeMultipartClient(fail_parts={2: 1})
+
+    with patch("klingon_file_manager.transfer.time.sleep"):
+        response = upload_multipart(client, "bucket", "key", data, part_size=MIN_PART_SIZE)
+
+    assert response["Parts"] == 2
+    assert client.body() == data
+    assert not client.aborted
+
+
+def test_upload_multipart_aborts_after_retries():
+    """
+    # Upload Multipart Aborts After Retries
+    Checks that a part which keeps failing aborts the upload and raises.
+    """
+    client = FakeMultipartClient(fail_parts={1: 10})
+
+    with patch("klingon_file_manager.transfer.time.sleep"), pytest.raises(ConnectionError):
+        upload_multipart(client, "bucket", "key", b"data", retries=2)
+
+    assert client.aborted
+    assert client.completed is None
+
+
+def test_upload_multipart_rejects_mismatched_etag():
+    """
+    # Upload Multipart Rejects Mismatched ETag
+    Verifies that a completed object whose ETag does not match the parts
+    sent is reported as an error.
+    """
+    client = FakeMultipartClient()
+    client.complete_multipart_upload = MagicMock(return_value={"ETag": '"0123-1"'})
+
+    with pytest.raises(IOError):
+        upload_multipart(client, "bucket", "key", b"data")
+
+
+def test_post_file_switches_to_multipart():
+    """
+    # Post File Switches To Multipart
+    Ensures that `post_file` uploads through the multipart engine above the
+    threshold and keeps the `md5` and `file-size-bytes` metadata.
+    """
+    content = b"\x00\x01" * 1024
+    client = FakeMultipartClient()
+
+    with patch("klingon_file_manager.post.MULTIPART_THRESHOLD", 1024), \
+            patch("boto3.client", return_value=client):
+        result = post_file("s3://bucket/large.bin", content, debug=True)
+
+    assert result["status"] == 200
+    assert result["debug"]["parts"] == 1
+    assert client.body() == content
+    assert client.created["Metadata"]["md5"] == hashlib.md5(content).hexdigest()
+    assert client.created["Metadata"]["file-size-bytes"] == str(len(content))
+
+
+
+def test_post_file_multipart_threshold_counts_bytes():
+    """
+    # Post File Multipart Threshold Counts Bytes
+    Ensures that a memory view with items wider than a byte is measured in
+    bytes, not items, against the multipart threshold.
+    """
+    content = memoryview(array.array("I", range(512)))
+    client = FakeMultipartClient()
+
+    with patch("klingon_file_manager.post.MULTIPART_THRESHOLD", 1024), \
+            patch("boto3.client", return_value=client):
+        result = post_file("s3://bucket/large.bin", content, debug=True)
+
+    assert result["status"] == 200
+    assert result["debug"]["parts"] == 1
+    assert client.body() == content.tobytes()
+
+
+class DroppingBody(io.BytesIO):
+    """Body whose connection drops after `limit` bytes."""
+
+    def __init__(self, data, limit):
+        super().__init__(data)
+        self.limit = limit
+
+    def read(self, size=-1):
+        if self.tell() >= self.limit:
+            raise ConnectionError("connection reset")
+        return super().read(min(size, self.limit - self.tell()))
+
+
+class FakeObjectClient:
+    """In-memory stand-in for the GET calls of an S3 client."""
+
+    def __init__(self, data, metadata=None, etag=None, part_size=None, drop=None):
+        self.data = data
+        self.metadata = metadata or {}
+        self.etag = etag or f'"{hashlib.md5(data).hexdigest()}"'
+        self.part_size = part_size
+        self.drop = dict(drop or {})
+        self.ranges = []
+
+    def head_object(self, **kwargs):
+        size = len(self.data)
+        if "PartNumber" in kwargs:
+            size = min(self.part_size, size)
+        return {"ContentLength": size, "ETag": self.etag, "Metadata": self.metadata}
+
+    def get_object(self, **kwargs):
+        assert kwargs["IfMatch"] == self.etag
+        start, end = map(int, re.fullmatch(r"bytes=(\d+)-(\d+)", kwargs["Range"]).groups())
+        self.ranges.append(start)
+        data = self.data[start:end + 1]
+        limit = self.drop.pop(start, len(data))
+        return {"Body": DroppingBody(data, limit)}
+
+
+def test_download_multipart_into_buffer_verifies_md5():
+    """
+    # Download Multipart Into Buffer Verifies MD5
+    Verifies that an object is fetched in ranges into a buffer and checked
+    against its `md5` metadata.
+    """
+    data = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 100)
+    client = FakeObjectClient(data, metadata={"md5": hashlib.md5(data).hexdigest()})
+
+    result = download_multipart(client, "bucket", "key", part_size=MIN_PART_SIZE, concurrency=3)
+
+    assert result["content"] == data
+    assert result["parts"] == 3
+    assert result["verified"] == "md5"
+    assert sorted(client.ranges) == [0, MIN_PART_SIZE, 2 * MIN_PART_SIZE]
+
+
+def test_download_multipart_resumes_dropped_range():
+    """
+    # Download Multipart Resumes Dropped Range
+    Ensures that a range whose connection drops is requested again from the
+    last byte received rather than from its start.
+    """
+    data = b"y" * (MIN_PART_SIZE + 100)
+    client = FakeObjectClient(data, metadata={"md5": hashlib.md5(data).hexdigest()}, drop={0: 1000})
+
+    with patch("klingon_file_manager.transfer.time.sleep"):
+        result = download_multipart(client, "bucket", "key", part_size=MIN_PART_SIZE)
+
+    assert result["content"] == data
+    assert sorted(client.ranges) == [0, 1000, MIN_PART_SIZE]
+
+
+def test_download_multipart_verifies_multipart_etag(tmp_path):
+    """
+    # Download Multipart Verifies Multipart ETag
+    Checks that an object without `md5` metadata is downloaded in ranges
+    aligned to its uploaded parts and verified against the multipart ETag.
+    """
+    part_size = MIN_PART_SIZE + 1
+    data = bytes(range(256)) * (part_size * 2 // 256 + 1)
+    digests = [hashlib.md5(data[i:i + part_size]).digest() for i in range(0, len(data), part_size)]
+    client = FakeObjectClient(data, etag=f'"{multipart_etag(digests)}"', part_size=part_size)
+
+    with open(tmp_path / "restored.bin", "w+b") as file:
+        result = download_multipart(client, "bucket", "key", target=file)
+
+    assert result["verified"] == "etag"
+    assert result["content"] is None
+    assert (tmp_path / "restored.bin").read_bytes() == data
+
+
+def test_download_multipart_rejects_corrupt_data():
+    """
+    # Download Multipart Rejects Corrupt Data
+    Verifies that content not matching the stored MD5 raises an error.
+    """
+    client = FakeObjectClient(b"data", metadata={"md5": hashlib.md5(b"other").hexdigest()})
+
+    with pytest.raises(IOError):
+        download_multipart(client, "bucket", "key")
+
+
+def test_download_file_writes_local_file(tmp_path):
+    """
+    # Download File Writes Local File
+    Ensures that `download_file` leaves the verified object at the local path
+    and no temporary file behind.
+    """
+    data = b"Hello world!\n" * 1000
+    client = FakeObjectClient(data, metadata={"md5": hashlib.md5(data).hexdigest()})
+    destination = tmp_path / "hello.txt"
+
+    with patch("boto3.client", return_value=client):
+        result = download_file("s3://bucket/hello.txt", str(destination))
+
+    assert result["status"] == 200
+    assert result["md5"] == hashlib.md5(data).hexdigest()
+    assert destination.read_bytes() == data
+    assert os.listdir(tmp_path) == ["hello.txt"]
+
+
+def test_get_file_switches_to_ranged_download():
+    """
+    # Get File Switches To Ranged Download
+    Checks that `get_file` reads the first range from the open body and
+    fetches the rest in parallel above the download threshold.
+    """
+    data = b"z" * (MIN_PART_SIZE + 10)
+    client = FakeObjectClient(data, metadata={"md5": hashlib.md5(data).hexdigest()})
+    resource = MagicMock()
+    resource.meta.client = client
+    resource.Object.return_value.get.return_value = {
+        "Body": io.BytesIO(data),
+        "ContentLength": len(data),
+        "ETag": client.etag,
+        "Metadata": client.metadata,
+    }
+
+    with patch("klingon_file_manager.get.DOWNLOAD_THRESHOLD", 1024), \
+            patch("klingon_file_manager.transfer.MULTIPART_PART_SIZE", MIN_PART_SIZE), \
+            patch("boto3.resource", return_value=resource):
+        result = get_file("s3://bucket/large.bin", debug=True)
+
+    assert result["status"] == 200
+    assert result["content"] == data
+    assert result["debug"]["parts"] == 2
+    assert client.ranges == [MIN_PART_SIZE]
@@ -0,0 +1,67 @@
+"""
+# Binary Detection Utility Function Tests
+Test module for `klingon_file_manager.utils.is_binary_file` on content.
+
+Functions in this test module:
+- `test_is_binary_file_classifies_content`
+- `test_is_binary_file_samples_large_content`
+- `test_is_binary_file_samples_do_not_split_characters`
+"""
+
+import pytest
+from unittest.mock import patch
+
+from klingon_file_manager import is_binary_file
+from klingon_file_manager.utils import BINARY_SAMPLE_BYTES, _BINARY_TAIL_BYTES, _looks_binary
+
+
+@pytest.mark.parametrize("content, binary", [
+    (b"Hello, world!\n", False),
+    ("Grüße, 世界\r\n".encode("utf-8"), False),
+    (b"\x1b[1mbold\x1b[0m\ttabbed", False),
+    (b"", False),
+    (b"Hello\x00world", True),
+    (b"\x01\x02\x03\x04text", True),
+    (b"\xff\xfe\xfd", True),
+    ("truncated é".encode("utf-8")[:-1], True),
+])
+def test_is_binary_file_classifies_content(content, binary):
+    """
+    # Test Is Binary File: Classifies Content
+    Verifies that NUL bytes, dense control bytes and invalid UTF-8 mark
+    content as binary, for bytes and memory views alike.
+    """
+    assert is_binary_file(content) is binary
+    assert is_binary_file(memoryview(content)) is binary
+    assert is_binary_file(content, full_scan=True) is binary
+
+
+def test_is_binary_file_samples_large_content():
+    """
+    # Test Is Binary File: Samples Large Content
+    Ensures that only the head and tail of large content are inspected
+    unless `full_scan` is set.
+    """
+    content = b"a" * BINARY_SAMPLE_BYTES + b"\x00" + b"a" * BINARY_SAMPLE_BYTES
+
+    assert is_binary_file(content) is False
+    assert is_binary_file(content, full_scan=True) is True
+    assert is_binary_file(content + b"\xff") is True
+
+    with patch("klingon_file_manager.utils._looks_binary", wraps=_looks_binary) as looks_binary:
+        is_binary_file(b"a" * (BINARY_SAMPLE_BYTES * 16))
+    inspected = sum(len(call.args[0]) for call in looks_binary.call_args_list)
+    assert inspected <= BINARY_SAMPLE_BYTES + _BINARY_TAIL_BYTES
+
+
+def test_is_binary_file_samples_do_not_split_characters():
+    """
+    # Test Is Binary File: Samples Do Not Split Characters
+    Checks that a multi-byte character cut by either sample edge does not
+    make text look binary.
+    """
+    character = "€".encode("utf-8")
+    content = character * (BINARY_SAMPLE_BYTES * 2 // len(character) + 1) + b"x"
+
+    for shift in range(len(character)):
+        assert is_binary_file(b"x" * shift + content) is False